@@ -0,0 +1,61 @@
+class Glyph:
+    """Компактное описание глифа BDF шрифта.
+
+    bitmap хранит строки пикселей подряд, по row_bytes байт на строку:
+    старший бит первого байта - левый пиксель, биты за пределами width
+    всегда нулевые.
+    """
+
+    __slots__ = ('encoding', 'code', 'width', 'height',
+                 'x_offset', 'y_offset', 'bitmap')
+
+    def __init__(self, encoding=-1, code=-1, width=0, height=0,
+                 x_offset=0, y_offset=0, bitmap=b''):
+        self.encoding = encoding  # Unicode код
+        self.code = code  # код в кодовой странице вывода (CP1251 при разборе)
+        self.width = width
+        self.height = height
+        self.x_offset = x_offset
+        self.y_offset = y_offset
+        self.bitmap = bitmap
+
+    @property
+    def row_bytes(self):
+        """Количество байт на строку пикселей"""
+        return (self.width + 7) // 8
+
+    @property
+    def rows(self):
+        """Количество строк пикселей в bitmap"""
+        row_bytes = self.row_bytes
+        return len(self.bitmap) // row_bytes if row_bytes else 0
+
+    def __repr__(self):
+        return (f"Glyph(encoding={self.encoding}, code={self.code}, "
+                f"width={self.width}, height={self.height}, rows={self.rows})")
+
+
+def decode_bitmap(hex_rows, width):
+    """Декодирует hex строки BITMAP в буфер строк по (width + 7) // 8 байт.
+
+    Пустые строки пропускаются, некорректные становятся пустыми строками
+    пикселей, лишние биты справа от width обнуляются.
+    """
+    row_bytes = (width + 7) // 8
+    row_chars = row_bytes * 2
+    rows = [row[:row_chars].ljust(row_chars, '0') for row in hex_rows if row]
+    try:
+        buf = bytearray.fromhex(''.join(rows))
+    except ValueError:
+        buf = bytearray()
+        for row in rows:
+            try:
+                buf += bytes.fromhex(row)
+            except ValueError:
+                buf += bytes(row_bytes)
+
+    if width % 8:
+        mask = (0xFF << (8 - width % 8)) & 0xFF
+        for i in range(row_bytes - 1, len(buf), row_bytes):
+            buf[i] &= mask
+    return bytes(buf)
@@ -0,0 +1,107 @@
+import os
+import struct
+
+from glyph_cache import cache_entry_path
+
+
+class BDFIndex:
+    """Индекс смещений глифов в BDF файле.
+
+    Для каждого блока STARTCHAR...ENDCHAR хранится его ENCODING, смещение
+    в байтах от начала файла и длина. Индекс строится один раз за проход по
+    файлу и сохраняется рядом с кэшем глифов, после чего нужные глифы можно
+    читать напрямую через seek, не просматривая остальные блоки.
+    """
+
+    MAGIC = b'BDFI'
+    FORMAT_VERSION = 1
+    EXTENSION = '.idx'
+
+    # magic, версия формата, ширина шрифта, высота шрифта, число записей
+    HEADER = struct.Struct('<4sHHHI')
+    # encoding, смещение блока, длина блока
+    ENTRY = struct.Struct('<iII')
+
+    def __init__(self, font_width=0, font_height=0, entries=None):
+        self.font_width = font_width
+        self.font_height = font_height
+        # encoding -> (смещение, длина)
+        self.entries = entries if entries is not None else {}
+
+    @classmethod
+    def open(cls, font_path, index_dir):
+        """Загружает индекс шрифта из index_dir, при отсутствии строит и сохраняет"""
+        path = cache_entry_path(index_dir, font_path, cls.FORMAT_VERSION, cls.EXTENSION)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return cls.decode(f.read())
+        except (OSError, ValueError, struct.error):
+            pass
+
+        index = cls.build(font_path)
+        try:
+            os.makedirs(index_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(index.encode())
+            os.replace(tmp_path, path)
+        except OSError:
+            # Индекс можно использовать и без сохранения на диск
+            pass
+        return index
+
+    @classmethod
+    def build(cls, font_path):
+        """Строит индекс одним проходом по файлу без разбора bitmap данных"""
+        index = cls()
+        offset = 0
+        start = None
+        encoding = -1
+        with open(font_path, 'rb') as f:
+            for line in f:
+                if start is None:
+                    if line.startswith(b'STARTCHAR'):
+                        start = offset
+                        encoding = -1
+                    elif line.startswith(b'FONTBOUNDINGBOX '):
+                        parts = line.split()
+                        index.font_width = int(parts[1])
+                        index.font_height = int(parts[2])
+                elif line.startswith(b'ENCODING '):
+                    encoding = int(line.split()[1])
+                elif line.strip() == b'ENDCHAR':
+                    # Первое вхождение кода выигрывает, как и при потоковом парсинге
+                    if encoding != -1 and encoding not in index.entries:
+                        index.entries[encoding] = (start, offset + len(line) - start)
+                    start = None
+                offset += len(line)
+        return index
+
+    def lookup(self, encodings):
+        """Возвращает (смещение, длина) для найденных кодов в порядке следования в файле"""
+        found = [self.entries[e] for e in encodings if e in self.entries]
+        return sorted(found)
+
+    def encode(self):
+        """Кодирует индекс в бинарный вид"""
+        parts = [self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION,
+                                  self.font_width, self.font_height, len(self.entries))]
+        for encoding, (offset, length) in sorted(self.entries.items()):
+            parts.append(self.ENTRY.pack(encoding, offset, length))
+        return b''.join(parts)
+
+    @classmethod
+    def decode(cls, data):
+        """Декодирует бинарный вид индекса"""
+        magic, version, font_width, font_height, count = cls.HEADER.unpack_from(data, 0)
+        if magic != cls.MAGIC or version != cls.FORMAT_VERSION:
+            raise ValueError("Неверный формат индекса")
+        if len(data) != cls.HEADER.size + count * cls.ENTRY.size:
+            raise ValueError("Поврежденный индекс")
+
+        entries = {}
+        for encoding, offset, length in cls.ENTRY.iter_unpack(data[cls.HEADER.size:]):
+            entries[encoding] = (offset, length)
+        return cls(font_width, font_height, entries)
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    """SHA-1 содержимого файла, читается блоками"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_key(font_path, symbols, height, font_name, options, version):
+    """Ключ сборки выходного файла.
+
+    Хэш от содержимого BDF файла (а не от его mtime), набора символов,
+    высоты, имени шрифта, параметров вывода и версии генератора.
+    """
+    parts = {
+        'font': file_digest(font_path),
+        'symbols': symbols,
+        'height': height,
+        'name': font_name,
+        'options': options,
+        'version': version
+    }
+    data = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+
+def combine_keys(keys):
+    """Общий ключ для выходного файла, собранного из нескольких входов"""
+    return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+
+
+class BuildManifest:
+    """Манифест сборки шрифтов в выходном каталоге.
+
+    Для каждого выходного файла (имя шрифта + формат) хранится ключ сборки
+    и SHA-1 записанного файла. Если ключ совпадает, а файл на месте и не
+    изменен вручную, генерацию можно пропустить и не трогать файл, чтобы
+    не менять его mtime и не вызывать перекомпиляцию прошивки.
+    """
+
+    FILENAME = '.font_build.json'
+    FORMAT_VERSION = 1
+
+    def __init__(self, output_dir):
+        self.path = os.path.join(output_dir, self.FILENAME)
+        # "имя шрифта|формат" -> {'key', 'filename', 'sha1'}
+        self.entries = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == self.FORMAT_VERSION:
+                self.entries = data['outputs']
+        except (OSError, ValueError, KeyError, AttributeError):
+            # Нет или поврежден манифест - все файлы будут пересобраны
+            pass
+
+    @staticmethod
+    def output_id(font_name, output_format):
+        return f"{font_name}|{output_format}"
+
+    def is_current(self, output_id, key):
+        """Возвращает имя файла, если он собран с этим ключом и не изменен, иначе None"""
+        entry = self.entries.get(output_id)
+        if entry is None or entry.get('key') != key:
+            return None
+        filename = os.path.join(os.path.dirname(self.path), entry['filename'])
+        try:
+            if file_digest(filename) != entry['sha1']:
+                return None
+        except OSError:
+            return None
+        return filename
+
+    def record(self, output_id, key, filename):
+        """Запоминает ключ сборки только что записанного файла"""
+        self.entries[output_id] = {
+            'key': key,
+            'filename': os.path.relpath(filename, os.path.dirname(self.path)),
+            'sha1': file_digest(filename)
+        }
+
+    def save(self):
+        """Атомарно сохраняет манифест"""
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.FORMAT_VERSION, 'outputs': self.entries},
+                      f, ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
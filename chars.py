@@ -1,51 +1,404 @@
+import hashlib
+import json
+import os
+import re
 import sys
 import string
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+# Печатаемые видимые символы: ASCII без управляющих и кириллица.
+# Множество строится один раз, классификация - одна проверка вхождения
+VISIBLE_CHARS = frozenset(
+    (set(string.printable) - set('\n\t\r\x0b\x0c')) |
+    {chr(c) for c in range(ord('А'), ord('я') + 1)} |
+    {'ё', 'Ё'}
+)
+
+# Размер блока потокового чтения
+CHUNK_SIZE = 1024 * 1024
+
+# Расширения файлов, которые берутся при обходе каталогов
+TEXT_EXTENSIONS = ('.txt', '.c', '.h', '.cpp', '.hpp', '.json', '.csv', '.po', '.ini', '.xml')
+
+# Строковые и символьные литералы C. Комментарии и #include пропускаются:
+# имена заголовков и закомментированный текст на экран не выводятся.
+# Префиксы u8/L/u/U не нужны - литерал начинается с кавычки, а без них
+# у выражения короткий набор первых символов и поиск идет быстрее
+LITERAL = re.compile(r'''
+    //[^\n]*|/\*.*?\*/
+  | \#[ \t]*include[^\n]*
+  | "((?:\\.|[^"\\\n])*)"
+  | '((?:\\.|[^'\\\n])*)'
+''', re.DOTALL | re.VERBOSE)
+ESCAPE = re.compile(r'\\(?:x([0-9A-Fa-f]+)|([0-7]{1,3})|u([0-9A-Fa-f]{4})|U([0-9A-Fa-f]{8})|(.))',
+                    re.DOTALL)
+SIMPLE_ESCAPES = {'n': '\n', 't': '\t', 'r': '\r', 'a': '\a', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+# Кодировка строк в прошивке: байты из \x и восьмеричных escape-
+# последовательностей - коды CP1251, как и коды глифов шрифта
+TARGET_ENCODING = 'windows-1251'
+
+# Символы литералов, для которых генератор может построить глиф:
+# все печатаемые символы CP1251
+CP1251_PRINTABLE = frozenset(c for c in bytes(range(0x20, 0x100)).decode(TARGET_ENCODING, errors='ignore')
+                             if c.isprintable())
+
+SOURCE_EXTENSIONS = ('.c', '.h')
+LITERAL_CACHE = os.path.join('.font_cache', 'literals.json')
+LITERAL_CACHE_VERSION = 2
 
 def is_visible_printable(c: str) -> bool:
     """Проверяет, является ли символ печатаемым и видимым (без \n, \t и т.п.)"""
-    if c == ' ':
-        return True
-    if c in string.printable:
-        if c in '\n\t\r\x0b\x0c':
-            return False
-        return True
-    # Поддержка кириллицы
-    return 'а' <= c <= 'я' or 'А' <= c <= 'Я' or c in 'ёЁ'
+    return c in VISIBLE_CHARS
+
+def count_visible_chars(text: str) -> Counter:
+    """Частоты печатаемых символов текста.
+
+    Counter считает все символы за один проход на C, после чего
+    классифицируются только различные символы, а не каждый по отдельности.
+    """
+    counts = Counter(text)
+    for c in [c for c in counts if c not in VISIBLE_CHARS]:
+        del counts[c]
+    return counts
 
 def get_visible_chars_sorted(text: str) -> str:
     """Возвращает уникальные печатаемые символы, отсортированные по коду"""
-    unique_chars = {c for c in text if is_visible_printable(c)}
+    unique_chars = VISIBLE_CHARS.intersection(text)
     return ''.join(sorted(unique_chars, key=ord))
 
+def scan_file(filename: str, with_counts: bool = True) -> tuple:
+    """Читает файл блоками и собирает печатаемые символы.
+
+    Возвращает (имя файла, Counter, текст ошибки или None). Без
+    with_counts собирается только множество символов - это вдвое быстрее,
+    а все частоты в Counter равны 1.
+    """
+    counts = Counter()
+    unique_chars = set()
+    try:
+        with open(filename, 'r', encoding='utf-8') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if with_counts:
+                    counts.update(count_visible_chars(chunk))
+                else:
+                    unique_chars.update(chunk)
+        counts.update(VISIBLE_CHARS.intersection(unique_chars))
+    except (OSError, UnicodeDecodeError) as e:
+        return filename, counts, str(e)
+    return filename, counts, None
+
+def collect_files(paths, extensions=TEXT_EXTENSIONS):
+    """Раскрывает каталоги в список файлов с подходящими расширениями.
+
+    Явно указанные файлы берутся всегда, независимо от расширения.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                files.extend(os.path.join(root, name) for name in sorted(names)
+                             if name.lower().endswith(extensions))
+        else:
+            files.append(path)
+    return files
+
+def scan_files(files, workers=None, with_counts=True) -> tuple:
+    """Сканирует файлы параллельно в пуле процессов.
+
+    Возвращает (суммарный Counter, список (файл, ошибка)).
+    """
+    total = Counter()
+    errors = []
+    if len(files) == 1:
+        results = [scan_file(files[0], with_counts)]
+        executor = None
+    else:
+        executor = ProcessPoolExecutor(max_workers=workers)
+        results = executor.map(scan_file, files, [with_counts] * len(files), chunksize=8)
+    try:
+        for filename, counts, error in results:
+            total.update(counts)
+            if error:
+                errors.append((filename, error))
+    finally:
+        if executor:
+            executor.shutdown()
+    return total, errors
+
+def decode_literal(body: str) -> str:
+    """Раскрывает escape-последовательности в теле литерала.
+
+    Подряд идущие байты \\xHH и \\ooo собираются вместе и декодируются
+    как CP1251, \\u и \\U дают символ Unicode напрямую.
+    """
+    pieces = []
+    pending = bytearray()
+    pos = 0
+    for match in ESCAPE.finditer(body):
+        if match.start() > pos:
+            if pending:
+                pieces.append(pending.decode(TARGET_ENCODING, errors='ignore'))
+                pending.clear()
+            pieces.append(body[pos:match.start()])
+        pos = match.end()
+        hex_code, octal_code, short_code, long_code, simple = match.groups()
+        if hex_code or octal_code:
+            pending.append(int(hex_code, 16) & 0xFF if hex_code else int(octal_code, 8) & 0xFF)
+            continue
+        if pending:
+            pieces.append(pending.decode(TARGET_ENCODING, errors='ignore'))
+            pending.clear()
+        if short_code or long_code:
+            try:
+                pieces.append(chr(int(short_code or long_code, 16)))
+            except ValueError:
+                pass
+        else:
+            pieces.append(SIMPLE_ESCAPES.get(simple, simple))
+    if pending:
+        pieces.append(pending.decode(TARGET_ENCODING, errors='ignore'))
+    pieces.append(body[pos:])
+    return ''.join(pieces)
+
+def decode_source(data: bytes) -> str:
+    """Декодирует исходник: UTF-8, а если он не подходит - CP1251"""
+    try:
+        return data.decode('utf-8')
+    except UnicodeDecodeError:
+        return data.decode(TARGET_ENCODING, errors='replace')
+
+def extract_literal_chars(text: str) -> str:
+    """Уникальные печатаемые символы всех литералов исходника"""
+    # Одинаковые литералы раскрываются один раз
+    bodies = {match.group(1) if match.group(1) is not None else match.group(2)
+              for match in LITERAL.finditer(text)}
+    bodies.discard(None)
+    unique_chars = set()
+    for body in bodies:
+        unique_chars.update(decode_literal(body) if '\\' in body else body)
+    return ''.join(sorted(CP1251_PRINTABLE.intersection(unique_chars), key=ord))
+
+def scan_source_file(job: tuple) -> tuple:
+    """Хэширует исходник и, если содержимое изменилось, разбирает литералы.
+
+    job - (имя файла, sha1 из кэша или None). Возвращает (имя файла,
+    размер, mtime_ns, sha1, символы или None, если sha1 совпал, ошибка).
+    """
+    filename, cached_sha1 = job
+    try:
+        st = os.stat(filename)
+        with open(filename, 'rb') as f:
+            data = f.read()
+    except OSError as e:
+        return filename, 0, 0, None, None, str(e)
+    sha1 = hashlib.sha1(data).hexdigest()
+    if sha1 == cached_sha1:
+        return filename, st.st_size, st.st_mtime_ns, sha1, None, None
+    return filename, st.st_size, st.st_mtime_ns, sha1, extract_literal_chars(decode_source(data)), None
+
+def load_literal_cache(cache_path: str) -> dict:
+    """Загружает кэш литералов: абсолютный путь -> запись о файле"""
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') == LITERAL_CACHE_VERSION:
+            return cache['files']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+def save_literal_cache(cache_path: str, files: dict):
+    """Сохраняет кэш литералов атомарной заменой файла"""
+    try:
+        os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': LITERAL_CACHE_VERSION, 'files': files}, f, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        # Кэш - только ускорение, ошибки записи не критичны
+        pass
+
+def scan_literals(paths, cache_path=LITERAL_CACHE, workers=None) -> tuple:
+    """Собирает символы строковых литералов .c/.h файлов с инкрементальным кэшем.
+
+    Файлы с тем же размером и mtime берутся из кэша без чтения; у
+    остальных сравнивается sha1 содержимого, и литералы разбираются
+    заново только у действительно измененных файлов.
+
+    Возвращает (строка символов, статистика, список (файл, ошибка)).
+    """
+    files = collect_files(paths, SOURCE_EXTENSIONS)
+    cache = load_literal_cache(cache_path) if cache_path else {}
+    entries = {}
+    jobs = []
+    for filename in files:
+        key = os.path.abspath(filename)
+        entry = cache.get(key)
+        try:
+            st = os.stat(filename)
+        except OSError:
+            jobs.append((filename, None))
+            continue
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            entries[key] = entry
+        else:
+            jobs.append((filename, entry['sha1'] if entry else None))
+
+    stats = {'files': len(files), 'cached': len(entries), 'rehashed': 0, 'parsed': 0}
+    errors = []
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(scan_source_file, jobs, chunksize=16))
+    else:
+        results = [scan_source_file(job) for job in jobs]
+
+    for filename, size, mtime_ns, sha1, chars, error in results:
+        key = os.path.abspath(filename)
+        if error:
+            errors.append((filename, error))
+            continue
+        if chars is None:
+            # Файл тронут, но содержимое то же
+            chars = cache[key]['chars']
+            stats['rehashed'] += 1
+        else:
+            stats['parsed'] += 1
+        entries[key] = {'size': size, 'mtime_ns': mtime_ns, 'sha1': sha1, 'chars': chars}
+
+    if cache_path and (jobs or len(entries) != len(cache)):
+        # Файлы, которых больше нет в дереве, из кэша выпадают
+        save_literal_cache(cache_path, entries)
+
+    unique_chars = set()
+    for entry in entries.values():
+        unique_chars.update(entry['chars'])
+    return ''.join(sorted(unique_chars, key=ord)), stats, errors
+
+def show_frequencies(counts: Counter):
+    """Печатает таблицу частот символов по убыванию"""
+    total = sum(counts.values()) or 1
+    print(f"Всего символов: {sum(counts.values())}, уникальных: {len(counts)}")
+    for c, count in counts.most_common():
+        print(f"  '{c}'  U+{ord(c):04X}  {count:>10}  {count * 100 / total:6.2f}%")
+
+def write_symbol_file(filename: str, symbols: str):
+    """Записывает набор символов в файл, который загружает генератор шрифтов"""
+    with open(filename, 'w', encoding='utf-8') as f:
+        f.write(symbols + '\n')
+
 def show_help():
     print("Использование:")
     print("  python unique_chars.py <файл>          # прочитать текст из файла")
     print("  python unique_chars.py строка1 строка2  # обработать переданную строку")
+    print("  python unique_chars.py [--freq] [-j N] <файл|каталог>")
+    print("  python unique_chars.py [--freq] [-j N] --files <файл|каталог> ...")
+    print("                                          # просканировать файлы и каталоги")
+    print()
+    print("  python unique_chars.py --literals [-o файл] <каталог|файл.c> ...")
+    print("                                          # символы строковых литералов .c/.h")
+    print()
+    print("Параметры:")
+    print("  -f, --files  считать все аргументы файлами и каталогами")
+    print("  --freq       показать частоты символов")
+    print("  -j N         число процессов (по умолчанию по числу ядер)")
+    print("  --literals   собрать символы из строковых литералов исходников C")
+    print("  -o файл      записать набор символов в файл для генератора шрифтов")
+    print("  --no-cache   не использовать кэш разобранных исходников")
+    print("  --           конец параметров; параметры пишутся только перед аргументами")
     print()
     print("Примеры:")
     print("  python unique_chars.py menu.txt")
     print("  python unique_chars.py \"Часы -Часы 22\"")
+    print("  python unique_chars.py -- -f строка")
+    print("  python unique_chars.py --freq --files firmware/ui lang/ru.txt")
+    print("  python unique_chars.py --literals -o symbols.txt firmware/src")
 
 def main():
-    if len(sys.argv) == 1:
+    args = sys.argv[1:]
+    if not args:
         show_help()
         return
 
-    # Один аргумент → файл
-    if len(sys.argv) == 2:
-        filename = sys.argv[1]
-        try:
-            with open(filename, 'r', encoding='utf-8') as f:
-                text = f.read()
-        except Exception as e:
-            print(f"Ошибка: не удалось прочитать файл '{filename}': {e}", file=sys.stderr)
+    # Флаги распознаются только перед первым аргументом (или до '--'):
+    # строки для обработки могут начинаться с '-' и содержать '-j', '-f'
+    show_freq = False
+    files_mode = False
+    literals = False
+    use_cache = True
+    workers = None
+    output = None
+    while args:
+        flag = args[0]
+        if flag == '--':
+            args.pop(0)
+            break
+        if flag == '--freq':
+            show_freq = True
+        elif flag in ('--files', '-f'):
+            files_mode = True
+        elif flag == '--literals':
+            literals = True
+        elif flag == '--no-cache':
+            use_cache = False
+        elif flag == '-j':
+            try:
+                workers = int(args[1])
+            except (IndexError, ValueError):
+                print("Ошибка: после -j нужно число процессов", file=sys.stderr)
+                sys.exit(1)
+            args.pop(0)
+        elif flag == '-o':
+            if len(args) < 2:
+                print("Ошибка: после -o нужно имя файла", file=sys.stderr)
+                sys.exit(1)
+            output = args[1]
+            args.pop(0)
+        else:
+            break
+        args.pop(0)
+    if not args:
+        show_help()
+        return
+
+    if literals:
+        start = time.perf_counter()
+        result, stats, errors = scan_literals(args, LITERAL_CACHE if use_cache else None, workers)
+        for filename, error in errors:
+            print(f"Ошибка: не удалось прочитать файл '{filename}': {error}", file=sys.stderr)
+        print(f"Файлов: {stats['files']}, из кэша: {stats['cached']}, "
+              f"без изменений: {stats['rehashed']}, разобрано: {stats['parsed']}, "
+              f"время: {time.perf_counter() - start:.2f} с", file=sys.stderr)
+        print(result)
+        if output:
+            write_symbol_file(output, result)
+        return
+
+    if files_mode or len(args) == 1:
+        # Один аргумент или --files → потоковое сканирование файлов и каталогов
+        files = collect_files(args)
+        counts, errors = scan_files(files, workers, with_counts=show_freq)
+        for filename, error in errors:
+            print(f"Ошибка: не удалось прочитать файл '{filename}': {error}", file=sys.stderr)
+        if errors and len(errors) == len(files):
             sys.exit(1)
     else:
         # Несколько аргументов → объединяем в строку
-        text = ' '.join(sys.argv[1:])
+        counts = count_visible_chars(' '.join(args))
 
-    result = get_visible_chars_sorted(text)
+    result = ''.join(sorted(counts, key=ord))
     print(result)
+    if output:
+        write_symbol_file(output, result)
+    if show_freq:
+        show_frequencies(counts)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,219 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from font_check import parse_header
+from font_emitters import EMITTERS
+from font_generator import BDFParser, FontGeneratorMenu
+from font_model import pack_font
+
+# Этапы генерации в порядке выполнения: каждый берет результат предыдущих
+STAGES = ('parse', 'bits', 'pack', 'emit', 'check')
+PRESET_SETS = (1, 2, 3)
+
+
+def measure(func, repeat):
+    """Выполняет func repeat раз и еще раз под tracemalloc.
+
+    Возвращает (результат, лучшее время в секундах, пик памяти в байтах).
+    Память меряется отдельным прогоном, чтобы tracemalloc не искажал время.
+    """
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        result = func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, best, peak
+
+
+def bench_font(font_path, symbol_set, repeat, output_dir):
+    """Прогоняет все этапы для шрифта и набора символов.
+
+    Возвращает словарь этап -> {'time', 'peak'} и количество глифов.
+    """
+    menu = FontGeneratorMenu()
+    menu.settings['symbol_set'] = symbol_set
+    symbols = menu.get_symbol_list()
+    font_name = os.path.splitext(os.path.basename(font_path))[0]
+    emitter = EMITTERS['header']
+    stages = {}
+
+    def parse():
+        # Разбор без кэша глифов и индекса BDF - холодный путь
+        with contextlib.redirect_stdout(io.StringIO()):
+            return BDFParser(font_path, symbols).parse_font()
+
+    (glyphs, height, font_width), elapsed, peak = measure(parse, repeat)
+    stages['parse'] = {'time': elapsed, 'peak': peak}
+    if not glyphs:
+        return stages, 0
+
+    def bits():
+        return [menu.bits_to_bytes(menu.bitmap_to_bits(glyph.bitmap, glyph.width, height))
+                for glyph in glyphs]
+
+    def pack():
+        return pack_font(glyphs, font_name, height)
+
+    _, elapsed, peak = measure(bits, repeat)
+    stages['bits'] = {'time': elapsed, 'peak': peak}
+    font, elapsed, peak = measure(pack, repeat)
+    stages['pack'] = {'time': elapsed, 'peak': peak}
+
+    def emit():
+        # Запись каждый раз: Emitter.write пропускает файл с тем же содержимым
+        content = emitter.emit(font)
+        with open(emitter.filename(font, output_dir), 'w', encoding='utf-8') as f:
+            f.write(content)
+        return content
+
+    try:
+        content, elapsed, peak = measure(emit, repeat)
+    except ValueError:
+        # Шрифт не помещается в поля C заголовка (check_limits): emit и
+        # check пропускаются, как недостающие этапы
+        return stages, len(glyphs)
+    stages['emit'] = {'time': elapsed, 'peak': peak}
+    _, elapsed, peak = measure(lambda: parse_header(content), repeat)
+    stages['check'] = {'time': elapsed, 'peak': peak}
+    return stages, len(glyphs)
+
+
+def find_fonts(fonts_dir, pattern=None):
+    """Все BDF файлы каталога (рекурсивно), по возрастанию пути"""
+    fonts = []
+    for root, dirs, files in os.walk(fonts_dir):
+        for file in files:
+            path = os.path.join(root, file)
+            if file.lower().endswith('.bdf') and (not pattern or pattern in path):
+                fonts.append(path)
+    return sorted(fonts)
+
+
+def run_benchmarks(fonts_dir, symbol_sets, repeat, pattern=None):
+    """Прогоняет все шрифты каталога на всех наборах, печатает таблицу.
+
+    Возвращает список записей {'font', 'symbol_set', 'stage', 'glyphs',
+    'time', 'peak'}.
+    """
+    fonts = find_fonts(fonts_dir, pattern)
+    results = []
+    header = f"{'font':<28}{'set':>4}{'glyphs':>7}" + ''.join(f"{stage + ', ms':>11}" for stage in STAGES)
+    print(header + f"{'peak, KB':>10}")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for font_path in fonts:
+            font = os.path.relpath(font_path, fonts_dir).replace(os.sep, '/')
+            for symbol_set in symbol_sets:
+                stages, glyphs = bench_font(font_path, symbol_set, repeat, output_dir)
+                for stage in STAGES:
+                    if stage in stages:
+                        results.append({'font': font, 'symbol_set': symbol_set, 'stage': stage,
+                                        'glyphs': glyphs, **stages[stage]})
+                times = ''.join(f"{stages[stage]['time'] * 1000:>11.2f}" if stage in stages
+                                else f"{'-':>11}" for stage in STAGES)
+                peak = max(stage['peak'] for stage in stages.values())
+                print(f"{font:<28}{symbol_set:>4}{glyphs:>7}{times}{peak / 1024:>10.1f}")
+
+    totals = ''.join(f"{sum(r['time'] for r in results if r['stage'] == stage) * 1000:>11.2f}"
+                     for stage in STAGES)
+    print(f"{'total':<39}{totals}")
+    return results
+
+
+def result_key(result):
+    return f"{result['font']}|{result['symbol_set']}|{result['stage']}"
+
+
+def compare_results(results, baseline, threshold, min_time):
+    """Сравнивает результаты с базовыми, возвращает список регрессий.
+
+    Регрессия - рост времени или пика памяти больше чем в (1 + threshold)
+    раз; этапы быстрее min_time секунд по времени не сравниваются, на них
+    слишком велик шум.
+    """
+    base = {result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        old = base.get(result_key(result))
+        if old is None:
+            continue
+        for metric in ('time', 'peak'):
+            if metric == 'time' and max(old['time'], result['time']) < min_time:
+                continue
+            if old[metric] and result[metric] > old[metric] * (1 + threshold):
+                regressions.append((result_key(result), metric, old[metric], result[metric]))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the font generator stages on the bundled BDF fonts")
+    parser.add_argument('--fonts-dir', default='Fonts',
+                        help="directory with BDF fonts (default: Fonts)")
+    parser.add_argument('--filter', default=None,
+                        help="only fonts whose path contains this string")
+    parser.add_argument('--sets', default='1,2,3',
+                        help="comma-separated preset symbol sets (default: 1,2,3)")
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help="timed runs per stage, the best one is kept (default: 3)")
+    parser.add_argument('-o', '--output', default=None, help="write results to a JSON file")
+    parser.add_argument('--baseline', default=None,
+                        help="JSON results to compare with; regressions make the exit code 1")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed relative slowdown or memory growth (default: 0.25)")
+    parser.add_argument('--min-time', type=float, default=0.001,
+                        help="stages faster than this many seconds are not compared by time "
+                             "(default: 0.001)")
+    args = parser.parse_args()
+
+    symbol_sets = [int(value) for value in args.sets.split(',')]
+    if any(value not in PRESET_SETS for value in symbol_sets):
+        parser.error(f"symbol sets must be among {PRESET_SETS}")
+
+    results = run_benchmarks(args.fonts_dir, symbol_sets, max(args.repeat, 1), args.filter)
+    if not results:
+        parser.error(f"no BDF fonts found in '{args.fonts_dir}'")
+
+    if args.output:
+        report = {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'results': results
+        }
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare_results(results, baseline, args.threshold, args.min_time)
+        print(f"Compared with {args.baseline}: {len(regressions)} regression(s) "
+              f"over {args.threshold:.0%}")
+        for key, metric, old, new in regressions:
+            if metric == 'time':
+                print(f"  {key}: time {old * 1000:.2f} -> {new * 1000:.2f} ms")
+            else:
+                print(f"  {key}: peak {old / 1024:.1f} -> {new / 1024:.1f} KB")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
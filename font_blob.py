@@ -0,0 +1,254 @@
+import mmap
+import struct
+
+from font_codepages import CODEPAGE_IDS, CODEPAGES
+from font_scale import SCALE_FILTERS
+
+
+# Бинарный файл шрифта. Все поля little-endian, таблица глифов и данные
+# выровнены на 4 байта, поэтому файл можно использовать на месте
+# (из флеша или через mmap) с такими структурами:
+#
+# typedef struct
+# {
+#     char magic[4];              // "SSDF"
+#     uint16_t version;
+#     uint16_t header_size;
+#     uint8_t font_height;
+#     uint8_t format;             // 0 - строки, 1 - обрезка, 2 - страницы, 3 - сжатие
+#     uint8_t compression;        // метод сжатия для format == 3
+#     uint8_t codepage;           // 0 - CP1251, 1 - CP866, 2 - KOI8-R, 3 - ISO-8859-5, 4 - Unicode
+#     uint16_t glyphs_num;
+#     uint16_t glyph_size;        // размер записи глифа
+#     uint32_t glyphs_offset;     // смещение таблицы глифов от начала файла
+#     uint32_t data_offset;       // смещение данных от начала файла
+#     uint32_t data_size;
+#     uint32_t source_offset;     // смещение font_blob_source_t, 0 - нет
+# } font_blob_header_t;
+#
+# typedef struct
+# {
+#     uint8_t ascii_code;
+#     uint8_t width;
+#     uint8_t crop_x, crop_y;          // только для format == 1
+#     uint8_t crop_width, crop_height; // только для format == 1
+#     uint16_t data_size;              // длина в байтах для format == 3
+#     uint32_t offset;                 // в битах для format 0/1, в байтах для 2/3
+# } font_blob_glyph_t;
+#
+# Для codepage == 4 (Unicode) код не помещается в байт, и запись глифа
+# другая (glyph_size == 16):
+#
+# typedef struct
+# {
+#     uint32_t code;
+#     uint8_t width;
+#     uint8_t crop_x, crop_y;
+#     uint8_t crop_width, crop_height;
+#     uint8_t reserved;
+#     uint16_t data_size;
+#     uint32_t offset;
+# } font_blob_wide_glyph_t;
+#
+# Исходный шрифт для font_check --verify записывается после данных, если
+# его нельзя найти по имени файла (TTF/OTF или BDF с другим именем) или
+# глифы BDF шрифта масштабированы:
+#
+# typedef struct
+# {
+#     uint8_t source_type;        // 0 - BDF, 1 - TTF, 2 - OTF
+#     uint8_t name_size;
+#     uint8_t source_height;      // высота BDF шрифта до масштабирования, 0 - нет
+#     uint8_t scale_filter;       // 0 - nearest, 1 - area
+#     char name[];                // имя файла исходного шрифта, UTF-8
+# } font_blob_source_t;
+
+MAGIC = b'SSDF'
+VERSION = 1
+HEADER = struct.Struct('<4sHHBBBBHHIIII')
+GLYPH = struct.Struct('<BBBBBBHI')
+WIDE_GLYPH = struct.Struct('<IBBBBBxHI')
+WIDE_CODEPAGE = 'unicode'
+SOURCE = struct.Struct('<BBBB')
+SOURCE_TYPES = ('bdf', 'ttf', 'otf')
+
+FORMAT_ROWS = 0
+FORMAT_CROP = 1
+FORMAT_PAGES = 2
+FORMAT_COMPRESSED = 3
+
+FORMAT_NAMES = {
+    FORMAT_ROWS: 'rows',
+    FORMAT_CROP: 'crop',
+    FORMAT_PAGES: 'pages',
+    FORMAT_COMPRESSED: 'compressed'
+}
+FORMAT_IDS = {name: fmt for fmt, name in FORMAT_NAMES.items()}
+
+
+def align4(value):
+    """Округляет смещение вверх до границы 4 байт"""
+    return (value + 3) & ~3
+
+
+def build_blob(font):
+    """Собирает бинарный файл из упакованного шрифта (font_model.PackedFont)"""
+    fmt = FORMAT_IDS[font.kind]
+    records = []
+    for record in font.records:
+        code, width = record[:2]
+        if font.kind == 'crop':
+            x, y, crop_width, crop_height, offset = record[2:]
+            records.append((code, width, x, y, crop_width, crop_height, 0, offset))
+        elif font.kind == 'compressed':
+            offset, size = record[2:]
+            records.append((code, width, 0, 0, 0, 0, size, offset))
+        else:
+            records.append((code, width, 0, 0, 0, 0, 0, record[2]))
+
+    glyph_struct = WIDE_GLYPH if font.codepage == WIDE_CODEPAGE else GLYPH
+    glyphs_offset = align4(HEADER.size)
+    data_offset = align4(glyphs_offset + glyph_struct.size * len(records))
+    source = b''
+    source_offset = 0
+    if font.source is not None:
+        name = font.source['file'].encode('utf-8')[:0xFF]
+        source = SOURCE.pack(SOURCE_TYPES.index(font.source['type']), len(name),
+                             font.source.get('height', 0),
+                             SCALE_FILTERS.index(font.source.get('scale_filter', SCALE_FILTERS[0])))
+        source += name
+        source_offset = align4(data_offset + len(font.font_data))
+
+    header = HEADER.pack(MAGIC, VERSION, HEADER.size, font.height, fmt, font.codec_id,
+                         CODEPAGE_IDS[font.codepage],
+                         len(records), glyph_struct.size, glyphs_offset, data_offset,
+                         len(font.font_data), source_offset)
+    table = b''.join(glyph_struct.pack(*record) for record in records)
+    data = font.font_data.ljust(source_offset - data_offset, b'\0') if source else font.font_data
+    return b''.join([
+        header.ljust(glyphs_offset, b'\0'),
+        table.ljust(data_offset - glyphs_offset, b'\0'),
+        data,
+        source
+    ])
+
+
+class FontBlob:
+    """Загрузчик бинарного файла шрифта без копирования данных.
+
+    Файл отображается в память через mmap, таблица глифов и данные
+    доступны как memoryview поверх отображения.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            self.mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.buffer = memoryview(self.mmap)
+
+        try:
+            (magic, version, header_size, self.font_height, self.format, self.compression,
+             self.codepage, self.glyphs_num, glyph_size, glyphs_offset, data_offset, data_size,
+             self.source_offset) = \
+                HEADER.unpack_from(self.buffer, 0)
+        except struct.error:
+            self.close()
+            raise ValueError(f"Файл шрифта '{path}' короче заголовка") from None
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"'{path}' не является бинарным файлом шрифта")
+        self.glyph_struct = WIDE_GLYPH if self.codepage == CODEPAGE_IDS[WIDE_CODEPAGE] else GLYPH
+        if version != VERSION or glyph_size != self.glyph_struct.size:
+            self.close()
+            raise ValueError(f"Неподдерживаемая версия файла шрифта: {version}")
+        if (data_offset + data_size > len(self.buffer)
+                or glyphs_offset + glyph_size * self.glyphs_num > len(self.buffer)):
+            self.close()
+            raise ValueError(f"Файл шрифта '{path}' обрезан")
+
+        self.table = self.buffer[glyphs_offset:glyphs_offset + glyph_size * self.glyphs_num]
+        self.font_data = self.buffer[data_offset:data_offset + data_size]
+
+    def close(self):
+        """Освобождает отображение файла"""
+        for name in ('table', 'font_data', 'buffer'):
+            view = getattr(self, name, None)
+            if view is not None:
+                view.release()
+        self.mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def format_name(self):
+        return FORMAT_NAMES.get(self.format, 'unknown')
+
+    @property
+    def source(self):
+        """Исходный шрифт (как font_model.PackedFont.source) или None, если он не записан"""
+        if not self.source_offset:
+            return None
+        try:
+            source_type, name_size, source_height, scale_filter = \
+                SOURCE.unpack_from(self.buffer, self.source_offset)
+            start = self.source_offset + SOURCE.size
+            name = bytes(self.buffer[start:start + name_size]).decode('utf-8')
+        except (struct.error, UnicodeDecodeError):
+            raise ValueError(f"Поврежден блок исходного шрифта в '{self.path}'") from None
+        if source_type >= len(SOURCE_TYPES) or scale_filter >= len(SCALE_FILTERS):
+            raise ValueError(f"Неизвестный тип исходного шрифта или фильтр в '{self.path}'")
+        source = {'file': name, 'type': SOURCE_TYPES[source_type]}
+        if source_height:
+            source['height'] = source_height
+            source['scale_filter'] = SCALE_FILTERS[scale_filter]
+        return source
+
+    @property
+    def codepage_name(self):
+        # Поле было зарезервировано и равно 0 в старых файлах - это CP1251
+        names = list(CODEPAGES)
+        return names[self.codepage] if self.codepage < len(names) else 'unknown'
+
+    def glyph(self, index):
+        """Возвращает описание глифа в том же виде, что и font_check.py"""
+        code, width, x, y, crop_width, crop_height, size, offset = \
+            self.glyph_struct.unpack_from(self.table, index * self.glyph_struct.size)
+        glyph = {'ascii_code': code, 'width': width}
+        if self.format == FORMAT_PAGES:
+            glyph['byte_offset'] = offset
+        elif self.format == FORMAT_COMPRESSED:
+            glyph['data_offset'] = offset
+            glyph['data_size'] = size
+        else:
+            glyph['bit_offset'] = offset
+            if self.format == FORMAT_CROP:
+                glyph.update(crop_x=x, crop_y=y, crop_width=crop_width,
+                             crop_height=crop_height)
+        return glyph
+
+    def glyphs(self):
+        """Возвращает описания всех глифов"""
+        return [self.glyph(i) for i in range(self.glyphs_num)]
+
+    def find(self, code):
+        """Ищет глиф по коду символа двоичным поиском, возвращает индекс или -1"""
+        size = self.glyph_struct.size
+        wide = self.glyph_struct is WIDE_GLYPH
+        low, high = 0, self.glyphs_num - 1
+        while low <= high:
+            middle = (low + high) // 2
+            if wide:
+                middle_code = WIDE_GLYPH.unpack_from(self.table, middle * size)[0]
+            else:
+                middle_code = self.table[middle * size]
+            if middle_code == code:
+                return middle
+            if middle_code < code:
+                low = middle + 1
+            else:
+                high = middle - 1
+        return -1
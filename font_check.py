@@ -1,122 +1,192 @@
+import argparse
+import contextlib
+import io
+import os
 import re
 import sys
+from concurrent.futures import ProcessPoolExecutor
 
-def escape_hyphen(text):
-    """Экранирует только дефис для регулярных выражений"""
-    return text.replace('-', r'\-')
-
-def parse_hex_array(content, array_name):
-    """Парсит массив hex значений из C кода"""
-    escaped_name = escape_hyphen(array_name)
-    # Ищем начало массива
-    start_pattern = f'static const unsigned char {escaped_name}\\s*\\[\\s*\\]\\s*=\\s*\\{{'
-    start_match = re.search(start_pattern, content, re.DOTALL)
-    if not start_match:
-        return None
-    
-    # Находим начало данных (после открывающей скобки)
-    start_pos = start_match.end()
-    # Ищем соответствующую закрывающую скобку
-    brace_count = 1
-    pos = start_pos
-    while pos < len(content) and brace_count > 0:
-        if content[pos] == '{':
-            brace_count += 1
-        elif content[pos] == '}':
-            brace_count -= 1
-        pos += 1
-    
-    if brace_count != 0:
-        return None
-    
-    # Извлекаем данные между скобками
-    data_str = content[start_pos:pos-1]
-    # Извлекаем hex значения
-    hex_values = re.findall(r'0x[0-9A-Fa-f]{2}', data_str)
-    return [int(x, 16) for x in hex_values]
-
-def parse_glyphs_array(content, array_name):
-    """Парсит массив глифов из C кода"""
-    escaped_name = escape_hyphen(array_name)
-    # Ищем начало массива
-    start_pattern = f'static const glyphs_t\\s+{escaped_name}\\s*\\[\\s*\\]\\s*=\\s*\\{{'
-    start_match = re.search(start_pattern, content, re.DOTALL)
-    if not start_match:
-        print(f"DEBUG: Pattern not found. Looking for pattern: {start_pattern}")
-        return None
-    
-    # Находим начало данных (после открывающей скобки)
-    start_pos = start_match.end()
-    # Ищем соответствующую закрывающую скобку
-    brace_count = 1
-    pos = start_pos
-    while pos < len(content) and brace_count > 0:
-        if content[pos] == '{':
-            brace_count += 1
-        elif content[pos] == '}':
-            brace_count -= 1
-        pos += 1
-    
-    if brace_count != 0:
-        return None
-    
-    # Извлекаем данные между скобками
-    data_str = content[start_pos:pos-1]
-    glyphs = []
-    
-    # Ищем все структуры { код, ширина, смещение }
-    pattern_glyph = r'\{\s*0x([0-9A-Fa-f]{2})\s*,\s*(\d+)\s*,\s*(\d+)\s*\}'
-    matches = re.findall(pattern_glyph, data_str)
-    
-    for match in matches:
-        ascii_code = int(match[0], 16)
-        width = int(match[1])
-        bit_offset = int(match[2])
-        glyphs.append({
-            'ascii_code': ascii_code,
-            'width': width,
-            'bit_offset': bit_offset
-        })
-    
-    return glyphs
-
-def parse_font_descriptor(content, descriptor_name):
-    """Парсит дескриптор шрифта"""
-    escaped_name = escape_hyphen(descriptor_name)
-    # Ищем начало структуры
-    start_pattern = f'static const font_descriptor_t\\s+{escaped_name}\\s*=\\s*\\{{'
-    start_match = re.search(start_pattern, content, re.DOTALL)
-    if not start_match:
-        return None
-    
-    # Находим начало данных (после открывающей скобки)
-    start_pos = start_match.end()
-    # Ищем соответствующую закрывающую скобку
-    brace_count = 1
-    pos = start_pos
-    while pos < len(content) and brace_count > 0:
-        if content[pos] == '{':
-            brace_count += 1
-        elif content[pos] == '}':
-            brace_count -= 1
-        pos += 1
-    
-    if brace_count != 0:
-        return None
-    
-    # Извлекаем данные между скобками
-    data_str = content[start_pos:pos-1]
-    
-    # Извлекаем все числа
-    numbers = re.findall(r'(\d+)', data_str)
-    
-    if len(numbers) >= 3:
-        return {
-            'font_data_size': int(numbers[-3]),
-            'glyphs_num': int(numbers[-2]),
-            'font_height': int(numbers[-1])
-        }
-    return None
+from font_blob import FORMAT_COMPRESSED, FontBlob
+from font_codepages import CODEPAGES, DEFAULT_CODEPAGE, select_glyphs
+from font_compress import CODECS, bytes_to_bit_string, decompress_glyph
+from font_model import GLYPH_FIELDS, safe_identifier
+from font_packer import bit_string_to_bytes, glyph_to_bit_string
+from font_scale import SCALE_FILTERS
+from glyph_cache import GlyphCache
+
+# Лексемы C/C++ кода. Комментарии, строки и директивы препроцессора
+# пропускаются, а подряд идущие числа через запятую - содержимое массива
+# данных - забираются одной лексемой, без разбора по символам
+TOKEN = re.compile(r'''
+    (?P<skip>\s+|//[^\n]*|/\*.*?\*/|\#[^\n]*|"(?:\\.|[^"\\\n])*"|'(?:\\.|[^'\\\n])*')
+  | (?P<numbers>(?:(?:0[xX][0-9A-Fa-f]+|\d+)[uUlL]*\s*,\s*)*(?:0[xX][0-9A-Fa-f]+|\d+)[uUlL]*)
+  | (?P<name>[A-Za-z_]\w*(?:::\w+)*)
+  | (?P<punct>.)
+''', re.DOTALL | re.VERBOSE)
+NUMBER = re.compile(r'0[xX][0-9A-Fa-f]+|\d+')
+# Комментарий с исходным именем шрифта, который пишут все генераторы заголовков
+FONT_COMMENT = re.compile(r'^// Font: (.*), Height: \d+px$', re.MULTILINE)
+# Кодовая страница кодов глифов; без комментария - DEFAULT_CODEPAGE
+CODEPAGE_COMMENT = re.compile(r'^// Codepage: (\S+)$', re.MULTILINE)
+# Исходный шрифт, если его не найти по имени шрифта (после строки // Font:)
+SOURCE_COMMENT = re.compile(r'^// Source: (.*), type: (\w+)$', re.MULTILINE)
+# Высота BDF шрифта и фильтр, если глифы масштабированы (после // Source:)
+SCALED_COMMENT = re.compile(r'^// Scaled: from (\d+)px, filter: (\w+)$', re.MULTILINE)
+HEX_BYTES = re.compile(r'0[xX][0-9A-Fa-f]{2}(?:\s*,\s*0[xX][0-9A-Fa-f]{2})*')
+
+# Тип записи глифа -> вид упаковки (см. font_model.GLYPH_FIELDS)
+GLYPH_KINDS = {
+    'glyphs_t': 'rows',
+    'glyphs_crop_t': 'crop',
+    'glyphs_page_t': 'pages',
+    'glyphs_z_t': 'compressed'
+}
+
+def tokenize(content):
+    """Разбивает исходный текст на лексемы (вид, текст) за один проход"""
+    for match in TOKEN.finditer(content):
+        kind = match.lastgroup
+        if kind != 'skip':
+            yield kind, match.group(kind)
+
+def parse_numbers(text):
+    """Переводит лексему с числами через запятую в список чисел"""
+    if HEX_BYTES.fullmatch(text):
+        # Массив данных 0xNN разбирается целиком: fromhex пропускает пробелы
+        return bytes.fromhex(text.replace('0x', '').replace('0X', '').replace(',', ' '))
+    return [int(x, 0) for x in NUMBER.findall(text)]
+
+def parse_initializer(tokens):
+    """Читает инициализатор после открывающей скобки до парной закрывающей.
+
+    Возвращает список значений: числа, имена и вложенные списки. Указатель
+    внутрь массива вида <имя> + <число> (дескрипторы пакета шрифтов)
+    становится кортежем (имя, смещение).
+    """
+    values = []
+    for kind, text in tokens:
+        if kind == 'numbers':
+            values.extend(parse_numbers(text))
+        elif kind == 'name':
+            values.append(text)
+        elif text == '+' and values and isinstance(values[-1], str):
+            kind, text = next(tokens)
+            if kind != 'numbers':
+                raise ValueError(f"Unexpected '{text}' after '{values[-1]} +'")
+            numbers = parse_numbers(text)
+            values[-1] = (values[-1], numbers[0])
+            values.extend(numbers[1:])
+        elif text == '{':
+            values.append(parse_initializer(tokens))
+        elif text == '}':
+            return values
+    raise ValueError("Unexpected end of file inside initializer")
+
+def skip_block(tokens):
+    """Пропускает тело функции или структуры до парной закрывающей скобки"""
+    depth = 1
+    for kind, text in tokens:
+        if text == '{':
+            depth += 1
+        elif text == '}':
+            depth -= 1
+            if not depth:
+                return
+
+def parse_declarations(content):
+    """Находит все объявления верхнего уровня с инициализатором в фигурных скобках.
+
+    Возвращает словарь имя -> {'type', 'qualified_type', 'name',
+    'is_array', 'values'}.
+    Имена переменных могут быть любыми; для типов из пространства имен
+    (C++) берется последняя часть имени.
+    """
+    declarations = {}
+    statement = []
+    tokens = tokenize(content)
+    for kind, text in tokens:
+        if text == '{' and kind == 'punct':
+            if statement[-1:] == ['=']:
+                head = statement[:statement.index('[')] if '[' in statement else statement[:-1]
+                names = [token for token in head if token not in ('*', '&')]
+                if len(names) >= 2:
+                    name = names[-1]
+                    declarations[name] = {
+                        'type': names[-2].split('::')[-1],
+                        'qualified_type': names[-2],
+                        'name': name,
+                        'is_array': '[' in statement,
+                        'values': parse_initializer(tokens)
+                    }
+                else:
+                    skip_block(tokens)
+            else:
+                skip_block(tokens)
+            statement = []
+        elif text == ';' and kind == 'punct':
+            statement = []
+        else:
+            statement.append(text)
+    return declarations
+
+def parse_header(content):
+    """Извлекает из заголовка все шрифты за один проход по тексту.
+
+    Шрифт находится по дескриптору (тип *descriptor_t): его первые два
+    поля указывают на массивы данных и глифов. Возвращает список словарей
+    с ключами name, kind, language ('c' или 'cpp'), font_data, glyphs,
+    font_data_size, glyphs_num, font_height и, для сжатого формата,
+    compression.
+    """
+    declarations = parse_declarations(content)
+    fonts = []
+    for declaration in declarations.values():
+        if not declaration['type'].endswith('descriptor_t'):
+            continue
+        # Таблица дескрипторов описывает несколько шрифтов
+        entries = declaration['values'] if declaration['is_array'] else [declaration['values']]
+        for index, entry in enumerate(entries):
+            if not isinstance(entry, list):
+                continue
+            refs = [value for value in entry if isinstance(value, (str, tuple))]
+            numbers = [value for value in entry if isinstance(value, int)]
+            if len(refs) < 2 or len(numbers) < 3 or not isinstance(refs[1], str):
+                continue
+            data_name, glyphs_name = refs[:2]
+            if isinstance(data_name, tuple):
+                # Шрифт пакета занимает font_data_size байт общего массива со смещения
+                data_name, data_offset = data_name
+                data_range = slice(data_offset, data_offset + numbers[0])
+            else:
+                data_range = slice(None)
+            data = declarations.get(data_name)
+            glyphs_array = declarations.get(glyphs_name)
+            if data is None or glyphs_array is None:
+                continue
+            kind = GLYPH_KINDS.get(glyphs_array['type'])
+            if kind is None:
+                continue
+
+            fields = ('ascii_code', 'width') + GLYPH_FIELDS[kind]
+            name = declaration['name']
+            if declaration['is_array']:
+                name = f"{name}[{index}]"
+            font = {
+                'name': name,
+                'kind': kind,
+                'language': 'cpp' if '::' in glyphs_array['qualified_type'] else 'c',
+                'data_name': data_name,
+                'glyphs_name': glyphs_name,
+                'font_data': bytes(data['values'][data_range]),
+                'glyphs': [dict(zip(fields, record)) for record in glyphs_array['values']],
+                'font_data_size': numbers[0],
+                'glyphs_num': numbers[1],
+                'font_height': numbers[2]
+            }
+            if kind == 'compressed' and len(numbers) > 3:
+                font['compression'] = numbers[3]
+            fonts.append(font)
+    return fonts
     
 def get_bit(bitmap_data, bit_index):
     """Получает значение бита по индексу из массива байтов"""
@@ -138,81 +208,40 @@ def visualize_glyph(font_data, glyph, height):
         char_display = '<?>'
         
     print(f"Character '{char_display}' (ASCII: {glyph['ascii_code']}, CP1251: 0x{glyph['ascii_code']:02X})")
-    print(f"Width: {glyph['width']}, Bit offset: {glyph['bit_offset']}")
+    if 'byte_offset' in glyph:
+        print(f"Width: {glyph['width']}, Byte offset: {glyph['byte_offset']} (SSD1306 pages)")
+    else:
+        print(f"Width: {glyph['width']}, Bit offset: {glyph['bit_offset']}")
+    
+    if 'crop_width' in glyph:
+        print(f"Crop: x={glyph['crop_x']}, y={glyph['crop_y']}, "
+              f"{glyph['crop_width']}x{glyph['crop_height']}")
     
     for row in range(height):
         line = ""
         for col in range(glyph['width']):
-            bit_index = glyph['bit_offset'] + row * glyph['width'] + col
-            bit_value = get_bit(font_data, bit_index)
+            if 'byte_offset' in glyph:
+                # Страница - 8 строк, байт на столбец, младший бит - верхняя строка
+                byte_index = glyph['byte_offset'] + (row // 8) * glyph['width'] + col
+                bit_value = get_bit(font_data, byte_index * 8 + row % 8)
+            elif 'crop_width' in glyph:
+                # В обрезанном глифе хранится только прямоугольник, остальное - фон
+                x = col - glyph['crop_x']
+                y = row - glyph['crop_y']
+                if 0 <= x < glyph['crop_width'] and 0 <= y < glyph['crop_height']:
+                    bit_index = glyph['bit_offset'] + y * glyph['crop_width'] + x
+                    bit_value = get_bit(font_data, bit_index)
+                else:
+                    bit_value = 0
+            else:
+                bit_index = glyph['bit_offset'] + row * glyph['width'] + col
+                bit_value = get_bit(font_data, bit_index)
             line += "█" if bit_value else "."
         print(line)
     print()
 
-def main():
-    if len(sys.argv) != 2:
-        print("Usage: python font_check.py <font_header_file.h>")
-        return
-    
-    filename = sys.argv[1]
-    
-    try:
-        with open(filename, 'r', encoding='utf-8') as f:
-            content = f.read()
-    except FileNotFoundError:
-        print(f"Error: File '{filename}' not found")
-        return
-    except Exception as e:
-        print(f"Error reading file: {e}")
-        return
-    
-    # Извлекаем имя шрифта из имени файла
-    import os
-    font_name = os.path.splitext(os.path.basename(filename))[0]
-    if font_name.startswith('font_'):
-        font_name = font_name[5:]  # убираем 'font_'
-    
-    # Находим высоту из имени файла (последняя часть после _)
-    parts = font_name.split('_')
-    if len(parts) > 1 and parts[-1].isdigit():
-        height = int(parts[-1])
-        font_name_without_height = '_'.join(parts[:-1])
-    else:
-        height = 8  # значение по умолчанию
-        font_name_without_height = font_name
-    
-    # Имена переменных без высоты
-    font_data_var = f"font_data_{font_name_without_height}"
-    glyphs_var = f"glyphs_{font_name_without_height}"
-    descriptor_var = f"font_{font_name_without_height}"
-    
-    print(f"Parsing arrays: {font_data_var}, {glyphs_var}, {descriptor_var}")
-    
-    # Парсим данные
-    font_data = parse_hex_array(content, font_data_var)
-    glyphs = parse_glyphs_array(content, glyphs_var)
-    descriptor = parse_font_descriptor(content, descriptor_var)
-    height = descriptor['font_height']
-    if font_data is None:
-        print(f"Error: Could not parse font data array '{font_data_var}'")
-        return
-    
-    if glyphs is None:
-        print(f"Error: Could not parse glyphs array '{glyphs_var}'")
-        return
-    
-    if descriptor is None:
-        print(f"Warning: Could not parse font descriptor '{descriptor_var}'")
-    
-    print(f"Font file: {filename}")
-    print(f"Font name: {font_name_without_height}")
-    print(f"Height: {height}")
-    print(f"Font data size: {len(font_data)} bytes")
-    print(f"Number of glyphs: {len(glyphs)}")
-    if descriptor:
-        print(f"Descriptor - Data size: {descriptor['font_data_size']}, Glyphs: {descriptor['glyphs_num']}, Height: {descriptor['font_height']}")
-    print("=" * 50)
-    
+def show_glyphs(font_data, glyphs, height):
+    """Визуализирует первые 10 и последние 3 глифа"""
     # Визуализируем несколько первых глифов
     num_to_show = min(10, len(glyphs))
     print(f"Showing first {num_to_show} glyphs:")
@@ -228,5 +257,399 @@ def main():
         for i in range(max(0, len(glyphs) - 3), len(glyphs)):
             visualize_glyph(font_data, glyphs[i], height)
 
+def unpack_compressed_glyphs(font_data, glyphs, codec_id, height):
+    """Распаковывает сжатые глифы в обычный построчный битовый поток"""
+    codec_name = next(name for name, codec in CODECS.items()
+                      if codec.codec_id == codec_id)
+    pieces = []
+    bit_offset = 0
+    unpacked = []
+    for glyph in glyphs:
+        bits = decompress_glyph(codec_name, font_data, glyph['data_offset'],
+                                glyph['data_size'], glyph['width'], height)
+        unpacked.append({'ascii_code': glyph['ascii_code'], 'width': glyph['width'],
+                         'bit_offset': bit_offset})
+        pieces.append(bits)
+        bit_offset += len(bits)
+    return bit_string_to_bytes(''.join(pieces)), unpacked
+
+def load_blob_font(filename):
+    """Читает бинарный файл шрифта в том же виде, что и parse_header"""
+    with FontBlob(filename) as blob:
+        font = {
+            'name': os.path.basename(filename),
+            'kind': blob.format_name,
+            'language': 'blob',
+            'font_data': bytes(blob.font_data),
+            'glyphs': blob.glyphs(),
+            'font_data_size': len(blob.font_data),
+            'glyphs_num': blob.glyphs_num,
+            'font_height': blob.font_height,
+            'compression': blob.compression,
+            'codepage': blob.codepage_name,
+            'source': blob.source
+        }
+    return font
+
+def check_blob(filename):
+    """Проверяет и визуализирует бинарный файл шрифта (.bin)"""
+    try:
+        blob = FontBlob(filename)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found")
+        return
+    except (OSError, ValueError) as e:
+        print(f"Error reading file: {e}")
+        return
+    
+    with blob:
+        glyphs = blob.glyphs()
+        font_data = blob.font_data
+        if blob.format == FORMAT_COMPRESSED:
+            font_data, glyphs = unpack_compressed_glyphs(font_data, glyphs, blob.compression,
+                                                        blob.font_height)
+        
+        print(f"Font file: {filename}")
+        print(f"Format: {blob.format_name}")
+        print(f"Codepage: {blob.codepage_name}")
+        print(f"Height: {blob.font_height}")
+        print(f"Font data size: {len(blob.font_data)} bytes")
+        print(f"Number of glyphs: {len(glyphs)}")
+        print("=" * 50)
+        
+        show_glyphs(font_data, glyphs, blob.font_height)
+        # Представления поверх mmap нужно отпустить до закрытия файла
+        del font_data
+
+def read_header(filename):
+    """Читает заголовок и извлекает из него шрифты"""
+    with open(filename, 'r', encoding='utf-8') as f:
+        content = f.read()
+    fonts = parse_header(content)
+    match = CODEPAGE_COMMENT.search(content)
+    # Комментарий об исходном шрифте идет после строки // Font: своего шрифта
+    bounds = [m.end() for m in FONT_COMMENT.finditer(content)] + [len(content)]
+    for index, font in enumerate(fonts):
+        font['codepage'] = match.group(1) if match else DEFAULT_CODEPAGE
+        font['source'] = None
+        if index + 1 < len(bounds):
+            match_source = SOURCE_COMMENT.search(content, bounds[index], bounds[index + 1])
+            if match_source:
+                font['source'] = {'file': match_source.group(1), 'type': match_source.group(2)}
+                scaled = SCALED_COMMENT.search(content, match_source.end(), bounds[index + 1])
+                if scaled:
+                    font['source']['height'] = int(scaled.group(1))
+                    font['source']['scale_filter'] = scaled.group(2)
+    return content, fonts
+
+def check_header(filename):
+    """Проверяет и визуализирует C заголовок шрифта"""
+    try:
+        content, fonts = read_header(filename)
+    except FileNotFoundError:
+        print(f"Error: File '{filename}' not found")
+        return
+    except Exception as e:
+        print(f"Error reading file: {e}")
+        return
+    
+    # Имена массивов берутся из дескриптора шрифта, а не из имени файла
+    if not fonts:
+        print(f"Error: Could not find a font descriptor in '{filename}'")
+        return
+    
+    for font in fonts:
+        print(f"Parsing arrays: {font['data_name']}, {font['glyphs_name']}, {font['name']}")
+        font_data = font['font_data']
+        glyphs = font['glyphs']
+        height = font['font_height']
+        
+        print(f"Font file: {filename}")
+        print(f"Format: {font['kind']}")
+        print(f"Codepage: {font['codepage']}")
+        print(f"Height: {height}")
+        print(f"Font data size: {len(font_data)} bytes")
+        print(f"Number of glyphs: {len(glyphs)}")
+        print(f"Descriptor - Data size: {font['font_data_size']}, Glyphs: {font['glyphs_num']}, Height: {height}")
+        print("=" * 50)
+        
+        if font['kind'] == 'compressed':
+            font_data, glyphs = unpack_compressed_glyphs(font_data, glyphs,
+                                                         font['compression'], height)
+        show_glyphs(font_data, glyphs, height)
+
+def glyph_pixels(font, glyph, stream):
+    """Восстанавливает пиксели глифа строкой '0'/'1' по строкам сверху вниз.
+
+    stream - весь font_data, заранее переведенный в строку битов.
+    """
+    width = glyph['width']
+    height = font['font_height']
+    kind = font['kind']
+    if kind == 'rows':
+        offset = glyph['bit_offset']
+        return stream[offset:offset + width * height]
+    if kind == 'crop':
+        rows = ['0' * width] * height
+        crop_width = glyph['crop_width']
+        for y in range(glyph['crop_height']):
+            start = glyph['bit_offset'] + y * crop_width
+            row = '0' * glyph['crop_x'] + stream[start:start + crop_width]
+            if 0 <= glyph['crop_y'] + y < height:
+                rows[glyph['crop_y'] + y] = row.ljust(width, '0')[:width]
+        return ''.join(rows)
+    if kind == 'pages':
+        if not width:
+            return ''
+        # Байт столбца - 8 строк снизу вверх; разворачиваем и транспонируем
+        offset = glyph['byte_offset']
+        page_bytes = font['font_data'][offset:offset + width * ((height + 7) // 8)]
+        columns = [''.join(format(byte, '08b')[::-1] for byte in page_bytes[x::width])[:height]
+                   for x in range(width)]
+        return ''.join(map(''.join, zip(*columns)))
+    codec_name = next(name for name, codec in CODECS.items()
+                      if codec.codec_id == font['compression'])
+    return decompress_glyph(codec_name, font['font_data'], glyph['data_offset'],
+                            glyph['data_size'], width, height)
+
+def glyph_extent(font, glyph):
+    """Конец данных глифа в font_data: (конец, единица - 'bit' или 'byte')"""
+    height = font['font_height']
+    kind = font['kind']
+    if kind == 'rows':
+        return glyph['bit_offset'] + glyph['width'] * height, 'bit'
+    if kind == 'crop':
+        return glyph['bit_offset'] + glyph['crop_width'] * glyph['crop_height'], 'bit'
+    if kind == 'pages':
+        return glyph['byte_offset'] + glyph['width'] * ((height + 7) // 8), 'byte'
+    return glyph['data_offset'] + glyph['data_size'], 'byte'
+
+def verify_font(font, source):
+    """Сравнивает шрифт с исходным, возвращает список ошибок.
+
+    source - (глифы, высота) из BDF файла или растеризованные из TTF/OTF;
+    коды глифов сравниваются в кодовой странице шрифта. Проверяются размеры из
+    дескриптора, переполнение 16-битных полей C заголовка, границы данных
+    глифов и каждый пиксель каждого глифа.
+    """
+    errors = []
+    font_data = font['font_data']
+    glyphs = font['glyphs']
+    height = font['font_height']
+
+    if font['font_data_size'] != len(font_data):
+        errors.append(f"font_data_size is {font['font_data_size']}, "
+                      f"but font_data has {len(font_data)} bytes")
+    if font['glyphs_num'] != len(glyphs):
+        errors.append(f"glyphs_num is {font['glyphs_num']}, but glyphs has {len(glyphs)} entries")
+
+    if font['language'] == 'c':
+        # Типы полей C заголовка: uint16_t font_data_size, uint8_t glyphs_num
+        if len(font_data) > 0xFFFF:
+            errors.append(f"font_data_size {len(font_data)} overflows uint16_t")
+        if len(glyphs) > 0xFF:
+            errors.append(f"glyphs_num {len(glyphs)} overflows uint8_t")
+        for field in ('bit_offset', 'byte_offset', 'data_offset', 'data_size'):
+            overflow = [g for g in glyphs if g.get(field, 0) > 0xFFFF]
+            if overflow:
+                errors.append(f"{field} overflows unsigned short in {len(overflow)} glyph(s), "
+                              f"first 0x{overflow[0]['ascii_code']:02X}: {overflow[0][field]}")
+
+    codes = [g['ascii_code'] for g in glyphs]
+    if any(a >= b for a, b in zip(codes, codes[1:])):
+        errors.append("glyphs are not sorted by ascii_code")
+
+    source_glyphs, source_height = source
+    if source_height != height:
+        errors.append(f"font_height is {height}, but the source font height is {source_height}")
+    codepage = font.get('codepage', DEFAULT_CODEPAGE)
+    if codepage not in CODEPAGES:
+        errors.append(f"unknown codepage '{codepage}'")
+        return errors
+    if codepage != DEFAULT_CODEPAGE:
+        source_glyphs = select_glyphs(source_glyphs, [], codepage)
+    by_code = {g.code: g for g in source_glyphs}
+
+    # Весь font_data переводится в строку битов один раз
+    stream = bytes_to_bit_string(font_data, len(font_data) * 8)
+    mismatched = []
+    for glyph in glyphs:
+        code = glyph['ascii_code']
+        end, unit = glyph_extent(font, glyph)
+        if end > (len(stream) if unit == 'bit' else len(font_data)):
+            errors.append(f"glyph 0x{code:02X} data ends at {unit} {end}, past the end of font_data")
+            continue
+        source_glyph = by_code.get(code)
+        if source_glyph is None:
+            errors.append(f"glyph 0x{code:02X} is not in the source font")
+            continue
+        if source_glyph.width != glyph['width']:
+            errors.append(f"glyph 0x{code:02X} width is {glyph['width']}, "
+                          f"source width is {source_glyph.width}")
+            continue
+        size = glyph['width'] * height
+        expected = glyph_to_bit_string(source_glyph.bitmap, source_glyph.width)
+        if glyph_pixels(font, glyph, stream) != expected[:size].ljust(size, '0'):
+            mismatched.append(code)
+    if mismatched:
+        errors.append(f"{len(mismatched)} glyph(s) differ from the source font: "
+                      + ", ".join(f"0x{code:02X}" for code in mismatched[:16])
+                      + (" ..." if len(mismatched) > 16 else ""))
+    return errors
+
+def find_source_font(font_name, fonts_dir):
+    """Ищет BDF файл по имени шрифта из заголовка (или безопасному имени)"""
+    wanted = safe_identifier(font_name).lower()
+    for root, dirs, files in os.walk(fonts_dir):
+        for file in files:
+            stem, ext = os.path.splitext(file)
+            if ext.lower() == '.bdf' and safe_identifier(stem).lower() == wanted:
+                return os.path.join(root, file)
+    return None
+
+def find_source_file(file_name, fonts_dir):
+    """Ищет исходный шрифт по имени файла, записанному генератором"""
+    wanted = file_name.lower()
+    for root, dirs, files in os.walk(fonts_dir):
+        for file in files:
+            if file.lower() == wanted:
+                return os.path.join(root, file)
+    return None
+
+def source_chars(font):
+    """Символы глифов шрифта по их кодам в кодовой странице шрифта"""
+    codec = CODEPAGES.get(font.get('codepage', DEFAULT_CODEPAGE))
+    if codec is None:
+        # unicode: код глифа - кодовая точка символа
+        return ''.join(chr(g['ascii_code']) for g in font['glyphs'])
+    return bytes(g['ascii_code'] for g in font['glyphs'] if g['ascii_code'] <= 0xFF).decode(
+        codec, errors='ignore')
+
+def load_source_glyphs(font_path, font=None, cache_dir='.font_cache'):
+    """Глифы исходного шрифта.
+
+    BDF - все глифы из кэша генератора или полным разбором; если font
+    масштабирован, его символы масштабируются заново той же функцией
+    font_scale.scale_glyphs. TTF/OTF растеризуются заново в ячейки высоты
+    шрифта font, только символы его глифов.
+    """
+    # Генератор и масштабирование тянут PIL: просмотр файлов без --verify
+    # работает и без него
+    from font_generator import BDFParser, TTFRasterizer, is_outline_font
+    from font_scale import scale_glyphs
+
+    if is_outline_font(font_path):
+        height = font['font_height']
+        glyphs = TTFRasterizer(font_path, height).rasterize(source_chars(font))
+        return [glyph for glyph in glyphs if glyph.width], height
+
+    cache = GlyphCache(cache_dir, BDFParser.VERSION)
+    cached = cache.load(font_path)
+    if cached is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            glyphs, font_height, font_width = BDFParser(font_path, []).parse_font()
+        if not glyphs:
+            raise ValueError(f"no glyphs in '{font_path}'")
+        cache.store(font_path, glyphs, font_height, font_width)
+    else:
+        glyphs, font_height, font_width = cached
+
+    source = font.get('source') if font else None
+    if source and 'height' in source:
+        if source['height'] != font_height:
+            raise ValueError(f"the font was scaled from {source['height']}px, "
+                             f"but the BDF font height is {font_height}")
+        if source['scale_filter'] not in SCALE_FILTERS:
+            raise ValueError(f"unknown scale filter '{source['scale_filter']}'")
+        wanted = {ord(char) for char in source_chars(font)}
+        glyphs = scale_glyphs([glyph for glyph in glyphs if glyph.encoding in wanted],
+                              font_height, font['font_height'], source['scale_filter'])
+        font_height = font['font_height']
+    return glyphs, font_height
+
+def verify_file(job):
+    """Проверяет один файл шрифта, возвращает словарь с результатом"""
+    filename = job['file']
+    result = {'file': filename, 'ok': False, 'fonts': 0, 'glyphs': 0, 'errors': []}
+    try:
+        if filename.lower().endswith('.bin'):
+            fonts = [load_blob_font(filename)]
+            # В бинарном файле имени шрифта нет: берем его из имени файла font_<имя>.bin
+            names = [os.path.splitext(os.path.basename(filename))[0]]
+        else:
+            content, fonts = read_header(filename)
+            names = FONT_COMMENT.findall(content)
+        if not fonts:
+            raise ValueError("no font descriptor found")
+
+        for index, font in enumerate(fonts):
+            source_path = job.get('bdf')
+            if not source_path and font.get('source'):
+                # Имя исходного файла записано генератором
+                source_path = find_source_file(font['source']['file'], job['fonts_dir'])
+                if source_path is None:
+                    raise ValueError(f"source font '{font['source']['file']}' not found "
+                                     f"in '{job['fonts_dir']}'")
+            elif not source_path:
+                name = names[index] if index < len(names) else names[-1] if names else ''
+                if name.startswith('font_') and filename.lower().endswith('.bin'):
+                    name = name[5:]
+                source_path = find_source_font(name, job['fonts_dir'])
+                if source_path is None:
+                    raise ValueError(f"source BDF for font '{name}' not found in '{job['fonts_dir']}'")
+            errors = verify_font(font, load_source_glyphs(source_path, font))
+            result['errors'].extend(f"{font['name']}: {error}" if len(fonts) > 1 else error
+                                    for error in errors)
+            result['fonts'] += 1
+            result['glyphs'] += len(font['glyphs'])
+        result['ok'] = not result['errors']
+    except Exception as e:
+        result['errors'].append(str(e))
+    return result
+
+def run_verify(files, bdf=None, fonts_dir='Fonts', workers=None):
+    """Проверяет файлы параллельно и печатает сводку, возвращает число ошибочных файлов"""
+    jobs = [{'file': filename, 'bdf': bdf, 'fonts_dir': fonts_dir} for filename in files]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(verify_file, jobs))
+
+    failed = 0
+    for result in results:
+        if result['ok']:
+            print(f"[ OK ] {result['file']}: {result['glyphs']} glyphs match the source font")
+        else:
+            failed += 1
+            print(f"[FAIL] {result['file']}:")
+            for error in result['errors']:
+                print(f"       {error}")
+    print(f"Files: {len(results)}, passed: {len(results) - failed}, failed: {failed}")
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="View generated font files or verify them against the source fonts")
+    parser.add_argument('files', nargs='+', metavar='FILE',
+                        help="font header (.h, .hpp) or binary font file (.bin)")
+    parser.add_argument('--verify', action='store_true',
+                        help="decode every glyph and compare it with the source font")
+    parser.add_argument('--source', '--bdf', dest='bdf',
+                        help="source BDF, TTF or OTF font for all files (by default found in "
+                             "--fonts-dir by the source file name recorded in the file or by "
+                             "font name)")
+    parser.add_argument('--fonts-dir', default='Fonts',
+                        help="directory searched for source fonts (default: Fonts)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="number of processes for --verify (default: CPU count)")
+    args = parser.parse_args()
+
+    if args.verify:
+        sys.exit(1 if run_verify(args.files, args.bdf, args.fonts_dir, args.workers) else 0)
+
+    for filename in args.files:
+        if filename.lower().endswith('.bin'):
+            check_blob(filename)
+        else:
+            check_header(filename)
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,54 @@
+from bdf_glyph import Glyph
+
+# Целевые кодовые страницы: имя -> кодек Python (None - код символа Unicode).
+# Коды unicode больше 0xFF помещаются только в модуль Python и бинарный
+# файл: в C/C++/Rust поле кода глифа 8-битное
+CODEPAGES = {
+    'cp1251': 'windows-1251',
+    'cp866': 'cp866',
+    'koi8-r': 'koi8_r',
+    'iso8859-5': 'iso8859_5',
+    'unicode': None
+}
+
+# Номер кодовой страницы в бинарном файле шрифта (font_blob)
+CODEPAGE_IDS = {name: index for index, name in enumerate(CODEPAGES)}
+
+DEFAULT_CODEPAGE = 'cp1251'
+
+
+def char_code(char, codepage=DEFAULT_CODEPAGE):
+    """Код символа в кодовой странице или None, если символа в ней нет"""
+    codec = CODEPAGES[codepage]
+    if codec is None:
+        return ord(char)
+    try:
+        encoded = char.encode(codec)
+    except UnicodeEncodeError:
+        return None
+    return encoded[0] if len(encoded) == 1 else None
+
+
+def select_glyphs(glyphs, symbols, codepage=DEFAULT_CODEPAGE):
+    """Выбирает глифы из таблицы шрифта (по Unicode) для одного вывода.
+
+    symbols - нужные символы (пустой набор - все), глифы без кода в
+    codepage пропускаются. Код в целевой кодовой странице записывается в
+    поле code копии глифа: дальше упаковщик работает только с ним.
+    """
+    wanted = set(symbols)
+    selected = []
+    for glyph in glyphs:
+        if glyph.encoding < 0 or glyph.encoding > 0x10FFFF:
+            continue
+        char = chr(glyph.encoding)
+        if wanted and char not in wanted:
+            continue
+        code = char_code(char, codepage)
+        if code is None:
+            continue
+        if code != glyph.code:
+            glyph = Glyph(glyph.encoding, code, glyph.width, glyph.height,
+                          glyph.x_offset, glyph.y_offset, glyph.bitmap)
+        selected.append(glyph)
+    return selected
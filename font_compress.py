@@ -0,0 +1,268 @@
+import time
+
+from font_packer import bit_string_to_bytes, glyph_to_bit_string
+
+
+def bytes_to_bit_string(data, num_bits):
+    """Обратное к bit_string_to_bytes: младший бит первого байта - первый символ"""
+    if not num_bits:
+        return ''
+    bits = format(int.from_bytes(data, 'little'), f'0{len(data) * 8}b')[::-1]
+    return bits[:num_bits].ljust(num_bits, '0')
+
+
+class RLECodec:
+    """Длины серий пикселей в 4-битных кодах.
+
+    Серии идут поочередно: фон, пиксели, фон... начиная с фона. Код 0-14 -
+    длина серии, после которой цвет меняется; код 15 - 15 пикселей того же
+    цвета и продолжение серии в следующем коде. Коды упакованы по два в байт,
+    младший полубайт первым. Завершающая серия фона не хранится.
+    """
+
+    name = 'rle'
+    codec_id = 1
+
+    def compress(self, bits, width):
+        codes = []
+        color = '0'
+        pos = 0
+        while pos < len(bits):
+            end = bits.find('1' if color == '0' else '0', pos)
+            if end < 0:
+                end = len(bits)
+            run = end - pos
+            if end == len(bits) and color == '0':
+                # Хвост из фона декодер заполнит сам
+                break
+            while run >= 15:
+                codes.append(15)
+                run -= 15
+            codes.append(run)
+            pos = end
+            color = '1' if color == '0' else '0'
+
+        if len(codes) % 2:
+            codes.append(0)
+        return bytes(codes[i] | (codes[i + 1] << 4) for i in range(0, len(codes), 2))
+
+    def iter_codes(self, data):
+        for byte in data:
+            yield byte & 0x0F
+            yield byte >> 4
+
+    def decompress(self, data, width, height):
+        total = width * height
+        pieces = []
+        pos = 0
+        color = '0'
+        for code in self.iter_codes(data):
+            if pos >= total:
+                break
+            run = min(code, total - pos)
+            pieces.append(color * run)
+            pos += run
+            if code != 15:
+                color = '1' if color == '0' else '0'
+        return ''.join(pieces).ljust(total, '0')
+
+    def decode_steps(self, data, width, height):
+        """Количество кодов, которые прочитает декодер"""
+        return len(data) * 2
+
+
+class RowRepeatCodec:
+    """Повтор строк: перед каждой строкой флаговый бит.
+
+    1 - строка совпадает с предыдущей (для первой строки - с пустой),
+    0 - далее следуют width битов строки. Битовый поток упакован так же,
+    как font_data: младший бит первого байта - первый бит потока.
+    """
+
+    name = 'rows'
+    codec_id = 2
+
+    def compress(self, bits, width):
+        if not width:
+            return b''
+        pieces = []
+        prev = '0' * width
+        for i in range(0, len(bits), width):
+            row = bits[i:i + width]
+            if row == prev:
+                pieces.append('1')
+            else:
+                pieces.append('0' + row)
+                prev = row
+        return bit_string_to_bytes(''.join(pieces))
+
+    def decompress(self, data, width, height):
+        stream = bytes_to_bit_string(data, len(data) * 8)
+        rows = []
+        prev = '0' * width
+        pos = 0
+        for _ in range(height):
+            flag = stream[pos:pos + 1]
+            pos += 1
+            if flag == '0':
+                prev = stream[pos:pos + width].ljust(width, '0')
+                pos += width
+            rows.append(prev)
+        return ''.join(rows)
+
+    def decode_steps(self, data, width, height):
+        """Количество строк плюс количество прочитанных битов строк"""
+        stream = bytes_to_bit_string(data, len(data) * 8)
+        steps = 0
+        pos = 0
+        for _ in range(height):
+            steps += 1
+            if stream[pos:pos + 1] == '0':
+                steps += width
+                pos += width
+            pos += 1
+        return steps
+
+
+CODECS = {codec.name: codec for codec in (RLECodec(), RowRepeatCodec())}
+
+
+def compress_glyphs(glyphs, codec_name, dedup=False):
+    """Сжимает каждый глиф отдельно и склеивает результат в один поток.
+
+    Возвращает (font_data, data_offsets, data_sizes, stats): смещения и длины
+    сжатых глифов в байтах, stats - словарь с raw_bits (битов без сжатия),
+    duplicates и saved_bytes (экономия от дедупликации).
+    """
+    codec = CODECS[codec_name]
+    pieces = []
+    data_offsets = []
+    data_sizes = []
+    seen_offsets = {}  # сжатые данные глифа -> смещение первой копии
+    current_offset = 0
+    stats = {'raw_bits': 0, 'duplicates': 0, 'saved_bytes': 0}
+    for glyph in glyphs:
+        bits = glyph_to_bit_string(glyph.bitmap, glyph.width)
+        stats['raw_bits'] += len(bits)
+        data = codec.compress(bits, glyph.width)
+        data_sizes.append(len(data))
+        if dedup and data and data in seen_offsets:
+            data_offsets.append(seen_offsets[data])
+            stats['duplicates'] += 1
+            stats['saved_bytes'] += len(data)
+            continue
+        seen_offsets[data] = current_offset
+        data_offsets.append(current_offset)
+        pieces.append(data)
+        current_offset += len(data)
+
+    return b''.join(pieces), data_offsets, data_sizes, stats
+
+
+def decompress_glyph(codec_name, font_data, offset, size, width, height):
+    """Распаковывает один глиф в строку '0'/'1' из width * height пикселей"""
+    return CODECS[codec_name].decompress(font_data[offset:offset + size], width, height)
+
+
+def compression_report(glyphs, height):
+    """Сравнивает методы сжатия на наборе глифов.
+
+    Для каждого метода (и для несжатых данных) возвращает словарь с размером
+    данных, долей от несжатого размера, средним числом шагов декодера на глиф
+    и временем распаковки всех глифов на Python. Каждый результат
+    проверяется обратной распаковкой.
+    """
+    raw_bits = [glyph_to_bit_string(g.bitmap, g.width) for g in glyphs]
+    raw_size = (sum(len(bits) for bits in raw_bits) + 7) // 8
+    report = [{'codec': 'none', 'size': raw_size, 'ratio': 1.0,
+               'steps_per_glyph': 0.0, 'decode_time': 0.0}]
+
+    for name, codec in CODECS.items():
+        compressed = [codec.compress(bits, g.width) for bits, g in zip(raw_bits, glyphs)]
+        start = time.perf_counter()
+        decoded = [codec.decompress(data, g.width, height)
+                   for data, g in zip(compressed, glyphs)]
+        decode_time = time.perf_counter() - start
+        for bits, result, g in zip(raw_bits, decoded, glyphs):
+            if result != bits.ljust(g.width * height, '0'):
+                raise ValueError(f"Метод {name}: глиф U+{g.encoding:04X} не восстановлен")
+
+        size = sum(len(data) for data in compressed)
+        steps = sum(codec.decode_steps(data, g.width, height)
+                    for data, g in zip(compressed, glyphs))
+        report.append({
+            'codec': name,
+            'size': size,
+            'ratio': size / raw_size if raw_size else 0.0,
+            'steps_per_glyph': steps / len(glyphs) if glyphs else 0.0,
+            'decode_time': decode_time
+        })
+    return report
+
+
+# Эталонный распаковщик для прошивки. Распаковывает глиф в буфер
+# out[(width * font_height + 7) / 8] в том же порядке битов, что и
+# несжатый font_data (пиксель N - бит N % 8 байта N / 8).
+C_DECODER = """
+#ifndef SSD_1306_FONT_Z_DECODER
+#define SSD_1306_FONT_Z_DECODER
+
+#define FONT_Z_RLE  1
+#define FONT_Z_ROWS 2
+
+static void font_z_decode_glyph(const font_z_descriptor_t * font,
+                                const glyphs_z_t * glyph,
+                                unsigned char * out)
+{
+    const unsigned char * src = font->font_data + glyph->data_offset;
+    unsigned short total = (unsigned short)glyph->width * font->font_height;
+    unsigned short pos = 0;
+    unsigned short i;
+
+    for (i = 0; i < (total + 7) / 8; i++)
+        out[i] = 0;
+
+    if (font->compression == FONT_Z_RLE)
+    {
+        unsigned char color = 0;
+        for (i = 0; i < glyph->data_size * 2 && pos < total; i++)
+        {
+            unsigned char code = (src[i >> 1] >> ((i & 1) * 4)) & 0x0F;
+            unsigned char run = code;
+            for (; run && pos < total; run--, pos++)
+                if (color)
+                    out[pos >> 3] |= 1 << (pos & 7);
+            if (code != 15)
+                color ^= 1;
+        }
+    }
+    else if (font->compression == FONT_Z_ROWS)
+    {
+        unsigned short in_bit = 0;
+        unsigned char row, col;
+        for (row = 0; row < font->font_height; row++)
+        {
+            unsigned char repeat = (src[in_bit >> 3] >> (in_bit & 7)) & 1;
+            in_bit++;
+            for (col = 0; col < glyph->width; col++, pos++)
+            {
+                unsigned char bit;
+                if (repeat)
+                {
+                    unsigned short prev = pos - glyph->width;
+                    bit = row ? (out[prev >> 3] >> (prev & 7)) & 1 : 0;
+                }
+                else
+                {
+                    bit = (src[in_bit >> 3] >> (in_bit & 7)) & 1;
+                    in_bit++;
+                }
+                if (bit)
+                    out[pos >> 3] |= 1 << (pos & 7);
+            }
+        }
+    }
+}
+
+#endif //SSD_1306_FONT_Z_DECODER
+"""
@@ -0,0 +1,746 @@
+import os
+
+from font_blob import build_blob
+from font_codepages import DEFAULT_CODEPAGE
+from font_compress import C_DECODER
+from font_model import OFFSET_FIELDS
+from font_packer import build_code_lookup
+
+
+# Готовые строки для всех значений байта: форматирование массива сводится
+# к выборке из таблицы и join по строкам
+HEX_BYTES = tuple(f"0x{i:02X}" for i in range(256))
+
+
+def hex_lines(data, per_line=16):
+    """Разбивает байты на строки по per_line значений вида 0xNN через ', '"""
+    items = list(map(HEX_BYTES.__getitem__, data))
+    return [', '.join(items[i:i + per_line]) for i in range(0, len(items), per_line)]
+
+
+def char_display(encoding):
+    """Возвращает символ для комментария в коде (с экранированием)"""
+    try:
+        char_display = chr(encoding)
+        if char_display == '\\':
+            char_display = '\\\\'
+        elif char_display == '"':
+            char_display = '\\"'
+        elif char_display == "'":
+            char_display = "\\'"
+        elif char_display == '\n':
+            char_display = '\\n'
+        elif char_display == '\t':
+            char_display = '\\t'
+    except:
+        char_display = '?'
+    return char_display
+
+
+class Emitter:
+    """Базовый класс формата выходного файла.
+
+    emit() строит содержимое файла целиком в памяти, write() записывает
+    его одним вызовом.
+    """
+
+    name = None
+    extension = None
+    binary = False
+    # Разрядность поля кода символа, None - без ограничения
+    code_bits = 8
+
+    def filename(self, font, output_dir):
+        return os.path.join(output_dir, f"font_{font.safe_name}{self.extension}")
+
+    def check(self, font):
+        """Проверяет, что коды глифов помещаются в поле кода символа"""
+        if self.code_bits and font.records and font.records[-1][0] >> self.code_bits:
+            raise ValueError(f"Код 0x{font.records[-1][0]:X} не помещается в {self.code_bits}-битное "
+                             f"поле кода формата {self.name}: выберите однобайтовую кодовую "
+                             f"страницу, формат python или blob")
+
+    def emit(self, font):
+        raise NotImplementedError
+
+    def write(self, font, output_dir):
+        """Записывает шрифт в output_dir, возвращает имя файла.
+
+        Файл с тем же содержимым не перезаписывается, чтобы не менять его mtime.
+        """
+        self.check(font)
+        filename = self.filename(font, output_dir)
+        content = self.emit(font)
+        data = content if self.binary else content.encode('utf-8')
+        try:
+            with open(filename, 'rb') as f:
+                if f.read() == data:
+                    return filename
+        except OSError:
+            pass
+        with open(filename, 'wb') as f:
+            f.write(data)
+        return filename
+
+
+# Описание формата в начале C заголовка для каждого вида упаковки
+C_DESCRIPTIONS = {
+    'rows': """/* Описание формата шрифта:
+
+         1. Массив font_data[] содержит:
+            - Битовый поток пикселей всех глифов
+            - Биты упакованы по строкам, слева направо, сверху вниз
+            - Бит 0 = пиксель отсутствует (фон), бит 1 = пиксель присутствует (символ)
+
+         2. Массив glyphs[] содержит структуры с информацией о каждом символе:
+            - ascii_code: код символа (может быть в cp1251 для русских букв)
+            - width: ширина символа в пикселях  
+            - bit_offset: смещение в битах от начала массива font_data до первого пикселя символа
+
+         3. Структура font_descriptor содержит:
+            - указатели на данные шрифта и глифов
+            - размеры и количество символов
+            - высоту шрифта
+
+         Принцип формирования битового потока:
+         - Биты идут последовательно: слева направо, сверху вниз для каждого символа
+         - Бит 0 соответствует левому верхнему пикселю символа
+         - Байты в массиве содержат по 8 бит, бит 7 первого байта - это бит 7, 
+           бит 0 второго байта - это бит 8 от начала потока и т.д.
+
+         Пример: символ шириной 5 пикселей, высотой 8 пикселей занимает 5*8=40 бит = 5 байт
+         Биты 0-4: первая строка (слева направо)
+         Биты 5-9: вторая строка (слева направо)
+         ... и так далее
+        */
+        """,
+    'crop': """/* Описание формата шрифта с обрезкой глифов:
+
+         1. Массив font_data[] содержит битовый поток только закрашенных
+            прямоугольников глифов, упакованный так же, как в несжатом
+            формате: слева направо, сверху вниз, пиксель N - бит N % 8 байта N / 8
+
+         2. Массив glyphs[] содержит структуры glyphs_crop_t:
+            - ascii_code: код символа (может быть в cp1251 для русских букв)
+            - width: полная ширина символа (шаг курсора) в пикселях
+            - crop_x, crop_y: смещение прямоугольника от левого верхнего угла символа
+            - crop_width, crop_height: размеры прямоугольника (0 - пустой символ)
+            - bit_offset: смещение в битах от начала font_data до прямоугольника
+
+         3. Пиксели вне прямоугольника - фон, их выводить не нужно.
+        */
+        """,
+    'pages': """/* Описание страничного формата шрифта (SSD1306):
+
+         1. Массив font_data[] содержит глифы в формате видеопамяти SSD1306:
+            - глиф делится на страницы по 8 строк, страниц (font_height + 7) / 8
+            - для каждой страницы идут width байт, по байту на столбец слева направо
+            - младший бит байта - верхний пиксель столбца в странице
+            - глиф занимает width * pages байт и начинается с границы байта
+
+         2. Массив glyphs[] содержит структуры glyphs_page_t:
+            - ascii_code: код символа (может быть в cp1251 для русских букв)
+            - width: ширина символа в пикселях
+            - byte_offset: смещение в байтах от начала font_data до глифа
+
+         Страница page глифа копируется в буфер дисплея одним memcpy:
+         memcpy(&buffer[(y_page + page) * 128 + x],
+                &font_data[byte_offset + page * width], width);
+        */
+        """,
+    'compressed': """/* Описание формата сжатого шрифта:
+
+         1. Массив font_data[] содержит сжатые глифы, каждый с границы байта.
+            Метод сжатия задан полем compression дескриптора:
+            - 1 (FONT_Z_RLE): длины серий пикселей в 4-битных кодах, серии
+              чередуются начиная с фона; код 15 продлевает серию того же цвета
+            - 2 (FONT_Z_ROWS): перед каждой строкой бит повтора; 1 - строка
+              равна предыдущей, 0 - далее идут width битов строки
+
+         2. Массив glyphs[] содержит структуры glyphs_z_t:
+            - ascii_code: код символа (может быть в cp1251 для русских букв)
+            - width: ширина символа в пикселях
+            - data_offset: смещение в байтах от начала font_data до сжатого глифа
+            - data_size: длина сжатого глифа в байтах
+
+         3. font_z_decode_glyph() распаковывает глиф в буфер
+            (width * font_height + 7) / 8 байт в формате несжатого font_data:
+            слева направо, сверху вниз, пиксель N - бит N % 8 байта N / 8.
+        */
+        """
+}
+
+C_TYPEDEFS = {
+    'rows': """
+        #ifndef SSD_1306_FONT_DESCR
+        #define SSD_1306_FONT_DESCR
+
+        typedef struct 
+        {
+            unsigned char ascii_code;
+            unsigned char width;
+            unsigned short bit_offset;
+        } glyphs_t;
+
+        typedef struct
+        {
+            unsigned char * font_data;
+            glyphs_t * glyphs;
+            uint16_t font_data_size;
+            uint8_t glyphs_num;
+            uint8_t font_height;
+        } font_descriptor_t;
+
+        #endif //SSD_1306_FONT_DESCR
+        """,
+    'crop': """
+        #ifndef SSD_1306_FONT_CROP_DESCR
+        #define SSD_1306_FONT_CROP_DESCR
+
+        typedef struct
+        {
+            unsigned char ascii_code;
+            unsigned char width;
+            unsigned char crop_x;
+            unsigned char crop_y;
+            unsigned char crop_width;
+            unsigned char crop_height;
+            unsigned short bit_offset;
+        } glyphs_crop_t;
+
+        typedef struct
+        {
+            unsigned char * font_data;
+            glyphs_crop_t * glyphs;
+            uint16_t font_data_size;
+            uint8_t glyphs_num;
+            uint8_t font_height;
+        } font_crop_descriptor_t;
+
+        #endif //SSD_1306_FONT_CROP_DESCR
+        """,
+    'pages': """
+        #ifndef SSD_1306_FONT_PAGE_DESCR
+        #define SSD_1306_FONT_PAGE_DESCR
+
+        typedef struct
+        {
+            unsigned char ascii_code;
+            unsigned char width;
+            unsigned short byte_offset;
+        } glyphs_page_t;
+
+        typedef struct
+        {
+            unsigned char * font_data;
+            glyphs_page_t * glyphs;
+            uint16_t font_data_size;
+            uint8_t glyphs_num;
+            uint8_t font_height;
+            uint8_t font_pages;
+        } font_page_descriptor_t;
+
+        #endif //SSD_1306_FONT_PAGE_DESCR
+        """,
+    'compressed': """
+        #ifndef SSD_1306_FONT_Z_DESCR
+        #define SSD_1306_FONT_Z_DESCR
+
+        typedef struct
+        {
+            unsigned char ascii_code;
+            unsigned char width;
+            unsigned short data_offset;
+            unsigned short data_size;
+        } glyphs_z_t;
+
+        typedef struct
+        {
+            unsigned char * font_data;
+            glyphs_z_t * glyphs;
+            uint16_t font_data_size;
+            uint8_t glyphs_num;
+            uint8_t font_height;
+            uint8_t compression;
+        } font_z_descriptor_t;
+
+        #endif //SSD_1306_FONT_Z_DESCR
+        """
+}
+
+# Имена типов записи глифа и дескриптора шрифта в C
+C_TYPES = {
+    'rows': ('glyphs_t', 'font_descriptor_t'),
+    'crop': ('glyphs_crop_t', 'font_crop_descriptor_t'),
+    'pages': ('glyphs_page_t', 'font_page_descriptor_t'),
+    'compressed': ('glyphs_z_t', 'font_z_descriptor_t')
+}
+
+
+def source_comment(font):
+    """Комментарий об исходном шрифте для font_check --verify или ''"""
+    if font.source is None:
+        return ''
+    comment = f"// Source: {font.source['file']}, type: {font.source['type']}\n"
+    if 'height' in font.source:
+        comment += f"// Scaled: from {font.source['height']}px, filter: {font.source['scale_filter']}\n"
+    return comment
+
+
+def descriptor_extra(font):
+    """Дополнительное последнее поле дескриптора: (имя, значение) или None"""
+    if font.kind == 'pages':
+        return 'font_pages', font.pages
+    if font.kind == 'compressed':
+        return 'compression', font.codec_id
+    return None
+
+
+class CHeaderEmitter(Emitter):
+    """C заголовок с массивами font_data, glyphs и дескриптором шрифта"""
+
+    name = 'header'
+    extension = '.h'
+
+    def hex_array(self, var_name, data):
+        """C массив байт, по 16 значений в строке"""
+        lines = hex_lines(data)
+        body = ''.join(['    ', ', \n    '.join(lines), '\n']) if lines else ''
+        return f"static const unsigned char {var_name}[] = {{\n{body}}};\n\n"
+
+    def glyph_array(self, font, glyphs_var):
+        """C массив записей глифов с символом в комментарии"""
+        glyph_type = C_TYPES[font.kind][0]
+        out = [f"static const {glyph_type} {glyphs_var}[] = {{\n"]
+        out.extend(f"    {{ 0x{record[0]:02X}, {', '.join(map(str, record[1:]))} }}, "
+                   f"// '{char_display(glyph.encoding)}'\n"
+                   for record, glyph in zip(font.records, font.glyphs))
+        out.append("};\n\n")
+        return ''.join(out)
+
+    def lookup_table(self, font):
+        """Таблица поиска глифа по коду и функция поиска.
+
+        Функция font_<имя>_glyph_index(code) возвращает индекс в массиве
+        glyphs или -1, если символа в шрифте нет.
+        """
+        safe_font_name = font.safe_name
+        kind, table = build_code_lookup([record[0] for record in font.records])
+        function_name = f"font_{safe_font_name}_glyph_index"
+        out = []
+
+        if kind == 'dense':
+            table_var = f"glyph_index_{safe_font_name}"
+            out.append("// Индекс глифа по коду символа, 0xFF - символа нет\n")
+            out.append(self.hex_array(table_var, bytes(table)))
+            out.append(f"static inline int {function_name}(unsigned char code)\n")
+            out.append("{\n")
+            out.append(f"    unsigned char index = {table_var}[code];\n")
+            out.append("    return index == 0xFF ? -1 : index;\n")
+            out.append("}\n\n")
+        else:
+            table_var = f"glyph_ranges_{safe_font_name}"
+            out.append("// Непрерывные участки кодов: первый код, количество, индекс первого глифа\n")
+            out.append(f"static const unsigned char {table_var}[][3] = {{\n")
+            for first, count, base in table:
+                out.append(f"    {{ 0x{first:02X}, {count}, {base} }},\n")
+            out.append("};\n\n")
+            out.append(f"static inline int {function_name}(unsigned char code)\n")
+            out.append("{\n")
+            out.append("    unsigned char i;\n")
+            out.append(f"    for (i = 0; i < {len(table)}; i++)\n")
+            out.append(f"        if ((unsigned char)(code - {table_var}[i][0]) < {table_var}[i][1])\n")
+            out.append(f"            return {table_var}[i][2] + (code - {table_var}[i][0]);\n")
+            out.append("    return -1;\n")
+            out.append("}\n\n")
+        return ''.join(out)
+
+    def check_limits(self, font):
+        """Проверяет, что шрифт помещается в 8- и 16-битные поля C типов"""
+        if len(font.font_data) > 0xFFFF:
+            raise ValueError(f"Данные шрифта {font.name} ({len(font.font_data)} байт) "
+                             f"не помещаются в uint16_t font_data_size")
+        if len(font.records) > 0xFF:
+            raise ValueError(f"Глифов шрифта {font.name} больше 255")
+        field = OFFSET_FIELDS[font.kind]
+        index = font.fields.index(field)
+        if font.records and max(record[index] for record in font.records) > 0xFFFF:
+            # В построчном и обрезанном форматах смещения в битах: адресуется
+            # только 8 КБ данных
+            unit = "битах" if field == 'bit_offset' else "байтах"
+            raise ValueError(f"Смещения {field} шрифта {font.name} (в {unit}) не помещаются "
+                             f"в unsigned short, используйте страничный формат или сжатие")
+
+    def emit(self, font):
+        # Поля C типов 8- и 16-битные: проверяем до построения файла
+        self.check_limits(font)
+
+        stats = font.stats
+        font_data_var = f"font_data_{font.safe_name}"
+        glyphs_var = f"glyphs_{font.safe_name}"
+        font_descriptor_var = f"font_{font.safe_name}"
+        descriptor_type = C_TYPES[font.kind][1]
+        data_size = len(font.font_data)
+
+        out = [C_DESCRIPTIONS[font.kind]]
+        out.append(f"\n// Font: {font.name}, Height: {font.height}px\n")
+        out.append("// Generated by Python font rasterizer\n")
+        out.append(f"// Total glyphs: {len(font.records)}\n")
+        if font.codepage != DEFAULT_CODEPAGE:
+            out.append(f"// Codepage: {font.codepage}\n")
+        out.append(source_comment(font))
+        if font.kind == 'compressed':
+            out.append(f"// Compression: {font.codec}, {stats['raw_bytes']} -> {data_size} bytes\n")
+        elif font.kind == 'crop':
+            out.append(f"// Cropped glyphs: {stats['raw_bytes']} -> {data_size} bytes\n")
+        elif font.kind == 'pages':
+            out.append(f"// Layout: SSD1306 pages, {font.pages} page(s) per glyph\n")
+        if font.dedup:
+            if font.kind == 'crop':
+                out.append(f"// Deduplicated glyphs: {stats['duplicates']}\n")
+            else:
+                out.append(f"// Deduplicated glyphs: {stats['duplicates']}, "
+                           f"saved {stats['saved_bytes']} bytes\n")
+        out.append("\n")
+        out.append("\n" + C_TYPEDEFS[font.kind] + "\n")
+        if font.kind == 'compressed':
+            out.append(C_DECODER + "\n")
+
+        out.append(self.hex_array(font_data_var, font.font_data))
+        out.append(self.glyph_array(font, glyphs_var))
+
+        out.append(f"static const {descriptor_type} {font_descriptor_var} = {{\n")
+        out.append(f"    {font_data_var},\n")
+        out.append(f"    {glyphs_var},\n")
+        out.append(f"    {data_size},  // font_data_size\n")
+        out.append(f"    {len(font.records)},  // glyphs_num\n")
+        extra = descriptor_extra(font)
+        if extra:
+            out.append(f"    {font.height},  // font_height\n")
+            out.append(f"    {extra[1]}  // {extra[0]}\n")
+        else:
+            out.append(f"    {font.height}  // font_height\n")
+        out.append("};\n\n")
+
+        if font.lookup:
+            out.append(self.lookup_table(font))
+        return ''.join(out)
+
+
+class CPackEmitter(CHeaderEmitter):
+    """C заголовок с несколькими шрифтами (font_model.FontPack).
+
+    Определения типов и распаковщик пишутся один раз, данные всех шрифтов -
+    в общий массив, а дескрипторы - в таблицу. Поле font_data дескриптора
+    указывает на начало данных шрифта внутри общего массива.
+    """
+
+    name = 'pack'
+    extension = '.h'
+
+    def filename(self, pack, output_dir):
+        return os.path.join(output_dir, f"font_pack_{pack.safe_name}{self.extension}")
+
+    def check(self, pack):
+        for font in pack.fonts:
+            super().check(font)
+            self.check_limits(font)
+
+    def emit(self, pack):
+        kind = pack.kind
+        stats = pack.stats
+        data_var = f"font_pack_data_{pack.safe_name}"
+        table_var = f"font_pack_{pack.safe_name}"
+        macro = f"FONT_PACK_{pack.safe_name.replace('.', '_').upper()}"
+        descriptor_type = C_TYPES[kind][1]
+
+        out = [C_DESCRIPTIONS[kind]]
+        out.append(f"\n// Font pack: {pack.name}\n")
+        out.append("// Generated by Python font rasterizer\n")
+        out.append(f"// Fonts: {len(pack.fonts)}, total glyphs: "
+                   f"{sum(len(font.records) for font in pack.fonts)}, format: {kind}\n")
+        if pack.fonts[0].codepage != DEFAULT_CODEPAGE:
+            out.append(f"// Codepage: {pack.fonts[0].codepage}\n")
+        out.append(f"// Shared data: {stats['raw_bytes']} -> {len(pack.font_data)} bytes")
+        if pack.fonts[0].dedup:
+            out.append(f", deduplicated glyphs: {stats['duplicates']}")
+        out.append("\n\n")
+        out.append("\n" + C_TYPEDEFS[kind] + "\n")
+        if kind == 'compressed':
+            out.append(C_DECODER + "\n")
+
+        out.append(self.hex_array(data_var, pack.font_data))
+        for font in pack.fonts:
+            out.append(f"// Font: {font.name}, Height: {font.height}px\n")
+            out.append(source_comment(font))
+            out.append(self.glyph_array(font, f"glyphs_{font.safe_name}"))
+
+        out.append(f"static const {descriptor_type} {table_var}[] = {{\n")
+        for font, base in zip(pack.fonts, pack.bases):
+            values = [f"{data_var} + {base}",
+                      f"glyphs_{font.safe_name}",
+                      f"{len(font.font_data)},  // font_data_size",
+                      f"{len(font.records)},  // glyphs_num"]
+            extra = descriptor_extra(font)
+            if extra:
+                values.append(f"{font.height},  // font_height")
+                values.append(f"{extra[1]}  // {extra[0]}")
+            else:
+                values.append(f"{font.height}  // font_height")
+            out.append(f"    {{   // {font.name}\n")
+            out.extend(f"        {value if '//' in value else value + ','}\n" for value in values)
+            out.append("    },\n")
+        out.append("};\n\n")
+
+        # Индексы шрифтов в таблице дескрипторов
+        out.append(f"#define {macro}_COUNT {len(pack.fonts)}\n")
+        for index, font in enumerate(pack.fonts):
+            out.append(f"#define {macro}_{font.safe_name.replace('.', '_').upper()} {index}\n")
+        out.append("\n")
+
+        for font in pack.fonts:
+            if font.lookup:
+                out.append(self.lookup_table(font))
+        return ''.join(out)
+
+
+# Типы полей записи глифа для C++ и Rust. Смещения 32-битные: в отличие
+# от C заголовка, для больших шрифтов они не переполняются
+FIELD_TYPES = {
+    'ascii_code': 8, 'width': 8,
+    'crop_x': 8, 'crop_y': 8, 'crop_width': 8, 'crop_height': 8,
+    'bit_offset': 32, 'byte_offset': 32, 'data_offset': 32, 'data_size': 16
+}
+
+
+class CppEmitter(Emitter):
+    """Заголовок C++17: данные и таблица глифов как inline constexpr"""
+
+    name = 'cpp'
+    extension = '.hpp'
+
+    def emit(self, font):
+        glyph_type, descriptor_type = C_TYPES[font.kind]
+        guard = f"SSD_1306_FONT_CPP_{font.kind.upper()}"
+        font_data_var = f"font_data_{font.safe_name}"
+        glyphs_var = f"glyphs_{font.safe_name}"
+        extra = descriptor_extra(font)
+
+        out = [f"// Font: {font.name}, Height: {font.height}px\n"]
+        out.append("// Generated by Python font rasterizer\n")
+        out.append(f"// Total glyphs: {len(font.records)}, format: {font.kind}\n")
+        if font.codepage != DEFAULT_CODEPAGE:
+            out.append(f"// Codepage: {font.codepage}\n")
+        out.append(source_comment(font))
+        out.append("\n#pragma once\n\n#include <cstdint>\n\n")
+
+        out.append(f"#ifndef {guard}\n#define {guard}\n\nnamespace ssd1306_font\n{{\n\n")
+        out.append(f"struct {glyph_type}\n{{\n")
+        out.extend(f"    std::uint{FIELD_TYPES[field]}_t {field};\n" for field in font.fields)
+        out.append("};\n\n")
+        out.append(f"struct {descriptor_type}\n{{\n")
+        out.append("    const std::uint8_t * font_data;\n")
+        out.append(f"    const {glyph_type} * glyphs;\n")
+        out.append("    std::uint32_t font_data_size;\n")
+        out.append("    std::uint16_t glyphs_num;\n")
+        out.append("    std::uint8_t font_height;\n")
+        if extra:
+            out.append(f"    std::uint8_t {extra[0]};\n")
+        out.append("};\n\n")
+        out.append(f"}} // namespace ssd1306_font\n\n#endif // {guard}\n\n")
+
+        lines = hex_lines(font.font_data)
+        out.append(f"inline constexpr std::uint8_t {font_data_var}[] = {{\n")
+        if lines:
+            out.extend(['    ', ',\n    '.join(lines), '\n'])
+        out.append("};\n\n")
+
+        out.append(f"inline constexpr ssd1306_font::{glyph_type} {glyphs_var}[] = {{\n")
+        out.extend(f"    {{ 0x{record[0]:02X}, {', '.join(map(str, record[1:]))} }}, "
+                   f"// '{char_display(glyph.encoding)}'\n"
+                   for record, glyph in zip(font.records, font.glyphs))
+        out.append("};\n\n")
+
+        values = [font_data_var, glyphs_var, str(len(font.font_data)),
+                  str(len(font.records)), str(font.height)]
+        if extra:
+            values.append(str(extra[1]))
+        out.append(f"inline constexpr ssd1306_font::{descriptor_type} font_{font.safe_name} = {{\n")
+        out.append(''.join(f"    {value},\n" for value in values))
+        out.append("};\n\n")
+
+        if font.lookup:
+            out.append(self.lookup_function(font))
+        return ''.join(out)
+
+    def lookup_function(self, font):
+        """constexpr функция поиска индекса глифа по коду, -1 - символа нет"""
+        kind, table = build_code_lookup([record[0] for record in font.records])
+        function_name = f"font_{font.safe_name}_glyph_index"
+        out = [f"constexpr int {function_name}(std::uint8_t code)\n{{\n"]
+        if kind == 'dense':
+            out.append("    constexpr std::uint8_t index[] = {\n")
+            out.extend(['        ', ',\n        '.join(hex_lines(bytes(table))), '\n'])
+            out.append("    };\n")
+            out.append("    return index[code] == 0xFF ? -1 : index[code];\n")
+        else:
+            for first, count, base in table:
+                out.append(f"    if (code >= 0x{first:02X} && code < 0x{first:02X} + {count})\n")
+                out.append(f"        return {base} + (code - 0x{first:02X});\n")
+            out.append("    return -1;\n")
+        out.append("}\n")
+        return ''.join(out)
+
+
+class RustEmitter(Emitter):
+    """Модуль Rust со static массивами; каждый шрифт - отдельный модуль"""
+
+    name = 'rust'
+    extension = '.rs'
+
+    def filename(self, font, output_dir):
+        # Имя файла - имя модуля, точка в нем недопустима
+        module = font.safe_name.replace('.', '_')
+        return os.path.join(output_dir, f"font_{module}{self.extension}")
+
+    def emit(self, font):
+        extra = descriptor_extra(font)
+        out = [f"// Font: {font.name}, Height: {font.height}px\n"]
+        out.append("// Generated by Python font rasterizer\n")
+        out.append(f"// Total glyphs: {len(font.records)}, format: {font.kind}\n")
+        if font.codepage != DEFAULT_CODEPAGE:
+            out.append(f"// Codepage: {font.codepage}\n")
+        out.append(source_comment(font))
+        out.append("\n")
+        out.append("#![allow(dead_code)]\n\n")
+
+        out.append("#[derive(Clone, Copy, Debug)]\npub struct Glyph {\n")
+        out.extend(f"    pub {field}: u{FIELD_TYPES[field]},\n" for field in font.fields)
+        out.append("}\n\n")
+        out.append("#[derive(Clone, Copy, Debug)]\npub struct FontDescriptor {\n")
+        out.append("    pub font_data: &'static [u8],\n")
+        out.append("    pub glyphs: &'static [Glyph],\n")
+        out.append("    pub font_height: u8,\n")
+        if extra:
+            out.append(f"    pub {extra[0]}: u8,\n")
+        out.append("}\n\n")
+
+        lines = hex_lines(font.font_data)
+        out.append(f"pub static FONT_DATA: [u8; {len(font.font_data)}] = [\n")
+        if lines:
+            out.extend(['    ', ',\n    '.join(lines), ',\n'])
+        out.append("];\n\n")
+
+        out.append(f"pub static GLYPHS: [Glyph; {len(font.records)}] = [\n")
+        fields = font.fields
+        for record, glyph in zip(font.records, font.glyphs):
+            values = [f"ascii_code: 0x{record[0]:02X}"]
+            values.extend(f"{field}: {value}" for field, value in zip(fields[1:], record[1:]))
+            out.append(f"    Glyph {{ {', '.join(values)} }}, "
+                       f"// '{char_display(glyph.encoding)}'\n")
+        out.append("];\n\n")
+
+        out.append("pub static FONT: FontDescriptor = FontDescriptor {\n")
+        out.append("    font_data: &FONT_DATA,\n")
+        out.append("    glyphs: &GLYPHS,\n")
+        out.append(f"    font_height: {font.height},\n")
+        if extra:
+            out.append(f"    {extra[0]}: {extra[1]},\n")
+        out.append("};\n")
+
+        if font.lookup:
+            out.append("\n" + self.lookup_function(font))
+        return ''.join(out)
+
+    def lookup_function(self, font):
+        """Функция поиска индекса глифа по коду символа"""
+        kind, table = build_code_lookup([record[0] for record in font.records])
+        out = ["pub fn glyph_index(code: u8) -> Option<usize> {\n"]
+        if kind == 'dense':
+            out.append("    const INDEX: [u8; 256] = [\n")
+            out.extend(['        ', ',\n        '.join(hex_lines(bytes(table))), ',\n'])
+            out.append("    ];\n")
+            out.append("    match INDEX[code as usize] {\n")
+            out.append("        0xFF => None,\n")
+            out.append("        index => Some(index as usize),\n")
+            out.append("    }\n")
+        else:
+            out.append("    match code {\n")
+            for first, count, base in table:
+                out.append(f"        0x{first:02X}..=0x{first + count - 1:02X} => "
+                           f"Some({base} + (code - 0x{first:02X}) as usize),\n")
+            out.append("        _ => None,\n")
+            out.append("    }\n")
+        out.append("}\n")
+        return ''.join(out)
+
+
+class PythonEmitter(Emitter):
+    """Импортируемый модуль Python с данными шрифта"""
+
+    name = 'python'
+    extension = '.py'
+    code_bits = None
+
+    def filename(self, font, output_dir):
+        module = font.safe_name.replace('.', '_')
+        return os.path.join(output_dir, f"font_{module}{self.extension}")
+
+    def emit(self, font):
+        extra = descriptor_extra(font)
+        out = [f'"""Font: {font.name}, Height: {font.height}px\n\n'
+               'Generated by Python font rasterizer\n"""\n\n']
+        out.append(f"FONT_NAME = {font.name!r}\n")
+        out.append(f"FONT_HEIGHT = {font.height}\n")
+        out.append(f"FORMAT = {font.kind!r}\n")
+        out.append(f"COMPRESSION = {font.codec!r}\n")
+        out.append(f"CODEPAGE = {font.codepage!r}\n")
+        if font.source is not None:
+            out.append(f"SOURCE = {font.source['file']!r}\n")
+            out.append(f"SOURCE_TYPE = {font.source['type']!r}\n")
+            if 'height' in font.source:
+                out.append(f"SOURCE_HEIGHT = {font.source['height']}\n")
+                out.append(f"SCALE_FILTER = {font.source['scale_filter']!r}\n")
+        if extra:
+            out.append(f"{extra[0].upper()} = {extra[1]}\n")
+        out.append(f"GLYPH_FIELDS = {font.fields!r}\n\n")
+
+        # bytes.fromhex по 32 байта в строке: модуль импортируется быстро
+        data_hex = font.font_data.hex()
+        if data_hex:
+            out.append("FONT_DATA = bytes.fromhex(\n")
+            out.extend(f"    '{data_hex[i:i + 64]}'\n" for i in range(0, len(data_hex), 64))
+            out.append(")\n\n")
+        else:
+            out.append("FONT_DATA = b''\n\n")
+
+        out.append("GLYPHS = (\n")
+        out.extend(f"    (0x{record[0]:02X}, {', '.join(map(str, record[1:]))}),  "
+                   f"# '{char_display(glyph.encoding)}'\n"
+                   for record, glyph in zip(font.records, font.glyphs))
+        out.append(")\n")
+
+        if font.lookup:
+            out.append("\nGLYPH_INDEX = {glyph[0]: index for index, glyph in enumerate(GLYPHS)}\n")
+            out.append("\n\ndef glyph_index(code):\n")
+            out.append('    """Индекс глифа по коду символа, -1 - символа нет"""\n')
+            out.append("    return GLYPH_INDEX.get(code, -1)\n")
+        return ''.join(out)
+
+
+class BlobEmitter(Emitter):
+    """Бинарный файл шрифта, пригодный для чтения на месте (см. font_blob)"""
+
+    name = 'blob'
+    extension = '.bin'
+    binary = True
+    # Для кодовой страницы unicode запись глифа с 32-битным кодом (font_blob)
+    code_bits = None
+
+    def emit(self, font):
+        return build_blob(font)
+
+
+EMITTERS = {emitter.name: emitter for emitter in (CHeaderEmitter(), CppEmitter(),
+                                                    RustEmitter(), PythonEmitter(),
+                                                    BlobEmitter())}
@@ -1,22 +1,47 @@
+import argparse
+import contextlib
+import cProfile
+import io
+import json
 import os
+import pstats
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 from PIL import Image, ImageDraw, ImageFont
 
+from bdf_glyph import Glyph, decode_bitmap
+from bdf_index import BDFIndex
+from build_manifest import BuildManifest, build_key, combine_keys
+from font_codepages import CODEPAGES, DEFAULT_CODEPAGE, char_code, select_glyphs
+from font_compress import CODECS, compression_report
+from font_emitters import EMITTERS, CPackEmitter
+from font_model import pack_font, pack_fonts, safe_identifier
+from font_packer import bit_string_to_bytes, glyph_to_bit_string
+from font_scale import DEFAULT_SCALE_FILTER, SCALE_FILTERS, scale_glyphs
+from font_scale import VERSION as SCALE_VERSION
+from font_stats import PipelineStats, format_stats_table
+from glyph_cache import GlyphCache
+
+# Версия генератора входит в ключ манифеста сборки: ее нужно увеличивать
+# при любом изменении выходных файлов при тех же входных данных
+GENERATOR_VERSION = 3
+
 
 class BDFParser:
-    def __init__(self, font_path, symbol_list):
+    # Версия парсера, входит в ключ кэша глифов
+    VERSION = 3
+
+    def __init__(self, font_path, symbol_list, index_dir=None, stats=None):
         self.font_path = font_path
         self.symbol_list = symbol_list
-        # Преобразуем символы в CP1251 коды для фильтрации
-        self.symbol_cp1251_codes = set()
-        for c in symbol_list:
-            try:
-                cp1251_bytes = c.encode('windows-1251')
-                cp1251_code = cp1251_bytes[0]
-                self.symbol_cp1251_codes.add(cp1251_code)
-            except UnicodeEncodeError:
-                # Если символ не кодируется в CP1251, пропускаем
-                pass
+        # Каталог индекса смещений глифов, None - без индекса
+        self.index_dir = index_dir
+        # Счетчики строк и глифов (font_stats.PipelineStats), None - без замеров
+        self.stats = stats
+        # Глифы фильтруются по Unicode кодам символов: так фильтр подходит
+        # для любой кодовой страницы вывода
+        self.symbol_encodings = {ord(c) for c in symbol_list}
         self.glyphs = []
         self.font_height = 0
         self.font_width = 0
@@ -30,78 +55,137 @@ class BDFParser:
         except (UnicodeEncodeError, UnicodeDecodeError):
             return None
 
-    def parse_glyph(self, lines, start_index):
-        """Парсит один глиф из BDF файла"""
-        glyph = {
-            'encoding': -1,  # Unicode код
-            'cp1251_code': -1,  # CP1251 код
-            'width': 0,
-            'height': 0,
-            'bitmap': []  # hex строки данных
-        }
+    def parse_glyph(self, lines):
+        """Парсит один глиф из потока строк BDF файла (после STARTCHAR).
 
-        i = start_index
-        in_bitmap = False
+        Bitmap декодируется только для глифов, проходящих фильтр CP1251,
+        остальные блоки пропускаются до ENDCHAR без разбора строк.
+        """
+        glyph = Glyph()
+        hex_rows = []  # hex строки данных
 
-        while i < len(lines):
-            line = lines[i].strip()
+        in_bitmap = False
+        skip = False
+
+        for line in lines:
+            line = line.strip()
+
+            if line == 'ENDCHAR':
+                if not skip and in_bitmap and glyph.encoding != -1:
+                    # Bitmap декодируется в байты один раз, при разборе
+                    glyph.bitmap = decode_bitmap(hex_rows, glyph.width)
+                    if self.stats is not None:
+                        self.stats.count('glyphs_decoded')
+                    return glyph
+                if skip and self.stats is not None:
+                    self.stats.count('glyphs_skipped')
+                return None
+            elif skip:
+                continue
+            elif in_bitmap:
+                hex_rows.append(line)
 
-            if line.startswith('ENCODING '):
+            elif line.startswith('ENCODING '):
                 unicode_code = int(line.split()[1])
-                glyph['encoding'] = unicode_code
+                glyph.encoding = unicode_code
                 # Преобразуем в CP1251
                 cp1251_code = self.unicode_to_cp1251(unicode_code)
                 if cp1251_code is not None:
-                    glyph['cp1251_code'] = cp1251_code
+                    glyph.code = cp1251_code
+                # Ненужный глиф пропускаем целиком
+                skip = not self.is_wanted(glyph)
 
             elif line.startswith('BBX '):
                 parts = line.split()
-                glyph['width'] = int(parts[1])
-                glyph['height'] = int(parts[2])
+                glyph.width = int(parts[1])
+                glyph.height = int(parts[2])
+                if len(parts) >= 5:
+                    glyph.x_offset = int(parts[3])
+                    glyph.y_offset = int(parts[4])
 
             elif line == 'BITMAP':
                 in_bitmap = True
-                glyph['bitmap'] = []
+                hex_rows = []
 
-            elif line == 'ENDCHAR':
-                if in_bitmap and glyph['encoding'] != -1:
-                    return glyph, i + 1
-                break
-            elif in_bitmap:
-                glyph['bitmap'].append(line)
+        return None
 
-            i += 1
+    def parse_font_indexed(self):
+        """Читает только запрошенные глифы по индексу смещений.
 
-        return None, i + 1
+        Возвращает None, если индекс недоступен или не соответствует файлу.
+        """
+        try:
+            index = BDFIndex.open(self.font_path, self.index_dir)
+            if index is None:
+                return None
+
+            encodings = sorted(self.symbol_encodings)
+            glyphs = []
+            with open(self.font_path, 'rb') as f:
+                for offset, length in index.lookup(encodings):
+                    f.seek(offset)
+                    block = f.read(length).decode('utf-8', errors='ignore')
+                    lines = block.splitlines()
+                    if not lines or not lines[0].startswith('STARTCHAR'):
+                        return None
+                    if self.stats is not None:
+                        self.stats.count('lines_scanned', len(lines))
+                    glyph = self.parse_glyph(iter(lines[1:]))
+                    if glyph:
+                        glyphs.append(glyph)
+        except (OSError, ValueError):
+            return None
+
+        self.font_width = index.font_width
+        self.font_height = index.font_height
+        self.glyphs = glyphs
+        return self.glyphs, self.font_height, self.font_width
+
+    def is_wanted(self, glyph):
+        """Проверяет, проходит ли глиф фильтр по набору символов.
+
+        Без набора символов проходят все глифы с кодом Unicode, в том числе
+        отсутствующие в CP1251: это полная таблица шрифта для любой
+        кодовой страницы (см. font_codepages).
+        """
+        if glyph.encoding == -1:
+            return False
+        if not self.symbol_encodings:
+            return True
+        return glyph.encoding in self.symbol_encodings
 
     def parse_font(self):
-        """Парсит BDF файл и возвращает массив глифов для нужных символов"""
+        """Парсит BDF файл и возвращает массив глифов для нужных символов.
+
+        Файл читается потоково за один проход; если задан набор символов,
+        чтение прекращается, как только найдены все запрошенные коды.
+        При заданном index_dir нужные глифы читаются напрямую по индексу.
+        """
+        if self.index_dir and self.symbol_encodings:
+            result = self.parse_font_indexed()
+            if result is not None:
+                return result
+
         try:
             with open(self.font_path, 'r', encoding='utf-8', errors='ignore') as f:
-                lines = f.readlines()
-
-            # Ищем размеры шрифта
-            for line in lines:
-                if line.startswith('FONTBOUNDINGBOX '):
-                    parts = line.split()
-                    self.font_width = int(parts[1])
-                    self.font_height = int(parts[2])
-                    break
-
-            # Парсим глифы
-            i = 0
-            while i < len(lines):
-                line = lines[i].strip()
-                if line.startswith('STARTCHAR'):
-                    glyph, next_i = self.parse_glyph(lines, i)
-                    if glyph and glyph['encoding'] != -1 and glyph['cp1251_code'] != -1:
-                        # Фильтруем по CP1251 кодам
-                        if (not self.symbol_cp1251_codes or
-                                glyph['cp1251_code'] in self.symbol_cp1251_codes):
+                # Строки считаются, только если включены замеры
+                lines = f if self.stats is None else self.stats.counted(f)
+                found_codes = set()
+                for line in lines:
+                    if line.startswith('FONTBOUNDINGBOX '):
+                        # Ищем размеры шрифта
+                        parts = line.split()
+                        self.font_width = int(parts[1])
+                        self.font_height = int(parts[2])
+                    elif line.startswith('STARTCHAR'):
+                        # Парсим глиф, parse_glyph дочитывает блок до ENDCHAR
+                        glyph = self.parse_glyph(lines)
+                        if glyph:
                             self.glyphs.append(glyph)
-                    i = next_i
-                else:
-                    i += 1
+                            found_codes.add(glyph.encoding)
+                            if (self.symbol_encodings and
+                                    found_codes >= self.symbol_encodings):
+                                break
 
             return self.glyphs, self.font_height, self.font_width
 
@@ -110,26 +194,148 @@ class BDFParser:
             return [], 0, 0
 
 
+# Векторные шрифты, которые растеризуются через FreeType (PIL ImageFont)
+OUTLINE_EXTENSIONS = ('.ttf', '.otf')
+FONT_EXTENSIONS = ('.bdf',) + OUTLINE_EXTENSIONS
+
+
+def is_outline_font(font_path):
+    """Проверяет, растеризуется ли шрифт (TTF/OTF) или разбирается как BDF"""
+    return os.path.splitext(font_path)[1].lower() in OUTLINE_EXTENSIONS
+
+
+class TTFRasterizer:
+    """Растеризует TTF/OTF шрифт в глифы того же вида, что дает BDFParser.
+
+    Все символы рисуются за один проход на общий атлас в оттенках серого,
+    который затем одной операцией переводится в 1 бит на пиксель по порогу.
+    Глиф занимает ячейку высотой height: размер шрифта подбирается так,
+    чтобы ascent + descent поместились в нее, ширина глифа - advance.
+    """
+
+    # Версия растеризатора, входит в ключ кэша глифов и манифеста сборки
+    VERSION = 1
+    # Высота, если в настройках она не задана
+    DEFAULT_HEIGHT = 8
+    # Порог яркости сглаженного пикселя, с которого он становится точкой
+    THRESHOLD = 128
+    ATLAS_WIDTH = 2048
+    # Символа U+10FFFF нет ни в одном шрифте: по нему узнается глиф .notdef
+    NOTDEF_PROBE = '\U0010FFFF'
+
+    def __init__(self, font_path, height, stats=None):
+        self.font_path = font_path
+        self.height = height
+        # Счетчики глифов (font_stats.PipelineStats), None - без замеров
+        self.stats = stats
+        self.font, self.ascent, self.descent = self.fit_font(font_path, height)
+        # Свободные строки ячейки делятся поровну сверху и снизу
+        self.top = (height - self.ascent - self.descent) // 2
+
+    @staticmethod
+    def fit_font(font_path, height):
+        """Наибольший размер шрифта, у которого ascent + descent не больше height"""
+        font = ImageFont.truetype(font_path, height)
+        ascent, descent = font.getmetrics()
+        size = max(height * height // max(ascent + descent, 1), 1)
+        while True:
+            font = ImageFont.truetype(font_path, size)
+            ascent, descent = font.getmetrics()
+            if ascent + descent <= height or size == 1:
+                return font, ascent, descent
+            size -= 1
+
+    def rasterize(self, chars):
+        """Растеризует символы, возвращает список Glyph в порядке chars.
+
+        Символ, вместо которого FreeType рисует .notdef, возвращается с
+        нулевой шириной и пустым bitmap: так кэш помнит и отсутствующие.
+        """
+        chars = list(chars) + [self.NOTDEF_PROBE]
+        height = self.height
+        # Поле между ячейками: части глифа за пределами advance
+        # не попадают в соседние ячейки
+        gap = height
+        widths = [max(round(self.font.getlength(char)), self.font.getbbox(char)[2], 0)
+                  for char in chars]
+
+        positions = []
+        x = y = 0
+        for width in widths:
+            if x and x + width > self.ATLAS_WIDTH:
+                x = 0
+                y += height + gap
+            positions.append((x, y))
+            x += width + gap
+
+        atlas_width = max(px + width for (px, _), width in zip(positions, widths)) + gap
+        atlas = Image.new('L', (atlas_width, y + height + gap), 0)
+        draw = ImageDraw.Draw(atlas)
+        for char, (x, y) in zip(chars, positions):
+            draw.text((x, y + self.top), char, font=self.font, fill=255)
+        # Порог для всего атласа сразу; строки режима '1' упакованы по
+        # байтам старшим битом вперед, как bitmap глифа BDF
+        lut = [0] * self.THRESHOLD + [255] * (256 - self.THRESHOLD)
+        atlas = atlas.point(lut, mode='1')
+
+        bitmaps = [atlas.crop((x, y, x + width, y + height)).tobytes() if width else b''
+                   for (x, y), width in zip(positions, widths)]
+        notdef = (widths.pop(), bitmaps.pop())
+        chars.pop()
+
+        glyphs = []
+        y_offset = self.top + self.ascent - height
+        for char, width, bitmap in zip(chars, widths, bitmaps):
+            code = char_code(char)
+            if (width, bitmap) == notdef and not char.isspace():
+                width, bitmap = 0, b''
+            glyphs.append(Glyph(ord(char), -1 if code is None else code,
+                                width, height, 0, y_offset, bitmap))
+        if self.stats is not None:
+            self.stats.count('glyphs_rasterized', len(glyphs))
+        return glyphs
+
+
 class FontGeneratorMenu:
     def __init__(self):
         self.fonts_dir = "fonts"
+        self.output_dir = "."
+        self.cache_dir = ".font_cache"
+        self.glyph_cache = GlyphCache(self.cache_dir, BDFParser.VERSION)
+        # Растеризованные глифы TTF/OTF: по таблице на шрифт и высоту
+        self.raster_cache = GlyphCache(self.cache_dir, f"ttf{TTFRasterizer.VERSION}")
+        # Масштабированные глифы BDF: по таблице на шрифт, высоту и фильтр
+        self.scale_cache = GlyphCache(self.cache_dir, f"scale{SCALE_VERSION}.{BDFParser.VERSION}")
+        # Замеры этапов (font_stats.PipelineStats), None - без замеров
+        self.stats = None
+        # Высота BDF шрифта, если generate_font_bitmap масштабировал его глифы
+        self.source_height = None
+        # Таблицы глифов в памяти (путь BDF или (путь, высота) TTF/OTF ->
+        # таблица), общие для нескольких выводов из одного шрифта; None - не хранить
+        self.glyph_tables = None
         self.selected_font = None
         self.settings = {
-            'height': 8,
+            'height': None,  # высота в пикселях, None - высота самого шрифта
             'symbol_set': 1,  # по умолчанию только цифры
-            'custom_symbols': ""  # для пользовательского набора
+            'custom_symbols': "",  # для пользовательского набора
+            'dedup': False,  # не хранить повторно одинаковые глифы
+            'compression': 'none',  # метод сжатия глифов: none, rle, rows
+            'crop': False,  # хранить только закрашенную область глифа
+            'lookup': False,  # таблица поиска глифа по коду символа
+            'layout': 'rows',  # порядок пикселей: rows - построчно, pages - страницы SSD1306
+            'scale_filter': DEFAULT_SCALE_FILTER,  # фильтр масштабирования: nearest, area
+            'codepage': DEFAULT_CODEPAGE,  # кодовая страница кодов глифов
+            'output_format': 'header',  # header - C заголовок, blob - бинарный файл
+            'stats': False  # печатать время этапов и счетчики после генерации
         }
-        if not os.path.exists(self.fonts_dir):
-            os.makedirs(self.fonts_dir)
-
 
     def scan_fonts_directory(self, directory=None):
-        """Сканирует директорию на наличие BDF шрифтов и папок"""
+        """Сканирует директорию на наличие шрифтов (BDF, TTF, OTF) и папок"""
         if directory is None:
             directory = self.fonts_dir
 
         items = []
-        supported_extensions = ['.bdf']  # Только BDF файлы
+        supported_extensions = FONT_EXTENSIONS
 
         try:
             for item in os.listdir(directory):
@@ -164,15 +370,20 @@ class FontGeneratorMenu:
         ext = ext.lower()
 
         types = {
-            '.bdf': 'Bitmap Distribution Format'
+            '.bdf': 'Bitmap Distribution Format',
+            '.ttf': 'TrueType',
+            '.otf': 'OpenType'
         }
         return types.get(ext, 'Unknown')
 
     def show_main_menu(self):
         """Показывает главное меню"""
+        if not os.path.exists(self.fonts_dir):
+            os.makedirs(self.fonts_dir)
+
         while True:
             print("\n" + "=" * 50)
-            print("МЕНЮ ГЕНЕРАТОРА ШРИФТОВ (только BDF)")
+            print("МЕНЮ ГЕНЕРАТОРА ШРИФТОВ (BDF, TTF, OTF)")
             print("=" * 50)
             print("1. Выбрать шрифт")
             print("2. Настройки генерации")
@@ -204,7 +415,7 @@ class FontGeneratorMenu:
             items = self.scan_fonts_directory(current_dir)
 
             if not items:
-                print("Папка пуста или не содержит BDF файлов")
+                print("Папка пуста или не содержит файлов шрифтов")
                 return
 
             rel_path = os.path.relpath(current_dir, self.fonts_dir)
@@ -268,17 +479,22 @@ class FontGeneratorMenu:
 
             print("\nНАСТРОЙКИ ГЕНЕРАЦИИ")
             print("=" * 40)
-            print(f"1. Высота шрифта: {self.settings['height']}px")
+            print(f"1. Высота шрифта: {self.height_display()}")
             print(f"2. Набор символов: {symbol_set_display}")
-            print("3. Назад")
+            print("3. Параметры вывода")
+            print(f"4. Фильтр масштабирования: {self.settings['scale_filter']}")
+            print(f"5. Замеры этапов: {'вкл' if self.settings['stats'] else 'выкл'}")
+            print("6. Назад")
             print("-" * 40)
 
-            choice = input("Выберите настройку (1-3): ").strip()
+            choice = input("Выберите настройку (1-6): ").strip()
 
             if choice == '1':
                 try:
-                    height = int(input("Введите высоту шрифта (8-64): ").strip())
-                    if 8 <= height <= 64:
+                    height = int(input("Введите высоту шрифта (8-64, 0 - высота самого шрифта): ").strip())
+                    if height == 0:
+                        self.settings['height'] = None
+                    elif 8 <= height <= 64:
                         self.settings['height'] = height
                     else:
                         print("Высота должна быть от 8 до 64!")
@@ -287,6 +503,84 @@ class FontGeneratorMenu:
             elif choice == '2':
                 self.select_symbol_set()
             elif choice == '3':
+                self.output_menu()
+            elif choice == '4':
+                filters = list(SCALE_FILTERS)
+                index = filters.index(self.settings['scale_filter'])
+                self.settings['scale_filter'] = filters[(index + 1) % len(filters)]
+            elif choice == '5':
+                self.settings['stats'] = not self.settings['stats']
+            elif choice == '6':
+                break
+            else:
+                print("Неверный выбор!")
+
+    def output_menu(self):
+        """Меню параметров выходного файла"""
+        while True:
+            dedup_display = "вкл" if self.settings['dedup'] else "выкл"
+            compression_names = {
+                'none': "нет",
+                'rle': "RLE (серии пикселей)",
+                'rows': "повтор строк"
+            }
+            layout_names = {
+                'rows': "построчный битовый поток",
+                'pages': "страницы SSD1306"
+            }
+            codepage_names = {
+                'cp1251': "CP1251 (Windows)",
+                'cp866': "CP866 (DOS)",
+                'koi8-r': "KOI8-R",
+                'iso8859-5': "ISO-8859-5",
+                'unicode': "Unicode (коды больше 0xFF - только модуль Python и бинарный файл)"
+            }
+            format_names = {
+                'header': "C заголовок (.h)",
+                'cpp': "C++ заголовок, constexpr (.hpp)",
+                'rust': "модуль Rust (.rs)",
+                'python': "модуль Python (.py)",
+                'blob': "бинарный файл (.bin)"
+            }
+
+            print("\nПАРАМЕТРЫ ВЫВОДА")
+            print("=" * 40)
+            print(f"1. Дедупликация одинаковых глифов: {dedup_display}")
+            print(f"2. Сжатие: {compression_names[self.settings['compression']]}")
+            print(f"3. Обрезка глифов по габаритам: {'вкл' if self.settings['crop'] else 'выкл'}")
+            print(f"4. Таблица поиска по коду символа: {'вкл' if self.settings['lookup'] else 'выкл'}")
+            print(f"5. Порядок пикселей: {layout_names[self.settings['layout']]}")
+            print(f"6. Формат файла: {format_names[self.settings['output_format']]}")
+            print(f"7. Кодовая страница: {codepage_names[self.settings['codepage']]}")
+            print("8. Назад")
+            print("-" * 40)
+
+            choice = input("Выберите параметр (1-8): ").strip()
+
+            if choice == '1':
+                self.settings['dedup'] = not self.settings['dedup']
+            elif choice == '2':
+                # Переключаем метод сжатия по кругу
+                methods = list(compression_names)
+                index = methods.index(self.settings['compression'])
+                self.settings['compression'] = methods[(index + 1) % len(methods)]
+            elif choice == '3':
+                self.settings['crop'] = not self.settings['crop']
+            elif choice == '4':
+                self.settings['lookup'] = not self.settings['lookup']
+            elif choice == '5':
+                layouts = list(layout_names)
+                index = layouts.index(self.settings['layout'])
+                self.settings['layout'] = layouts[(index + 1) % len(layouts)]
+            elif choice == '6':
+                formats = list(format_names)
+                index = formats.index(self.settings['output_format'])
+                self.settings['output_format'] = formats[(index + 1) % len(formats)]
+            elif choice == '7':
+                codepages = list(codepage_names)
+                index = codepages.index(self.settings['codepage'])
+                self.settings['codepage'] = codepages[(index + 1) % len(codepages)]
+            elif choice == '8':
                 break
             else:
                 print("Неверный выбор!")
@@ -299,12 +593,23 @@ class FontGeneratorMenu:
         print("2. Цифры и английские буквы (0-9, A-Z, a-z)")
         print("3. Все символы (0-9, A-Z, a-z, А-Я, а-я, Ё, ё)")
         print("4. Свой выбор")
+        print("5. Загрузить из файла (chars.py --literals -o ...)")
         print("-" * 30)
 
         try:
-            choice = int(input("Выберите вариант (1-4): ").strip())
-            if 1 <= choice <= 4:
-                if choice == 4:
+            choice = int(input("Выберите вариант (1-5): ").strip())
+            if 1 <= choice <= 5:
+                if choice == 5:
+                    path = input("Путь к файлу набора символов: ").strip()
+                    try:
+                        symbols = load_symbol_file(path)
+                    except OSError as e:
+                        print(f"Не удалось прочитать файл: {e}")
+                        return
+                    self.settings['symbol_set'] = symbols
+                    self.settings['custom_symbols'] = symbols
+                    print(f"Загружен набор длиной: {len(symbols)} символов")
+                elif choice == 4:
                     symbols = input("Введите свой набор символов: ")
                     # Не используем strip() вообще, чтобы сохранить все пробелы
                     self.settings['symbol_set'] = symbols
@@ -342,12 +647,18 @@ class FontGeneratorMenu:
         print(f"Имя файла: {self.selected_font['name']}")
         print(f"Путь: {self.selected_font['relative_path']}")
         print(f"Тип: {self.selected_font.get('font_type', 'Unknown')}")
-        print(f"Высота: {self.settings['height']}px")
+        print(f"Высота: {self.height_display()}")
         print(f"Набор символов: {symbol_set_display}")
         if not isinstance(self.settings['symbol_set'], int) and self.settings['custom_symbols']:
             print(f"Пользовательский набор: {self.settings['custom_symbols']}")
         print("=" * 40)
 
+    def height_display(self):
+        """Высота из настроек для меню"""
+        if self.settings['height'] is None:
+            return "по размеру шрифта"
+        return f"{self.settings['height']}px"
+
     def get_symbol_list(self):
         """Возвращает список символов в зависимости от настроек"""
         if isinstance(self.settings['symbol_set'], int):
@@ -375,195 +686,254 @@ class FontGeneratorMenu:
             return list(symbols) if symbols else []  # list() преобразует строку в список символов
         return []
 
+    def stage(self, name):
+        """Контекст замера этапа name; без замеров ничего не делает"""
+        if self.stats is None:
+            return contextlib.nullcontext()
+        return self.stats.stage(name)
+
     def generate_font_bitmap(self, font_path, height):
-        """Генерирует массив глифов из BDF файла"""
+        """Генерирует массив глифов из BDF файла или растеризует TTF/OTF шрифт.
+
+        height - нужная высота в пикселях; глифы BDF шрифта другой высоты
+        масштабируются, None - оставить высоту BDF шрифта.
+        """
+        self.source_height = None
+        with self.stage('parse'):
+            if is_outline_font(font_path):
+                return self.rasterize_glyphs(font_path, height or TTFRasterizer.DEFAULT_HEIGHT)
+            glyphs, font_height, font_width = self.read_glyphs(font_path)
+        if not height or height == font_height or not glyphs:
+            return glyphs, font_height, font_width
+        self.source_height = font_height
+        with self.stage('scale'):
+            return self.scale_glyphs(font_path, glyphs, font_height, height)
+
+    def load_glyph_table(self, font_path):
+        """Полная таблица глифов шрифта (по Unicode): из памяти, кэша или разбором"""
+        if self.glyph_tables is not None and font_path in self.glyph_tables:
+            return self.glyph_tables[font_path]
+
+        cached = self.glyph_cache.load(font_path) if self.glyph_cache is not None else None
+        if cached is None:
+            table = BDFParser(font_path, [], stats=self.stats).parse_font()
+            if table[0] and self.glyph_cache is not None:
+                self.glyph_cache.store(font_path, *table)
+        else:
+            table = cached
+            if self.stats is not None:
+                self.stats.count('cache_hits')
+
+        if self.glyph_tables is not None:
+            self.glyph_tables[font_path] = table
+        return table
+
+    def read_glyphs(self, font_path):
+        """Читает нужные глифы из кэша или BDF файла.
+
+        Полная таблица глифов нужна, когда из шрифта собирается несколько
+        выводов или она уже есть в кэше. Иначе парсер читает только нужные
+        глифы: при включенном кэше - через seek по индексу смещений, без
+        кэша - потоково, без записи файлов в каталог кэша.
+        """
         # Получаем список нужных символов
         symbol_list = self.get_symbol_list()
+        codepage = self.settings['codepage']
 
-        # Создаем парсер и парсим шрифт
-        parser = BDFParser(font_path, symbol_list)
-        glyphs, font_height, font_width = parser.parse_font()
+        cached = None
+        if self.glyph_tables is None and self.glyph_cache is not None:
+            cached = self.glyph_cache.load(font_path)
+            if cached is not None and self.stats is not None:
+                self.stats.count('cache_hits')
 
+        if self.glyph_tables is not None or cached is not None or not symbol_list:
+            all_glyphs, font_height, font_width = cached or self.load_glyph_table(font_path)
+        else:
+            # Символы без кода в кодовой странице не читаем вовсе
+            wanted = [char for char in symbol_list if char_code(char, codepage) is not None]
+            index_dir = self.cache_dir if self.glyph_cache is not None else None
+            parser = BDFParser(font_path, wanted, index_dir=index_dir, stats=self.stats)
+            all_glyphs, font_height, font_width = parser.parse_font()
+        # Выбираем набор символов и перекодируем в кодовую страницу вывода
+        glyphs = select_glyphs(all_glyphs, symbol_list, codepage)
+
+        if self.stats is not None:
+            # Глифы, отброшенные выбором: не из набора или без кода в кодовой странице
+            self.stats.count('glyphs_skipped', len(all_glyphs) - len(glyphs))
+            self.stats.count('glyphs_selected', len(glyphs))
         return glyphs, font_height, font_width
 
-    def bitmap_to_bits(self, bitmap_data, width, height):
-        """Преобразует bitmap данные из BDF в непрерывный поток битов"""
-        bits = []
-        # bitmap_data - это список hex строк из BDF файла
-        for hex_row in bitmap_data:
-            if hex_row:
-                try:
-                    hex_val = int(hex_row.strip(), 16)
-                    maxbit = len(hex_row) * 4 - 1
-                    # Преобразуем hex в биты (младший бит = правый пиксель)
-                    for bit_pos in range(width):
-                        bit_val = (hex_val >> (maxbit - bit_pos)) & 1
-                        bits.append(bit_val)
-                except ValueError:
-                    # Если не удалось преобразовать, добавляем нули
-                    bits.extend([0] * width)
-        return bits
+    def rasterize_glyphs(self, font_path, height):
+        """Растеризует нужные символы TTF/OTF шрифта в ячейки высотой height.
 
-    def bits_to_bytes(self, bits):
-        """Преобразует поток битов в байты без выравнивания"""
-        bytes_data = []
-
-        # Обрабатываем все биты подряд
-        for i in range(0, len(bits), 8):
-            byte_val = 0
-            for j in range(8):
-                if i + j < len(bits) and bits[i + j]:
-                    byte_val |= (1 << j)  # старший бит = левый пиксель
-            bytes_data.append(byte_val)
-
-        return bytes_data
-
-    def save_to_header_file(self, glyphs, font_name, height):
-        """Сохраняет шрифт в C header файл с оптимизацией по размеру"""
-        # Сортируем глифы по CP1251 коду, пропуская некорректные
-        valid_glyphs = [g for g in glyphs if 'cp1251_code' in g and g['cp1251_code'] >= 0]
-        sorted_glyphs = sorted(valid_glyphs, key=lambda g: g['cp1251_code'])
-
-        # Создаем безопасное имя шрифта для использования в идентифаторах        
-        safe_font_name = "".join(c if c.isalnum() or c in "._" else "_" for c in font_name)
-        
-        # Имена переменных с именем шрифта (без высоты в имени)
-        font_data_var = f"font_data_{safe_font_name}"
-        glyphs_var = f"glyphs_{safe_font_name}"
-        font_descriptor_var = f"font_{safe_font_name}"
-        
-        filename = f"font_{safe_font_name}.h"
-        
-        description = """/* Описание формата шрифта:
-
-         1. Массив font_data[] содержит:
-            - Битовый поток пикселей всех глифов
-            - Биты упакованы по строкам, слева направо, сверху вниз
-            - Бит 0 = пиксель отсутствует (фон), бит 1 = пиксель присутствует (символ)
-
-         2. Массив glyphs[] содержит структуры с информацией о каждом символе:
-            - ascii_code: код символа (может быть в cp1251 для русских букв)
-            - width: ширина символа в пикселях  
-            - bit_offset: смещение в битах от начала массива font_data до первого пикселя символа
-
-         3. Структура font_descriptor содержит:
-            - указатели на данные шрифта и глифов
-            - размеры и количество символов
-            - высоту шрифта
-
-         Принцип формирования битового потока:
-         - Биты идут последовательно: слева направо, сверху вниз для каждого символа
-         - Бит 0 соответствует левому верхнему пикселю символа
-         - Байты в массиве содержат по 8 бит, бит 7 первого байта - это бит 7, 
-           бит 0 второго байта - это бит 8 от начала потока и т.д.
-
-         Пример: символ шириной 5 пикселей, высотой 8 пикселей занимает 5*8=40 бит = 5 байт
-         Биты 0-4: первая строка (слева направо)
-         Биты 5-9: вторая строка (слева направо)
-         ... и так далее
-        */
+        Глифы кэшируются по (шрифт, высота, символ): при смене набора
+        символов растеризуются только символы, которых еще нет в кэше.
         """
-        typedef_description = """
-        #ifndef SSD_1306_FONT_DESCR
-        #define SSD_1306_FONT_DESCR
-
-        typedef struct 
-        {
-            unsigned char ascii_code;
-            unsigned char width;
-            unsigned short bit_offset;
-        } glyphs_t;
-
-        typedef struct
-        {
-            unsigned char * font_data;
-            glyphs_t * glyphs;
-            uint16_t font_data_size;
-            uint8_t glyphs_num;
-            uint8_t font_height;
-        } font_descriptor_t;
-
-        #endif //SSD_1306_FONT_DESCR
+        symbol_list = self.get_symbol_list()
+        codepage = self.settings['codepage']
+        if not symbol_list:
+            # Без набора символов берем все печатные символы кодовой страницы
+            codec = CODEPAGES[codepage] or CODEPAGES[DEFAULT_CODEPAGE]
+            symbol_list = [char for char in bytes(range(0x20, 0x100)).decode(codec, errors='ignore')
+                           if char.isprintable()]
+
+        key = (font_path, height)
+        if self.glyph_tables is not None and key in self.glyph_tables:
+            table = self.glyph_tables[key]
+        else:
+            cached = self.raster_cache.load(font_path, height) if self.raster_cache is not None else None
+            table = {glyph.encoding: glyph for glyph in cached[0]} if cached else {}
+
+        missing = [char for char in dict.fromkeys(symbol_list) if ord(char) not in table]
+        if self.stats is not None:
+            self.stats.count('cache_hits', len(set(symbol_list)) - len(missing))
+        if missing:
+            for glyph in TTFRasterizer(font_path, height, stats=self.stats).rasterize(missing):
+                table[glyph.encoding] = glyph
+            if self.raster_cache is not None:
+                self.raster_cache.store(font_path, list(table.values()), height,
+                                        max(glyph.width for glyph in table.values()), height)
+        if self.glyph_tables is not None:
+            self.glyph_tables[key] = table
+
+        # Глифы нулевой ширины - символы, которых нет в шрифте
+        glyphs = select_glyphs([glyph for glyph in table.values() if glyph.width],
+                               symbol_list, codepage)
+        if self.stats is not None:
+            self.stats.count('glyphs_skipped', len(table) - len(glyphs))
+            self.stats.count('glyphs_selected', len(glyphs))
+        return glyphs, height, max((glyph.width for glyph in glyphs), default=0)
+
+    def scale_glyphs(self, font_path, glyphs, font_height, height):
+        """Масштабирует глифы BDF шрифта до высоты height.
+
+        Результат кэшируется по (шрифт, высота, фильтр): масштабируются
+        только глифы, которых еще нет в кэше.
         """
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write(description)
-            f.write(f"\n// Font: {font_name}, Height: {height}px\n")
-            f.write("// Generated by Python font rasterizer\n")
-            f.write(f"// Total glyphs: {len(sorted_glyphs)}\n\n")
-            f.write("\n" + typedef_description + "\n")
-            
-            # Собираем все битовые данные
-            all_bits = []
-            bit_offsets = []
-            current_bit_offset = 0  # Смещение от начала данных (без байта высоты)
-
-            for glyph in sorted_glyphs:
-                # Преобразуем bitmap данные в непрерывный поток битов
-                glyph_bits = self.bitmap_to_bits(glyph['bitmap'], glyph['width'], height)
-                bit_offsets.append(current_bit_offset)
-                all_bits.extend(glyph_bits)
-                current_bit_offset += len(glyph_bits)
-
-            # Преобразуем биты в байты
-            all_bytes = self.bits_to_bytes(all_bits)
-
-            # Записываем данные шрифта (без высоты)
-            f.write(f"static const unsigned char {font_data_var}[] = {{\n")
-
-            if all_bytes:  # если есть данные
-                for i, byte in enumerate(all_bytes):
-                    if (i + 1) % 16 == 1:
-                        f.write("    ")
-                    f.write(f"0x{byte:02X}")
-                    if i < len(all_bytes) - 1:
-                        f.write(", ")
-                    if (i + 1) % 16 == 0:
-                        f.write("\n")
-                if len(all_bytes) % 16 != 0:
-                    f.write("\n")
-            else:
-                pass
-            f.write("};\n\n")
+        method = self.settings['scale_filter']
+        variant = f"{height}.{method}"
+        key = (font_path, variant)
+        if self.glyph_tables is not None and key in self.glyph_tables:
+            table = self.glyph_tables[key]
+        else:
+            cached = self.scale_cache.load(font_path, variant) if self.scale_cache is not None else None
+            table = {glyph.encoding: glyph for glyph in cached[0]} if cached else {}
+
+        missing = [glyph for glyph in glyphs if glyph.encoding not in table]
+        if self.stats is not None:
+            self.stats.count('cache_hits', len(glyphs) - len(missing))
+            self.stats.count('glyphs_scaled', len(missing))
+        if missing:
+            for glyph in scale_glyphs(missing, font_height, height, method):
+                table[glyph.encoding] = glyph
+            if self.scale_cache is not None:
+                self.scale_cache.store(font_path, list(table.values()), height,
+                                       max(glyph.width for glyph in table.values()), variant)
+        if self.glyph_tables is not None:
+            self.glyph_tables[key] = table
+
+        scaled = []
+        for glyph in glyphs:
+            result = table[glyph.encoding]
+            if result.code != glyph.code:
+                # Код в другой кодовой странице (см. select_glyphs)
+                result = Glyph(glyph.encoding, glyph.code, result.width, result.height,
+                               result.x_offset, result.y_offset, result.bitmap)
+            scaled.append(result)
+        return scaled, height, max(glyph.width for glyph in scaled)
 
-            # Записываем информацию о глифах
-            f.write(f"static const glyphs_t {glyphs_var}[] = {{\n")
+    def bitmap_to_bits(self, bitmap_data, width, height):
+        """Преобразует bitmap глифа (буфер строк) в непрерывный поток битов"""
+        return [int(bit) for bit in glyph_to_bit_string(bitmap_data, width)]
 
-            for i, glyph in enumerate(sorted_glyphs):
-                width = glyph['width']
-                bit_offset = bit_offsets[i]  # Смещение в битах от начала данных (исправлено!)
+    def bits_to_bytes(self, bits):
+        """Преобразует поток битов в байты без выравнивания"""
+        return list(bit_string_to_bytes(''.join('1' if bit else '0' for bit in bits)))
 
-                try:
-                    char_display = chr(glyph['encoding'])
-                    if char_display == '\\':
-                        char_display = '\\\\'
-                    elif char_display == '"':
-                        char_display = '\\"'
-                    elif char_display == "'":
-                        char_display = "\\'"
-                    elif char_display == '\n':
-                        char_display = '\\n'
-                    elif char_display == '\t':
-                        char_display = '\\t'
-                except:
-                    char_display = '?'
-
-                f.write(f"    {{ 0x{glyph['cp1251_code']:02X}, {width}, {bit_offset} }}, // '{char_display}'\n")
-            f.write("};\n\n")
-
-            # Записываем дескриптор шрифта
-            f.write(f"static const font_descriptor_t {font_descriptor_var} = {{\n")
-            f.write(f"    {font_data_var},\n")
-            f.write(f"    {glyphs_var},\n")
-            f.write(f"    {len(all_bytes)},  // font_data_size\n")
-            f.write(f"    {len(sorted_glyphs)},  // glyphs_num\n")
-            f.write(f"    {height}  // font_height\n")
-            f.write("};\n\n")
+    def source_info(self, font_path, font_name):
+        """Исходный шрифт для записи в выходной файл (см. PackedFont.source).
+
+        Вызывается после generate_font_bitmap: масштабированный шрифт
+        записывается с высотой BDF шрифта и фильтром. Немасштабированный
+        BDF файл с именем шрифта font_check находит сам, для него None.
+        """
+        file = os.path.basename(font_path)
+        stem, ext = os.path.splitext(file)
+        source = {'file': file, 'type': ext[1:].lower()}
+        if self.source_height:
+            source['height'] = self.source_height
+            source['scale_filter'] = self.settings['scale_filter']
+        elif ext.lower() == '.bdf' and safe_identifier(stem).lower() == safe_identifier(font_name).lower():
+            return None
+        return source
+
+    def pack_font(self, glyphs, font_name, height, source=None):
+        """Упаковывает глифы согласно текущим параметрам вывода"""
+        return pack_font(glyphs, font_name, height,
+                         layout=self.settings['layout'],
+                         crop=self.settings['crop'],
+                         compression=self.settings['compression'],
+                         dedup=self.settings['dedup'],
+                         lookup=self.settings['lookup'],
+                         codepage=self.settings['codepage'],
+                         source=source)
+
+    def save_font_file(self, glyphs, font_name, height, source=None):
+        """Упаковывает шрифт и сохраняет его в выбранном формате файла"""
+        with self.stage('pack'):
+            font = self.pack_font(glyphs, font_name, height, source)
+        with self.stage('emit'):
+            filename = EMITTERS[self.settings['output_format']].write(font, self.output_dir)
+        if self.stats is not None:
+            self.stats.count('bits_packed', sum(glyph.width * glyph.rows for glyph in font.glyphs))
+            self.stats.count('font_data_bytes', len(font.font_data))
+            self.stats.count('bytes_written', os.path.getsize(filename))
 
         print(f"Файл {filename} успешно создан!")
-        print(f"Всего битов: {len(all_bits)}")
-        print(f"Всего байт: {len(all_bytes)}")
-        print(f"Всего символов: {len(sorted_glyphs)}")
+        self.print_pack_summary(font)
+        if self.settings['output_format'] == 'blob':
+            print(f"Размер файла: {os.path.getsize(filename)} байт")
+        if font.kind == 'compressed':
+            self.print_compression_report(font.glyphs, height)
         return filename
+
+    def build_key(self, font_path, font_name):
+        """Ключ манифеста сборки для текущих настроек"""
+        options = {option: self.settings[option] for option in OUTPUT_OPTIONS}
+        if is_outline_font(font_path):
+            version = f"{GENERATOR_VERSION}.ttf{TTFRasterizer.VERSION}"
+        elif self.settings['height']:
+            version = f"{GENERATOR_VERSION}.{BDFParser.VERSION}.scale{SCALE_VERSION}"
+        else:
+            version = f"{GENERATOR_VERSION}.{BDFParser.VERSION}"
+        return build_key(font_path, ''.join(self.get_symbol_list()), self.settings['height'],
+                         font_name, options, version)
+
+    def print_pack_summary(self, font):
+        """Печатает размер упакованных данных и экономию от дедупликации"""
+        stats = font.stats
+        data_size = len(font.font_data)
+        if font.kind == 'compressed':
+            print(f"Сжатие {font.codec}: {stats['raw_bytes']} -> {data_size} байт")
+        elif font.kind == 'crop':
+            print(f"Обрезка глифов: {stats['raw_bytes']} -> {data_size} байт")
+        elif font.kind == 'pages':
+            print(f"Страничный формат: {font.pages} стр. на глиф, всего байт: {data_size}")
+        else:
+            print(f"Всего битов: {stats['total_bits']}")
+            print(f"Всего байт: {data_size}")
+        print(f"Всего символов: {len(font.records)}")
+        if font.dedup:
+            print(f"Повторяющихся глифов: {stats['duplicates']}, "
+                  f"сэкономлено байт: {stats['saved_bytes']}")
+
+    def print_compression_report(self, glyphs, height):
+        """Печатает сравнение методов сжатия по размеру и стоимости распаковки"""
+        print("\nСРАВНЕНИЕ МЕТОДОВ СЖАТИЯ")
+        print(f"{'Метод':<8}{'Байт':>8}{'Доля':>8}{'Шагов/глиф':>12}{'Python, мс':>12}")
+        for row in compression_report(glyphs, height):
+            print(f"{row['codec']:<8}{row['size']:>8}{row['ratio']:>8.2f}"
+                  f"{row['steps_per_glyph']:>12.1f}{row['decode_time'] * 1000:>12.2f}")
     
     def generate_font(self):
         """Генерация шрифта"""
@@ -576,7 +946,7 @@ class FontGeneratorMenu:
             return
 
         print(f"Генерация шрифта: {self.selected_font['name']}")
-        print(f"Высота: {self.settings['height']}px")
+        print(f"Высота: {self.height_display()}")
 
         symbol_set_names = {
             1: "только цифры",
@@ -593,22 +963,470 @@ class FontGeneratorMenu:
         print(f"Набор символов: {symbol_set_display}")
 
         try:
-            # Исправлено: распаковка кортежа
-            glyphs, self.settings['height'], font_width = self.generate_font_bitmap(self.selected_font['path'], self.settings['height'])
+            # Если входные данные не изменились, файл не трогаем
+            font_name = os.path.splitext(self.selected_font['name'])[0]
+            manifest = BuildManifest(self.output_dir)
+            output_id = manifest.output_id(font_name, self.settings['output_format'])
+            key = self.build_key(self.selected_font['path'], font_name)
+            filename = manifest.is_current(output_id, key)
+            if filename:
+                print(f"Файл {filename} не изменился, генерация пропущена")
+                return
+
+            self.stats = PipelineStats() if self.settings['stats'] else None
+            # Высота в настройках не перезаписывается высотой шрифта
+            glyphs, height, font_width = self.generate_font_bitmap(self.selected_font['path'],
+                                                                   self.settings['height'])
 
             if glyphs is not None:
-                actual_height = self.settings['height']
-                font_name = os.path.splitext(self.selected_font['name'])[0]
-                self.save_to_header_file(glyphs, font_name, actual_height)
+                filename = self.save_font_file(glyphs, font_name, height,
+                                               self.source_info(self.selected_font['path'], font_name))
+                manifest.record(output_id, key, filename)
+                manifest.save()
                 print("Генерация завершена!")
+                if self.stats is not None:
+                    print("\n" + format_stats_table([(font_name, self.stats)]))
             else:
                 print("Ошибка генерации шрифта!")
         except Exception as e:
             print(f"Ошибка генерации: {e}")
 
-def main():
+def load_symbol_file(path):
+    """Читает набор символов из файла (UTF-8), переводы строк не входят в набор"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        return f.read().replace('\r', '').replace('\n', '')
+
+
+# Параметры вывода, которые можно задать заданию пакетной генерации
+OUTPUT_OPTIONS = ('dedup', 'compression', 'crop', 'lookup', 'layout', 'scale_filter', 'codepage',
+                  'output_format')
+
+
+def parse_batch_job(spec):
+    """Разбирает задание вида <путь к шрифту>[:<набор символов>].
+
+    Шрифт - BDF, TTF или OTF файл. Набор 1-3 - предустановленный,
+    @<файл> - набор из файла (например, из chars.py --literals), любая
+    другая строка - свой набор символов.
+    """
+    lower = spec.lower()
+    found = [pos for pos in (lower.find(ext + ':') for ext in FONT_EXTENSIONS) if pos >= 0]
+    if not found:
+        return {'font': spec, 'symbol_set': 1}
+
+    pos = min(found)
+    font_path = spec[:pos + 4]
+    symbols = spec[pos + 5:]
+    if symbols in ('1', '2', '3'):
+        return {'font': font_path, 'symbol_set': int(symbols)}
+    if symbols.startswith('@'):
+        return {'font': font_path, 'symbol_set': load_symbol_file(symbols[1:])}
+    return {'font': font_path, 'symbol_set': symbols}
+
+
+def load_batch_manifest(manifest_path):
+    """Загружает список заданий из JSON файла.
+
+    Файл содержит список объектов с ключами font, symbol_set (или
+    symbols_file - файл с набором символов) и необязательными name (имя
+    шрифта в заголовке), height (высота шрифта в пикселях),
+    output_dir, pack (имя пакета шрифтов) и параметрами вывода из
+    OUTPUT_OPTIONS.
+    """
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    for job in jobs:
+        # Пути в манифесте считаются относительно самого манифеста
+        job['font'] = os.path.join(base_dir, job['font'])
+        if 'output_dir' in job:
+            job['output_dir'] = os.path.join(base_dir, job['output_dir'])
+        if 'symbols_file' in job:
+            job['symbol_set'] = load_symbol_file(os.path.join(base_dir, job.pop('symbols_file')))
+        job.setdefault('symbol_set', 1)
+    return jobs
+
+
+def job_font_name(job):
+    """Имя шрифта задания: из ключа name или из имени файла шрифта"""
+    return job.get('name') or os.path.splitext(os.path.basename(job['font']))[0]
+
+
+def describe_symbol_set(symbol_set):
+    """Короткое описание набора символов для сводки пакетной генерации"""
+    if isinstance(symbol_set, int):
+        return f"набор {symbol_set}"
+    return f"свой набор ({len(symbol_set)} симв.)"
+
+
+def batch_menu(job):
+    """Генератор, настроенный по заданию пакетной генерации"""
+    menu = FontGeneratorMenu()
+    menu.output_dir = job.get('output_dir', '.')
+    if job.get('no_cache'):
+        menu.glyph_cache = None
+        menu.raster_cache = None
+        menu.scale_cache = None
+    if 'height' in job:
+        menu.settings['height'] = job['height']
+    menu.settings['symbol_set'] = job['symbol_set']
+    if not isinstance(job['symbol_set'], int):
+        menu.settings['custom_symbols'] = job['symbol_set']
+    for option in OUTPUT_OPTIONS:
+        if option in job:
+            menu.settings[option] = job[option]
+    return menu
+
+
+def run_batch_job(job):
+    """Выполняет одно задание пакетной генерации: разбор, упаковка, запись"""
+    start = time.perf_counter()
+    font_name = job_font_name(job)
+    menu = batch_menu(job)
+    if job.get('stats'):
+        menu.stats = PipelineStats()
+    result = {
+        'label': f"{os.path.basename(job['font'])}, {describe_symbol_set(job['symbol_set'])}",
+        'ok': False,
+        'filename': None,
+        'glyphs': 0,
+        'file_size': 0,
+        'rebuilt': False,
+        'output_dir': menu.output_dir,
+        'output_id': BuildManifest.output_id(font_name, menu.settings['output_format']),
+        'key': None,
+        'error': None
+    }
+
+    try:
+        # Манифест здесь только читается, обновляет его run_batch
+        result['key'] = menu.build_key(job['font'], font_name)
+        if not job.get('force'):
+            filename = BuildManifest(menu.output_dir).is_current(result['output_id'], result['key'])
+            if filename:
+                result['ok'] = True
+                result['filename'] = filename
+                result['file_size'] = os.path.getsize(filename)
+                result['time'] = time.perf_counter() - start
+                return result
+
+        # Подробный вывод генератора в пакетном режиме не нужен
+        with contextlib.redirect_stdout(io.StringIO()):
+            glyphs, height, font_width = menu.generate_font_bitmap(job['font'], menu.settings['height'])
+            if not glyphs:
+                raise ValueError("в шрифте нет глифов для выбранного набора")
+            os.makedirs(menu.output_dir, exist_ok=True)
+            filename = menu.save_font_file(glyphs, font_name, height,
+                                           menu.source_info(job['font'], font_name))
+        result['ok'] = True
+        result['rebuilt'] = True
+        result['filename'] = filename
+        result['glyphs'] = len(glyphs)
+        result['file_size'] = os.path.getsize(filename)
+    except Exception as e:
+        result['error'] = str(e)
+
+    if menu.stats is not None:
+        result['stats'] = menu.stats.as_dict()
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+def warm_glyph_cache(font_path):
+    """Кладет полную таблицу глифов BDF шрифта в кэш, если ее там еще нет"""
     menu = FontGeneratorMenu()
-    menu.show_main_menu()
+    if not menu.glyph_cache.contains(font_path):
+        with contextlib.redirect_stdout(io.StringIO()):
+            menu.load_glyph_table(font_path)
+
+
+def run_pack_job(pack_name, jobs):
+    """Собирает шрифты заданий в один C заголовок с общим пулом данных.
+
+    Параметры вывода и каталог у всех заданий пакета должны совпадать.
+    """
+    start = time.perf_counter()
+    menus = [batch_menu(job) for job in jobs]
+    stats = PipelineStats() if jobs[0].get('stats') else None
+    glyph_tables = {}
+    for menu in menus:
+        menu.stats = stats
+        menu.glyph_tables = glyph_tables
+    settings = menus[0].settings
+    output_dir = menus[0].output_dir
+    result = {
+        'label': f"пакет {pack_name}, шрифтов: {len(jobs)}",
+        'ok': False,
+        'filename': None,
+        'glyphs': 0,
+        'file_size': 0,
+        'rebuilt': False,
+        'output_dir': output_dir,
+        'output_id': BuildManifest.output_id(pack_name, 'pack'),
+        'key': None,
+        'error': None
+    }
+
+    try:
+        for menu in menus[1:]:
+            if (menu.output_dir != output_dir or
+                    any(menu.settings[option] != settings[option] for option in OUTPUT_OPTIONS)):
+                raise ValueError("у шрифтов пакета должны совпадать output_dir и параметры вывода")
+        if settings['output_format'] != 'header':
+            raise ValueError("пакет шрифтов поддерживает только формат header")
+
+        result['key'] = combine_keys([pack_name] + [menu.build_key(job['font'], job_font_name(job))
+                                                    for job, menu in zip(jobs, menus)])
+        if not jobs[0].get('force'):
+            filename = BuildManifest(output_dir).is_current(result['output_id'], result['key'])
+            if filename:
+                result['ok'] = True
+                result['filename'] = filename
+                result['file_size'] = os.path.getsize(filename)
+                result['time'] = time.perf_counter() - start
+                return result
+
+        fonts = []
+        with contextlib.redirect_stdout(io.StringIO()):
+            for job, menu in zip(jobs, menus):
+                glyphs, height, font_width = menu.generate_font_bitmap(job['font'],
+                                                                       menu.settings['height'])
+                if not glyphs:
+                    raise ValueError(f"в шрифте {os.path.basename(job['font'])} нет глифов "
+                                     f"для выбранного набора")
+                font_name = job_font_name(job)
+                fonts.append((glyphs, font_name, height, menu.source_info(job['font'], font_name)))
+        with menus[0].stage('pack'):
+            pack = pack_fonts(fonts, pack_name,
+                              layout=settings['layout'],
+                              crop=settings['crop'],
+                              compression=settings['compression'],
+                              dedup=settings['dedup'],
+                              lookup=settings['lookup'],
+                              codepage=settings['codepage'])
+        os.makedirs(output_dir, exist_ok=True)
+        with menus[0].stage('emit'):
+            filename = CPackEmitter().write(pack, output_dir)
+        if stats is not None:
+            stats.count('bits_packed', sum(glyph.width * glyph.rows
+                                           for font in pack.fonts for glyph in font.glyphs))
+            stats.count('font_data_bytes', len(pack.font_data))
+            stats.count('bytes_written', os.path.getsize(filename))
+        result['ok'] = True
+        result['rebuilt'] = True
+        result['filename'] = filename
+        result['glyphs'] = sum(len(font.records) for font in pack.fonts)
+        result['file_size'] = os.path.getsize(filename)
+        result['note'] = (f"данные {pack.stats['raw_bytes']} -> {len(pack.font_data)} байт, "
+                          f"повторов глифов: {pack.stats['duplicates']}")
+    except Exception as e:
+        result['error'] = str(e)
+
+    if stats is not None:
+        result['stats'] = stats.as_dict()
+    result['time'] = time.perf_counter() - start
+    return result
+
+
+def run_batch(jobs, workers=None, show_stats=False, stats_json=None, profile=None):
+    """Запускает задания параллельно в пуле процессов и печатает сводку.
+
+    Каждое задание - отдельная задача пула. BDF шрифты, из которых
+    собирается несколько заданий, сначала разбираются по одному разу в кэш
+    глифов, и задания берут таблицу оттуда. Задания с ключом pack
+    собираются в общий заголовок пакета шрифтов, каждый пакет - одна
+    задача пула. show_stats печатает таблицу замеров этапов, stats_json -
+    имя файла для замеров в JSON ('-' - stdout). profile - файл для
+    профиля cProfile; задания одного шрифта или одного пакета выполняются
+    в текущем процессе. Возвращает количество неудачных заданий.
+    """
+    single_jobs = [job for job in jobs if not job.get('pack')]
+    packs = {}
+    for job in jobs:
+        if job.get('pack'):
+            packs.setdefault(job['pack'], []).append(job)
+
+    # Разные задания не должны перезаписывать один и тот же файл
+    outputs = {}
+    targets = [(job.get('output_dir', '.'), job_font_name(job),
+                job.get('output_format', 'header'), job['font']) for job in single_jobs]
+    targets += [(group[0].get('output_dir', '.'), name, 'pack', f"пакет {name}")
+                for name, group in packs.items()]
+    for output_dir, name, output_format, source in targets:
+        key = (os.path.abspath(output_dir), name, output_format)
+        if key in outputs:
+            print(f"Ошибка: задания {outputs[key]} и {source} пишут один файл, "
+                  f"задайте им разные name или output_dir", file=sys.stderr)
+            return len(jobs)
+        outputs[key] = source
+
+    job_counts = {}
+    for job in single_jobs:
+        font_path = os.path.abspath(job['font'])
+        job_counts[font_path] = job_counts.get(font_path, 0) + 1
+    if profile and len(job_counts) + len(packs) != 1:
+        print("Ошибка: профилировать можно только задания из одного шрифта или один пакет",
+              file=sys.stderr)
+        return len(jobs)
+    # Одиночному заданию полная таблица не нужна: оно читает свои глифы по индексу
+    warm_fonts = [font_path for font_path, count in job_counts.items()
+                  if count > 1 and not is_outline_font(font_path)
+                  and not any(job.get('no_cache') for job in single_jobs)]
+    tasks = [(run_batch_job, (job,)) for job in single_jobs]
+    tasks += [(run_pack_job, (name, group)) for name, group in packs.items()]
+
+    start = time.perf_counter()
+    if profile:
+        profiler = cProfile.Profile()
+        for font_path in warm_fonts:
+            profiler.runcall(warm_glyph_cache, font_path)
+        results = [profiler.runcall(func, *args) for func, args in tasks]
+        profiler.dump_stats(profile)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Задания стартуют, когда кэш их шрифтов уже заполнен
+            for future in [executor.submit(warm_glyph_cache, font_path) for font_path in warm_fonts]:
+                future.result()
+            futures = [executor.submit(func, *args) for func, args in tasks]
+            results = [future.result() for future in futures]
+
+    # Манифесты обновляются в одном процессе после завершения всех заданий
+    manifests = {}
+    for result in results:
+        if not result['rebuilt']:
+            continue
+        output_dir = result['output_dir']
+        if output_dir not in manifests:
+            manifests[output_dir] = BuildManifest(output_dir)
+        manifests[output_dir].record(result['output_id'], result['key'], result['filename'])
+    for manifest in manifests.values():
+        manifest.save()
+
+    failed = 0
+    rebuilt = 0
+    for result in results:
+        label = result['label']
+        if result['ok'] and result['rebuilt']:
+            rebuilt += 1
+            note = f", {result['note']}" if result.get('note') else ""
+            print(f"[ OK ] {label}: {result['glyphs']} глифов, {result['file_size']} байт{note}, "
+                  f"{result['time']:.2f} с -> {result['filename']}")
+        elif result['ok']:
+            print(f"[ -- ] {label}: без изменений -> {result['filename']}")
+        else:
+            failed += 1
+            print(f"[FAIL] {label}: {result['error']}")
+
+    print(f"Заданий: {len(results)}, пересобрано: {rebuilt}, "
+          f"без изменений: {len(results) - rebuilt - failed}, "
+          f"с ошибками: {failed}, время: {time.perf_counter() - start:.2f} с")
+
+    measured = [(result['label'], PipelineStats.from_dict(result['stats']))
+                for result in results if result.get('stats')]
+    if show_stats and measured:
+        print("\nЗАМЕРЫ ЭТАПОВ")
+        print(format_stats_table(measured))
+    if stats_json:
+        total = PipelineStats()
+        for _, stats in measured:
+            total.merge(stats)
+        report = {
+            'jobs': [{'label': result['label'], 'filename': result['filename'], **result['stats']}
+                     for result in results if result.get('stats')],
+            'total': total.as_dict()
+        }
+        if stats_json == '-':
+            json.dump(report, sys.stdout, ensure_ascii=False, indent=1)
+            print()
+        else:
+            with open(stats_json, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=1)
+    if profile:
+        print(f"\nПрофиль сохранен в {profile}, самые затратные функции:")
+        pstats.Stats(profile).sort_stats('cumulative').print_stats(15)
+    return failed
+
+
+def main():
+    if len(sys.argv) == 1:
+        menu = FontGeneratorMenu()
+        menu.show_main_menu()
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Пакетная генерация C заголовков шрифтов из BDF, TTF и OTF файлов "
+                    "(без аргументов запускается интерактивное меню)")
+    parser.add_argument('jobs', nargs='*', metavar='ШРИФТ[:НАБОР]',
+                        help="шрифт и набор символов: 1 - цифры, 2 - цифры и латиница, "
+                             "3 - все символы, @файл - набор из файла, "
+                             "иначе - строка со своим набором")
+    parser.add_argument('-m', '--manifest', help="JSON файл со списком заданий")
+    parser.add_argument('-o', '--output-dir', default='.',
+                        help="каталог для заголовков (по умолчанию текущий)")
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="число процессов (по умолчанию по числу ядер)")
+    parser.add_argument('--no-cache', action='store_true',
+                        help="не использовать кэш разобранных шрифтов")
+    parser.add_argument('--height', type=int, choices=range(8, 65), metavar='8-64',
+                        help="высота шрифта в пикселях: BDF шрифт другой высоты масштабируется "
+                             "(по умолчанию высота BDF шрифта, для TTF/OTF - 8)")
+    parser.add_argument('--scale-filter', choices=list(SCALE_FILTERS),
+                        help="фильтр масштабирования BDF: nearest - ближайший пиксель, "
+                             "area - доля закрашенной площади (по умолчанию)")
+    parser.add_argument('--pack', metavar='ИМЯ',
+                        help="собрать все шрифты в один заголовок font_pack_ИМЯ.h "
+                             "с общими типами и пулом данных")
+    parser.add_argument('--stats', action='store_true',
+                        help="напечатать время этапов и счетчики строк, глифов и байт")
+    parser.add_argument('--stats-json', metavar='ФАЙЛ',
+                        help="записать замеры этапов в JSON файл ('-' - в stdout)")
+    parser.add_argument('--profile', metavar='ФАЙЛ',
+                        help="профилировать единственное задание через cProfile "
+                             "и сохранить профиль в файл")
+    parser.add_argument('-f', '--force', action='store_true',
+                        help="пересобрать все файлы, даже если входные данные не изменились")
+    parser.add_argument('--dedup', action='store_true', default=None,
+                        help="не хранить повторно одинаковые глифы")
+    parser.add_argument('--compression', choices=['none'] + list(CODECS),
+                        help="метод сжатия глифов")
+    parser.add_argument('--crop', action='store_true', default=None,
+                        help="хранить только закрашенную область каждого глифа")
+    parser.add_argument('--lookup', action='store_true', default=None,
+                        help="добавить таблицу поиска глифа по коду символа")
+    parser.add_argument('--layout', choices=['rows', 'pages'],
+                        help="порядок пикселей: rows - построчно, pages - страницы SSD1306")
+    parser.add_argument('--codepage', choices=list(CODEPAGES),
+                        help="кодовая страница кодов глифов (по умолчанию cp1251)")
+    parser.add_argument('--format', dest='output_format', choices=list(EMITTERS),
+                        help="формат файла: header - C заголовок, cpp - C++ constexpr, "
+                             "rust - модуль Rust, python - модуль Python, blob - бинарный файл")
+    args = parser.parse_args()
+
+    jobs = [parse_batch_job(spec) for spec in args.jobs]
+    if args.manifest:
+        jobs.extend(load_batch_manifest(args.manifest))
+    if not jobs:
+        parser.error("не задано ни одного задания")
+
+    for job in jobs:
+        job.setdefault('output_dir', args.output_dir)
+        job['no_cache'] = args.no_cache
+        job['force'] = args.force
+        job['stats'] = args.stats or bool(args.stats_json)
+        if args.height is not None:
+            job.setdefault('height', args.height)
+        if args.pack:
+            job.setdefault('pack', args.pack)
+        # Флаги командной строки не перекрывают значения из манифеста
+        for option in OUTPUT_OPTIONS:
+            value = getattr(args, option)
+            if value is not None:
+                job.setdefault(option, value)
+
+    failed = run_batch(jobs, args.workers, show_stats=args.stats,
+                       stats_json=args.stats_json, profile=args.profile)
+    sys.exit(1 if failed else 0)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,226 @@
+from font_codepages import DEFAULT_CODEPAGE
+from font_compress import CODECS, bytes_to_bit_string, compress_glyphs, decompress_glyph
+from font_packer import (bit_string_to_bytes, glyph_to_bit_string, pack_cropped_glyphs,
+                         pack_glyphs, pack_page_glyphs)
+
+
+# Поля записи глифа после ascii_code и width для каждого вида упаковки
+GLYPH_FIELDS = {
+    'rows': ('bit_offset',),
+    'crop': ('crop_x', 'crop_y', 'crop_width', 'crop_height', 'bit_offset'),
+    'pages': ('byte_offset',),
+    'compressed': ('data_offset', 'data_size')
+}
+
+# Поле со смещением данных глифа; в rows и crop оно в битах, иначе в байтах
+OFFSET_FIELDS = {
+    'rows': 'bit_offset',
+    'crop': 'bit_offset',
+    'pages': 'byte_offset',
+    'compressed': 'data_offset'
+}
+
+
+def safe_identifier(font_name):
+    """Имя шрифта, пригодное для идентификаторов и имен файлов"""
+    return "".join(c if c.isalnum() or c in "._" else "_" for c in font_name)
+
+
+class PackedFont:
+    """Упакованный шрифт, не зависящий от формата выходного файла.
+
+    kind - вид упаковки ('rows', 'crop', 'pages' или 'compressed'),
+    font_data - упакованные пиксели, records - по кортежу на глиф:
+    (код символа в codepage, width, *поля из GLYPH_FIELDS[kind]). stats - словарь
+    упаковщика, дополненный raw_bytes (размер без сжатия и обрезки) и
+    saved_bytes (экономия от дедупликации). source - исходный шрифт для
+    font_check --verify: словарь с file (имя файла) и type ('bdf', 'ttf'
+    или 'otf'), у масштабированного BDF шрифта еще height (его высота) и
+    scale_filter; None - BDF файл с именем шрифта.
+    """
+
+    def __init__(self, name, height, glyphs, kind, font_data, records, stats,
+                 codec='none', dedup=False, lookup=False, codepage=DEFAULT_CODEPAGE, source=None):
+        self.name = name
+        self.safe_name = safe_identifier(name)
+        self.height = height
+        self.glyphs = glyphs
+        self.kind = kind
+        self.font_data = font_data
+        self.records = records
+        self.stats = stats
+        self.codec = codec
+        self.dedup = dedup
+        self.lookup = lookup
+        self.codepage = codepage
+        self.source = source
+
+    @property
+    def fields(self):
+        """Имена всех полей записи глифа"""
+        return ('ascii_code', 'width') + GLYPH_FIELDS[self.kind]
+
+    @property
+    def pages(self):
+        """Количество страниц SSD1306 на глиф"""
+        return (self.height + 7) // 8
+
+    @property
+    def codec_id(self):
+        return CODECS[self.codec].codec_id if self.kind == 'compressed' else 0
+
+
+def pack_font(glyphs, font_name, height, layout='rows', crop=False, compression='none',
+              dedup=False, lookup=False, codepage=DEFAULT_CODEPAGE, source=None):
+    """Сортирует глифы по коду и упаковывает их согласно параметрам вывода.
+
+    Код глифа берется из поля code; для другой кодовой страницы
+    глифы заранее перекодирует font_codepages.select_glyphs.
+    """
+    # Сортируем глифы по коду, пропуская некорректные
+    valid_glyphs = [g for g in glyphs if g.code >= 0]
+    sorted_glyphs = sorted(valid_glyphs, key=lambda g: g.code)
+    codes = [(g.code, g.width) for g in sorted_glyphs]
+
+    if layout == 'pages':
+        if compression != 'none' or crop:
+            raise ValueError("Страничный формат не совмещается со сжатием и обрезкой глифов")
+        kind = 'pages'
+        font_data, offsets, stats = pack_page_glyphs(sorted_glyphs, height, dedup=dedup)
+        records = [code + (offset,) for code, offset in zip(codes, offsets)]
+    elif compression != 'none':
+        if crop:
+            raise ValueError("Обрезка глифов и сжатие одновременно не поддерживаются")
+        kind = 'compressed'
+        font_data, offsets, sizes, stats = compress_glyphs(sorted_glyphs, compression,
+                                                            dedup=dedup)
+        # Проверяем, что каждый глиф распаковывается без потерь
+        for glyph, offset, size in zip(sorted_glyphs, offsets, sizes):
+            bits = decompress_glyph(compression, font_data, offset, size, glyph.width, height)
+            expected = glyph_to_bit_string(glyph.bitmap, glyph.width)
+            if bits != expected.ljust(glyph.width * height, '0'):
+                raise ValueError(f"Глиф 0x{glyph.code:02X} не восстанавливается после сжатия")
+        records = [code + (offset, size) for code, offset, size in zip(codes, offsets, sizes)]
+    elif crop:
+        kind = 'crop'
+        font_data, crops, stats = pack_cropped_glyphs(sorted_glyphs, dedup=dedup)
+        records = [code + crop_box for code, crop_box in zip(codes, crops)]
+    else:
+        kind = 'rows'
+        font_data, offsets, stats = pack_glyphs(sorted_glyphs, dedup=dedup)
+        records = [code + (offset,) for code, offset in zip(codes, offsets)]
+
+    if kind in ('rows', 'crop'):
+        # Сколько байт сэкономлено относительно данных без дедупликации
+        stats['saved_bytes'] = (stats['total_bits'] + stats['saved_bits'] + 7) // 8 - len(font_data)
+        full_bits = stats['total_bits'] if kind == 'rows' else stats['full_bits']
+        stats['raw_bytes'] = (full_bits + 7) // 8
+    elif kind == 'compressed':
+        stats['raw_bytes'] = (stats['raw_bits'] + 7) // 8
+    else:
+        stats['raw_bytes'] = len(font_data) + stats['saved_bytes']
+
+    return PackedFont(font_name, height, sorted_glyphs, kind, font_data, records, stats,
+                      codec=compression if kind == 'compressed' else 'none',
+                      dedup=dedup, lookup=lookup, codepage=codepage, source=source)
+
+
+class FontPack:
+    """Несколько шрифтов с одинаковыми параметрами вывода и общим пулом данных.
+
+    fonts - список PackedFont, у каждого font_data - срез пула
+    font_data[bases[i]:bases[i] + len(fonts[i].font_data)], а смещения
+    в записях глифов отсчитываются от начала среза. stats - словарь с
+    raw_bytes (сумма данных шрифтов по отдельности), duplicates и
+    saved_bytes (экономия пула относительно raw_bytes).
+    """
+
+    def __init__(self, name, fonts, font_data, bases, stats):
+        self.name = name
+        self.safe_name = safe_identifier(name)
+        self.fonts = fonts
+        self.font_data = font_data
+        self.bases = bases
+        self.stats = stats
+
+    @property
+    def kind(self):
+        return self.fonts[0].kind
+
+
+def pack_fonts(fonts, pack_name, layout='rows', crop=False, compression='none',
+               dedup=False, lookup=False, codepage=DEFAULT_CODEPAGE):
+    """Упаковывает несколько шрифтов в общий пул данных.
+
+    fonts - список (glyphs, font_name, height, source). Каждый шрифт упаковывается
+    как обычно, затем данные его глифов переносятся в пул; при dedup=True
+    совпадающие данные глифов, в том числе из разных шрифтов, хранятся
+    один раз. Смещения каждого шрифта отсчитываются от его первого глифа
+    в пуле, поэтому 16-битные поля не переполняются из-за соседей по пулу.
+    """
+    packed = [pack_font(glyphs, font_name, height, layout=layout, crop=crop,
+                        compression=compression, lookup=lookup, codepage=codepage, source=source)
+              for glyphs, font_name, height, source in fonts]
+    if not packed:
+        raise ValueError("Пакет шрифтов пуст")
+    names = [font.safe_name for font in packed]
+    duplicates = sorted({name for name in names if names.count(name) > 1})
+    if duplicates:
+        raise ValueError(f"Шрифты с одинаковым именем в пакете: {', '.join(duplicates)}")
+
+    kind = packed[0].kind
+    bit_units = kind in ('rows', 'crop')
+    field = 2 + GLYPH_FIELDS[kind].index(OFFSET_FIELDS[kind])
+
+    # Без дедупликации данные глифов идут подряд: глиф занимает отрезок
+    # от своего смещения до смещения следующего
+    pieces = []
+    seen_offsets = {}  # данные глифа -> смещение первой копии в пуле
+    position = 0
+    placed = []  # для каждого шрифта: [(смещение в пуле, длина), ...]
+    stats = {'raw_bytes': 0, 'duplicates': 0, 'saved_bytes': 0}
+    for font in packed:
+        stats['raw_bytes'] += len(font.font_data)
+        if bit_units:
+            stream = bytes_to_bit_string(font.font_data, font.stats['total_bits'])
+        else:
+            stream = font.font_data
+        offsets = [record[field] for record in font.records] + [len(stream)]
+        font_placed = []
+        for start, end in zip(offsets, offsets[1:]):
+            piece = stream[start:end]
+            if dedup and piece and piece in seen_offsets:
+                font_placed.append((seen_offsets[piece], len(piece)))
+                stats['duplicates'] += 1
+                continue
+            seen_offsets.setdefault(piece, position)
+            font_placed.append((position, len(piece)))
+            pieces.append(piece)
+            position += len(piece)
+        placed.append(font_placed)
+
+    font_data = bit_string_to_bytes(''.join(pieces)) if bit_units else b''.join(pieces)
+    stats['saved_bytes'] = stats['raw_bytes'] - len(font_data)
+
+    pack = []
+    bases = []
+    for font, font_placed in zip(packed, placed):
+        used = [(offset, length) for offset, length in font_placed if length]
+        if bit_units:
+            base = min(offset for offset, _ in used) // 8 if used else 0
+            end = (max(offset + length for offset, length in used) + 7) // 8 if used else 0
+            shift = base * 8
+        else:
+            base = min(offset for offset, _ in used) if used else 0
+            end = max(offset + length for offset, length in used) if used else 0
+            shift = base
+        # Пустым глифам (без данных) смещение не важно, пишем 0
+        records = [record[:field] + ((offset - shift) if length else 0,) + record[field + 1:]
+                   for record, (offset, length) in zip(font.records, font_placed)]
+        bases.append(base)
+        pack.append(PackedFont(font.name, font.height, font.glyphs, kind,
+                               font_data[base:max(end, base)], records, font.stats,
+                               codec=font.codec, dedup=dedup, lookup=lookup,
+                               codepage=codepage, source=font.source))
+
+    return FontPack(pack_name, pack, font_data, bases, stats)
@@ -0,0 +1,193 @@
+def glyph_to_bit_string(bitmap, width):
+    """Преобразует bitmap глифа (строки по (width + 7) // 8 байт) в строку '0'/'1'"""
+    if not bitmap or not width:
+        return ''
+    row_bits = (width + 7) // 8 * 8
+    # Переводим весь глиф одним числом и отрезаем выравнивание строк
+    bits = format(int.from_bytes(bitmap, 'big'), f'0{len(bitmap) * 8}b')
+    if row_bits == width:
+        return bits
+    return ''.join(bits[i:i + width] for i in range(0, len(bits), row_bits))
+
+
+def bit_string_to_bytes(bit_string):
+    """Переводит строку '0'/'1' в байты, первый символ - младший бит первого байта"""
+    if not bit_string:
+        return b''
+    num_bytes = (len(bit_string) + 7) // 8
+    # Разворот строки делает первый пиксель младшим битом длинного целого
+    return int(bit_string[::-1], 2).to_bytes(num_bytes, 'little')
+
+
+def pack_glyphs(glyphs, dedup=False):
+    """Упаковывает глифы подряд без выравнивания.
+
+    Пиксели идут слева направо, сверху вниз; пиксель N попадает в бит N % 8
+    байта N // 8. Строки обрабатываются целиком, а весь поток переводится
+    в байты одной операцией над длинным целым.
+
+    При dedup=True побитово совпадающие глифы не записываются повторно:
+    их смещение указывает на первую копию.
+
+    Возвращает (font_data, bit_offsets, stats), где bit_offsets[i] -
+    смещение в битах первого пикселя i-го глифа от начала font_data,
+    stats - словарь с total_bits (битов в потоке), duplicates (глифов,
+    указывающих на чужую копию) и saved_bits (сэкономлено битов).
+    """
+    pieces = []
+    bit_offsets = []
+    seen_offsets = {}  # битовая строка глифа -> смещение первой копии
+    current_bit_offset = 0
+    stats = {'total_bits': 0, 'duplicates': 0, 'saved_bits': 0}
+    for glyph in glyphs:
+        glyph_bits = glyph_to_bit_string(glyph.bitmap, glyph.width)
+        if dedup and glyph_bits and glyph_bits in seen_offsets:
+            bit_offsets.append(seen_offsets[glyph_bits])
+            stats['duplicates'] += 1
+            stats['saved_bits'] += len(glyph_bits)
+            continue
+        seen_offsets[glyph_bits] = current_bit_offset
+        bit_offsets.append(current_bit_offset)
+        pieces.append(glyph_bits)
+        current_bit_offset += len(glyph_bits)
+
+    stats['total_bits'] = current_bit_offset
+    return bit_string_to_bytes(''.join(pieces)), bit_offsets, stats
+
+
+def crop_glyph(glyph):
+    """Находит прямоугольник с закрашенными пикселями глифа.
+
+    Возвращает (x, y, width, height, bits): смещение прямоугольника от левого
+    верхнего угла глифа, его размеры и пиксели прямоугольника строкой '0'/'1'.
+    Для пустого глифа размеры нулевые.
+    """
+    row_bytes = glyph.row_bytes
+    if not row_bytes:
+        return 0, 0, 0, 0, ''
+    rows = [int.from_bytes(glyph.bitmap[i:i + row_bytes], 'big')
+            for i in range(0, len(glyph.bitmap), row_bytes)]
+    inked = [y for y, row in enumerate(rows) if row]
+    if not inked:
+        return 0, 0, 0, 0, ''
+
+    top, bottom = inked[0], inked[-1]
+    # Объединение всех строк дает занятые столбцы
+    columns = 0
+    for row in rows:
+        columns |= row
+    row_bits = row_bytes * 8
+    left = row_bits - columns.bit_length()
+    right = row_bits - 1 - ((columns & -columns).bit_length() - 1)
+    crop_width = right - left + 1
+    crop_height = bottom - top + 1
+
+    bits = glyph_to_bit_string(glyph.bitmap, glyph.width)
+    width = glyph.width
+    cropped = ''.join(bits[y * width + left:y * width + right + 1]
+                      for y in range(top, bottom + 1))
+    return left, top, crop_width, crop_height, cropped
+
+
+def pack_cropped_glyphs(glyphs, dedup=False):
+    """Упаковывает только закрашенные прямоугольники глифов.
+
+    Возвращает (font_data, crops, stats): crops[i] - (x, y, width, height,
+    bit_offset) для i-го глифа, stats - словарь с total_bits, duplicates,
+    saved_bits и full_bits (битов заняли бы глифы целиком).
+    """
+    pieces = []
+    crops = []
+    seen_offsets = {}  # (ширина, биты) обрезанного глифа -> смещение первой копии
+    current_bit_offset = 0
+    stats = {'total_bits': 0, 'duplicates': 0, 'saved_bits': 0, 'full_bits': 0}
+    for glyph in glyphs:
+        x, y, width, height, bits = crop_glyph(glyph)
+        stats['full_bits'] += glyph.width * glyph.rows
+        key = (width, bits)
+        if dedup and bits and key in seen_offsets:
+            crops.append((x, y, width, height, seen_offsets[key]))
+            stats['duplicates'] += 1
+            stats['saved_bits'] += len(bits)
+            continue
+        seen_offsets[key] = current_bit_offset
+        crops.append((x, y, width, height, current_bit_offset))
+        pieces.append(bits)
+        current_bit_offset += len(bits)
+
+    stats['total_bits'] = current_bit_offset
+    return bit_string_to_bytes(''.join(pieces)), crops, stats
+
+
+def glyph_to_pages(bitmap, width, height):
+    """Переводит глиф в страницы SSD1306.
+
+    Страница - 8 строк; для каждой страницы сверху вниз идут байты столбцов
+    слева направо, младший бит байта - верхний пиксель. Размер результата -
+    width * ((height + 7) // 8) байт.
+    """
+    pages = (height + 7) // 8
+    bits = glyph_to_bit_string(bitmap, width)[:width * height].ljust(width * height, '0')
+    # Срез с шагом width дает столбец сверху вниз; разворот делает верхний
+    # пиксель младшим битом, to_bytes раскладывает столбец по страницам
+    columns = [int(bits[x::width][::-1] or '0', 2).to_bytes(pages, 'little')
+               for x in range(width)]
+    return bytes(columns[x][page] for page in range(pages) for x in range(width))
+
+
+def pack_page_glyphs(glyphs, height, dedup=False):
+    """Упаковывает глифы в страничном формате SSD1306, каждый с границы байта.
+
+    Возвращает (font_data, byte_offsets, stats), stats - словарь с
+    duplicates и saved_bytes (экономия от дедупликации).
+    """
+    pieces = []
+    byte_offsets = []
+    seen_offsets = {}  # (ширина, байты) глифа -> смещение первой копии
+    current_offset = 0
+    stats = {'duplicates': 0, 'saved_bytes': 0}
+    for glyph in glyphs:
+        data = glyph_to_pages(glyph.bitmap, glyph.width, height)
+        key = (glyph.width, data)
+        if dedup and data and key in seen_offsets:
+            byte_offsets.append(seen_offsets[key])
+            stats['duplicates'] += 1
+            stats['saved_bytes'] += len(data)
+            continue
+        seen_offsets[key] = current_offset
+        byte_offsets.append(current_offset)
+        pieces.append(data)
+        current_offset += len(data)
+
+    return b''.join(pieces), byte_offsets, stats
+
+
+# Участки кодов просматриваются при поиске подряд, поэтому их список
+# выбирается только для нескольких участков
+MAX_LOOKUP_RANGES = 8
+
+
+def build_code_lookup(codes):
+    """Строит таблицу поиска индекса глифа по коду символа.
+
+    codes - отсортированные коды глифов. Возвращает ('dense', table), где
+    table - 256 индексов (0xFF - нет глифа), или ('ranges', ranges), где
+    ranges - список (первый код, количество, индекс первого глифа) для
+    непрерывных участков кодов. Участки выбираются, если их не больше
+    MAX_LOOKUP_RANGES, иначе таблица: поиск по ней не зависит от числа участков.
+    """
+    ranges = []
+    for index, code in enumerate(codes):
+        if ranges and ranges[-1][0] + ranges[-1][1] == code:
+            first, count, base = ranges[-1]
+            ranges[-1] = (first, count + 1, base)
+        else:
+            ranges.append((code, 1, index))
+
+    if len(ranges) <= MAX_LOOKUP_RANGES:
+        return 'ranges', ranges
+
+    table = [0xFF] * 256
+    for index, code in enumerate(codes):
+        table[code] = index
+    return 'dense', table
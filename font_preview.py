@@ -0,0 +1,149 @@
+import argparse
+import os
+import sys
+
+from PIL import Image, ImageDraw, ImageFont
+
+from font_check import glyph_pixels, load_blob_font, read_header
+from font_codepages import DEFAULT_CODEPAGE, char_code
+from font_compress import bytes_to_bit_string
+
+BACKGROUND = 255
+INK = 0
+LABEL_COLOR = 128
+GRID_COLOR = 200
+LABEL_HEIGHT = 12
+PADDING = 2
+
+# Строка '0'/'1' переводится в пиксели 'L' одной операцией translate
+PIXEL_TABLE = bytes.maketrans(b'01', bytes([BACKGROUND, INK]))
+
+
+def glyph_image(font, glyph, stream):
+    """Изображение глифа в режиме 'L' из упакованных данных шрифта"""
+    width = glyph['width']
+    height = font['font_height']
+    bits = glyph_pixels(font, glyph, stream).ljust(width * height, '0')
+    return Image.frombytes('L', (width, height), bits.encode('ascii').translate(PIXEL_TABLE))
+
+
+def glyph_images(font):
+    """Изображения всех глифов шрифта, font_data переводится в биты один раз"""
+    stream = bytes_to_bit_string(font['font_data'], len(font['font_data']) * 8)
+    return [glyph_image(font, glyph, stream) for glyph in font['glyphs']]
+
+
+def render_sheet(font, images, columns=16):
+    """Сетка глифов с подписями кодов (CP1251) над каждой ячейкой"""
+    height = font['font_height']
+    cell_width = max([image.width for image in images] + [24]) + PADDING * 2
+    cell_height = height + LABEL_HEIGHT + PADDING * 2
+    rows = max(1, (len(images) + columns - 1) // columns)
+
+    sheet = Image.new('L', (columns * cell_width + 1, rows * cell_height + 1), BACKGROUND)
+    draw = ImageDraw.Draw(sheet)
+    label_font = ImageFont.load_default()
+    for index, (glyph, image) in enumerate(zip(font['glyphs'], images)):
+        x = (index % columns) * cell_width
+        y = (index // columns) * cell_height
+        draw.rectangle([x, y, x + cell_width, y + cell_height], outline=GRID_COLOR)
+        draw.text((x + PADDING, y + 1), f"{glyph['ascii_code']:02X}", fill=LABEL_COLOR,
+                  font=label_font)
+        sheet.paste(image, (x + PADDING, y + LABEL_HEIGHT + PADDING))
+    return sheet
+
+
+def render_sample(font, images, text):
+    """Строка текста, набранная глифами шрифта.
+
+    Символы кодируются в кодовой странице шрифта, как коды глифов; символ,
+    которого нет в шрифте, показывается пустой рамкой.
+    """
+    height = font['font_height']
+    by_code = {glyph['ascii_code']: image for glyph, image in zip(font['glyphs'], images)}
+    missing_width = max(height // 2, 1)
+
+    pieces = []
+    for char in text:
+        code = char_code(char, font.get('codepage', DEFAULT_CODEPAGE))
+        pieces.append(by_code.get(code))
+
+    width = sum(image.width if image else missing_width for image in pieces)
+    sample = Image.new('L', (width + PADDING * 2, height + PADDING * 2), BACKGROUND)
+    draw = ImageDraw.Draw(sample)
+    x = PADDING
+    for image in pieces:
+        if image is None:
+            draw.rectangle([x, PADDING, x + missing_width - 1, PADDING + height - 1],
+                           outline=GRID_COLOR)
+            x += missing_width
+        else:
+            sample.paste(image, (x, PADDING))
+            x += image.width
+    return sample
+
+
+def render_preview(font, sample=None, columns=16, scale=2):
+    """Предпросмотр шрифта: сетка глифов и, если задана, строка образца"""
+    images = glyph_images(font)
+    parts = [render_sheet(font, images, columns)]
+    if sample:
+        parts.append(render_sample(font, images, sample))
+
+    width = max(part.width for part in parts)
+    preview = Image.new('L', (width, sum(part.height for part in parts) + PADDING * (len(parts) - 1)),
+                        BACKGROUND)
+    y = 0
+    for part in parts:
+        preview.paste(part, (0, y))
+        y += part.height + PADDING
+    if scale > 1:
+        preview = preview.resize((preview.width * scale, preview.height * scale), Image.NEAREST)
+    return preview
+
+
+def load_fonts(filename):
+    """Шрифты из C заголовка или бинарного файла в виде font_check.parse_header"""
+    if filename.lower().endswith('.bin'):
+        return [load_blob_font(filename)]
+    content, fonts = read_header(filename)
+    return fonts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a PNG preview of generated font files")
+    parser.add_argument('files', nargs='+', metavar='FILE',
+                        help="font header (.h, .hpp) or binary font file (.bin)")
+    parser.add_argument('-o', '--output-dir', default=None,
+                        help="directory for PNG files (default: next to each font file)")
+    parser.add_argument('-s', '--sample', default=None,
+                        help="sample string rendered below the glyph grid")
+    parser.add_argument('--columns', type=int, default=16, help="glyphs per row (default: 16)")
+    parser.add_argument('--scale', type=int, default=2,
+                        help="integer zoom factor (default: 2)")
+    args = parser.parse_args()
+
+    failed = 0
+    for filename in args.files:
+        try:
+            fonts = load_fonts(filename)
+            if not fonts:
+                raise ValueError("no font descriptor found")
+        except Exception as e:
+            print(f"Error: {filename}: {e}")
+            failed += 1
+            continue
+
+        stem = os.path.splitext(os.path.basename(filename))[0]
+        output_dir = args.output_dir or os.path.dirname(filename)
+        for index, font in enumerate(fonts):
+            suffix = f"_{index}" if len(fonts) > 1 else ""
+            output = os.path.join(output_dir, f"{stem}{suffix}.png")
+            render_preview(font, args.sample, args.columns, args.scale).save(output)
+            print(f"{output}: {len(font['glyphs'])} glyphs, height {font['font_height']}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
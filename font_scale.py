@@ -0,0 +1,138 @@
+from bdf_glyph import Glyph
+
+# PIL импортируется в функциях, которые строят изображения: имена фильтров
+# нужны font_blob и font_check и без PIL
+
+# Версия масштабирования, входит в ключ кэша глифов и манифеста сборки
+VERSION = 1
+
+# Фильтры масштабирования: nearest - ближайший пиксель, area - доля
+# закрашенной площади исходных пикселей с порогом (см. area_threshold)
+SCALE_FILTERS = ('nearest', 'area')
+DEFAULT_SCALE_FILTER = 'area'
+
+
+def axis_weights(count, source_count, height, font_height, method):
+    """Целочисленные веса фильтра по одной оси.
+
+    Исходный пиксель k занимает отрезок [k * height, (k + 1) * height),
+    выходной пиксель c - [c * font_height, (c + 1) * font_height): оба в
+    одних единицах длины. Для каждого выходного пикселя возвращает список
+    (исходный пиксель, вес), сумма весов не больше font_height.
+    """
+    weights = []
+    for c in range(count):
+        if method == 'nearest':
+            # Исходный пиксель под центром выходного, без округлений float
+            k = (2 * c + 1) * font_height // (2 * height)
+            weights.append([(k, font_height)] if k < source_count else [])
+            continue
+        start, end = c * font_height, (c + 1) * font_height
+        terms = []
+        for k in range(start // height, min((end - 1) // height + 1, source_count)):
+            overlap = min(end, (k + 1) * height) - max(start, k * height)
+            if overlap > 0:
+                terms.append((k, overlap))
+        weights.append(terms)
+    return weights
+
+
+def area_threshold(height, font_height):
+    """Порог яркости точки для фильтра area.
+
+    При уменьшении в s раз штрих толщиной в пиксель, разрезанный границей
+    выходных пикселей, закрывает большей частью не меньше s / 2 площади
+    точки: с таким порогом тонкие штрихи не пропадают. При увеличении
+    порог - половина площади. Из порога вычитается запас на округление
+    вниз в двух проходах фильтра.
+    """
+    return max(255 * min(height, font_height) // (2 * font_height) - 2, 1)
+
+
+def filter_pass(slices, weights, font_height, size, place):
+    """Один проход фильтра: взвешенная сумма срезов для каждого выхода.
+
+    slices(k) - срез 'L' с исходными пикселями k сразу всех глифов,
+    place(c) - координата вставки результата для выхода c в изображение
+    размера size. Суммы целочисленные: результат одного глифа не зависит от
+    того, какие еще глифы масштабируются вместе с ним.
+    """
+    from PIL import Image, ImageChops
+
+    tables = {}
+    result = Image.new('L', size, 0)
+    for c, terms in enumerate(weights):
+        total = None
+        for k, weight in terms:
+            if weight not in tables:
+                tables[weight] = [value * weight // font_height for value in range(256)]
+            term = slices(k).point(tables[weight])
+            total = term if total is None else ImageChops.add(total, term)
+        if total is not None:
+            result.paste(total, place(c))
+    return result
+
+
+def stack_bitmaps(glyphs, font_height):
+    """Ставит bitmap глифов друг под другом в один столбец режима '1'.
+
+    Каждый глиф занимает font_height строк по row_bytes общей ширины:
+    короткие строки дополняются нулями справа, недостающие строки - снизу.
+    """
+    from PIL import Image
+
+    row_bytes = max(glyph.row_bytes for glyph in glyphs)
+    cell = row_bytes * font_height
+    parts = []
+    for glyph in glyphs:
+        bitmap = glyph.bitmap
+        step = glyph.row_bytes
+        if step == 0:
+            bitmap = b''
+        elif step != row_bytes:
+            pad = bytes(row_bytes - step)
+            bitmap = b''.join(bitmap[i:i + step] + pad for i in range(0, len(bitmap), step))
+        parts.append(bitmap[:cell].ljust(cell, b'\0'))
+    return Image.frombytes('1', (max(row_bytes, 1) * 8, font_height * len(glyphs)), b''.join(parts))
+
+
+def scale_glyphs(glyphs, font_height, height, method=DEFAULT_SCALE_FILTER):
+    """Масштабирует глифы шрифта высотой font_height до высоты height.
+
+    Фильтр раздельный: сначала по строкам, затем по столбцам, и каждая
+    операция обрабатывает одну строку (столбец) сразу всех глифов. Ширина
+    глифа масштабируется с тем же коэффициентом и округляется.
+    """
+    from PIL import Image
+
+    if not glyphs:
+        return []
+    count = len(glyphs)
+    column = stack_bitmaps(glyphs, font_height).convert('L')
+    width = column.width
+
+    # Строки: столбец глифов переложен в изображение, где строка глифа i
+    # всех глифов - один блок шириной width
+    rows = Image.frombytes('L', (width * font_height, count), column.tobytes())
+    rows = filter_pass(lambda k: rows.crop((k * width, 0, (k + 1) * width, count)),
+                       axis_weights(height, font_height, height, font_height, method),
+                       font_height, (width * height, count), lambda c: (c * width, 0))
+    column = Image.frombytes('L', (width, count * height), rows.tobytes())
+
+    # Столбцы: столбец пикселей k всех глифов - один столбец изображения
+    scaled_width = -(-width * height // font_height)
+    scaled = filter_pass(lambda k: column.crop((k, 0, k + 1, count * height)),
+                         axis_weights(scaled_width, width, height, font_height, method),
+                         font_height, (scaled_width, count * height), lambda c: (c, 0))
+    threshold = area_threshold(height, font_height)
+    scaled = scaled.point([0] * threshold + [255] * (256 - threshold), mode='1')
+
+    scale = height / font_height
+    result = []
+    for index, glyph in enumerate(glyphs):
+        glyph_width = max(round(glyph.width * scale), 1) if glyph.width else 0
+        top = index * height
+        bitmap = scaled.crop((0, top, glyph_width, top + height)).tobytes() if glyph_width else b''
+        result.append(Glyph(glyph.encoding, glyph.code, glyph_width, height,
+                            round(glyph.x_offset * scale), round(glyph.y_offset * scale), bitmap))
+    return result
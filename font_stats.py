@@ -0,0 +1,82 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+# Счетчики в порядке вывода в таблице
+COUNTERS = ('lines_scanned', 'glyphs_decoded', 'glyphs_skipped', 'glyphs_rasterized', 'glyphs_selected',
+            'glyphs_scaled', 'cache_hits', 'bits_packed', 'font_data_bytes', 'bytes_written')
+
+
+class PipelineStats:
+    """Времена этапов и счетчики одного запуска генератора.
+
+    Объект передается в парсер и генератор явно; там, где он None, замеров
+    нет и накладных расходов тоже. Этап, запущенный несколько раз,
+    суммируется.
+    """
+
+    def __init__(self, timings=None, counters=None):
+        self.timings = dict(timings or {})  # этап -> секунды, в порядке запуска
+        self.counters = Counter(counters or {})
+
+    @contextmanager
+    def stage(self, name):
+        """Замеряет время блока with как этап name"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def count(self, name, value=1):
+        self.counters[name] += value
+
+    def counted(self, lines, name='lines_scanned'):
+        """Пропускает строки через себя, считая их в счетчике name"""
+        counters = self.counters
+        for line in lines:
+            counters[name] += 1
+            yield line
+
+    def as_dict(self):
+        return {'timings': dict(self.timings), 'counters': dict(self.counters)}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data.get('timings'), data.get('counters'))
+
+    def merge(self, other):
+        """Добавляет времена и счетчики другого запуска"""
+        for name, seconds in other.timings.items():
+            self.timings[name] = self.timings.get(name, 0.0) + seconds
+        self.counters.update(other.counters)
+
+
+def format_stats_table(rows):
+    """Таблица замеров: rows - список (подпись, PipelineStats).
+
+    Столбцы - этапы (мс) и ненулевые счетчики; последняя строка - сумма.
+    """
+    if not rows:
+        return ''
+    total = PipelineStats()
+    for _, stats in rows:
+        total.merge(stats)
+    if len(rows) > 1:
+        rows = rows + [('всего', total)]
+
+    stages = list(total.timings)
+    counters = [name for name in COUNTERS if total.counters.get(name)]
+    counters += sorted(name for name in total.counters if name not in COUNTERS)
+    label_width = max(len(label) for label, _ in rows) + 2
+    columns = [f"{stage}, мс" for stage in stages] + counters
+    widths = [max(len(column), 10) + 2 for column in columns]
+
+    lines = [f"{'':<{label_width}}" + ''.join(f"{column:>{width}}"
+                                              for column, width in zip(columns, widths))]
+    for label, stats in rows:
+        values = [f"{stats.timings.get(stage, 0.0) * 1000:.2f}" for stage in stages]
+        values += [str(stats.counters.get(name, 0)) for name in counters]
+        lines.append(f"{label:<{label_width}}" + ''.join(f"{value:>{width}}"
+                                                         for value, width in zip(values, widths)))
+    return '\n'.join(lines)
@@ -0,0 +1,153 @@
+import hashlib
+import os
+import struct
+
+from bdf_glyph import Glyph
+
+
+def cache_entry_path(cache_dir, font_path, version, extension):
+    """Возвращает путь к файлу кэша для шрифта (или None, если шрифта нет).
+
+    Имя файла - хэш от пути, размера и mtime шрифта и версии формата.
+    """
+    try:
+        st = os.stat(font_path)
+    except OSError:
+        return None
+    key = f"{os.path.abspath(font_path)}|{st.st_size}|{st.st_mtime_ns}|{version}"
+    digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+    return os.path.join(cache_dir, digest + extension)
+
+
+class GlyphCache:
+    """Дисковый кэш разобранных таблиц глифов BDF шрифтов.
+
+    Таблица всех глифов шрифта (по Unicode, с кодом глифа или -1)
+    хранится в компактном бинарном виде. Ключ записи - путь, размер и mtime BDF файла плюс версия
+    парсера, поэтому изменение шрифта или парсера автоматически делает
+    запись недействительной. При превышении лимита размера удаляются
+    давно не использованные записи.
+
+    variant различает несколько таблиц одного файла шрифта: растеризатор
+    TTF/OTF хранит по таблице на каждую высоту в пикселях.
+    """
+
+    MAGIC = b'BDFG'
+    FORMAT_VERSION = 4
+    EXTENSION = '.glyphs'
+
+    # magic, версия формата, ширина шрифта, высота шрифта, число глифов
+    HEADER = struct.Struct('<4sHHHI')
+    # encoding, код глифа (-1 - нет в кодовой странице; для unicode больше
+    # 16 бит), ширина, высота, смещения BBX, размер bitmap в байтах
+    GLYPH = struct.Struct('<iiHHhhI')
+
+    def __init__(self, cache_dir, parser_version, max_size=64 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.parser_version = parser_version
+        self.max_size = max_size
+
+    def entry_path(self, font_path, variant=None):
+        """Возвращает путь к файлу кэша для шрифта (или None, если шрифта нет)"""
+        version = f"{self.parser_version}.{self.FORMAT_VERSION}"
+        if variant is not None:
+            version = f"{version}.{variant}"
+        return cache_entry_path(self.cache_dir, font_path, version, self.EXTENSION)
+
+    def contains(self, font_path, variant=None):
+        """Проверяет, есть ли в кэше запись для шрифта, не читая ее"""
+        path = self.entry_path(font_path, variant)
+        return path is not None and os.path.exists(path)
+
+    def load(self, font_path, variant=None):
+        """Загружает таблицу глифов из кэша.
+
+        Возвращает (glyphs, font_height, font_width) или None при промахе.
+        """
+        path = self.entry_path(font_path, variant)
+        if path is None:
+            return None
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            glyphs, font_height, font_width = self.decode(data)
+            # Обновляем время доступа для вытеснения по давности
+            os.utime(path)
+        except (OSError, ValueError, struct.error):
+            return None
+        return glyphs, font_height, font_width
+
+    def store(self, font_path, glyphs, font_height, font_width, variant=None):
+        """Сохраняет таблицу глифов в кэш и вытесняет лишние записи"""
+        path = self.entry_path(font_path, variant)
+        if path is None:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'wb') as f:
+                f.write(self.encode(glyphs, font_height, font_width))
+            os.replace(tmp_path, path)
+            self.evict()
+        except (OSError, ValueError, struct.error):
+            # Кэш - только ускорение, ошибки записи не критичны
+            pass
+
+    def evict(self):
+        """Удаляет самые старые записи, пока кэш не уложится в лимит.
+
+        Учитываются все файлы каталога кэша, включая индексы BDF.
+        """
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.tmp'):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+            total += st.st_size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def encode(self, glyphs, font_height, font_width):
+        """Кодирует таблицу глифов в бинарный вид"""
+        parts = [self.HEADER.pack(self.MAGIC, self.FORMAT_VERSION,
+                                  font_width, font_height, len(glyphs))]
+        for glyph in glyphs:
+            parts.append(self.GLYPH.pack(glyph.encoding, glyph.code,
+                                         glyph.width, glyph.height,
+                                         glyph.x_offset, glyph.y_offset,
+                                         len(glyph.bitmap)))
+            parts.append(glyph.bitmap)
+        return b''.join(parts)
+
+    def decode(self, data):
+        """Декодирует бинарный вид обратно в таблицу глифов"""
+        magic, version, font_width, font_height, count = self.HEADER.unpack_from(data, 0)
+        if magic != self.MAGIC or version != self.FORMAT_VERSION:
+            raise ValueError("Неверный формат файла кэша")
+
+        glyphs = []
+        pos = self.HEADER.size
+        for _ in range(count):
+            encoding, code, width, height, x_offset, y_offset, size = \
+                self.GLYPH.unpack_from(data, pos)
+            pos += self.GLYPH.size
+            glyphs.append(Glyph(encoding, code, width, height,
+                                x_offset, y_offset, data[pos:pos + size]))
+            pos += size
+
+        if pos != len(data):
+            raise ValueError("Поврежденный файл кэша")
+        return glyphs, font_height, font_width
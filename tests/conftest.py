@@ -0,0 +1,8 @@
+import os
+import sys
+
+# Модули генератора лежат в корне репозитория
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+FONTS_DIR = os.path.join(ROOT, 'Fonts')
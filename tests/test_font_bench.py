@@ -0,0 +1,21 @@
+import contextlib
+import io
+import os
+
+from conftest import FONTS_DIR
+from font_bench import STAGES, bench_font, run_benchmarks
+
+
+def test_run_benchmarks_on_one_font():
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = run_benchmarks(FONTS_DIR, [1, 2, 3], 1, pattern='spleen-5x8')
+    assert {result['symbol_set'] for result in results} == {1, 2, 3}
+    assert {result['stage'] for result in results} == set(STAGES)
+
+
+def test_font_over_header_limits_skips_emit(tmp_path):
+    # Данные spleen-32x64 набора 2 не помещаются в 16-битные смещения заголовка
+    stages, glyphs = bench_font(os.path.join(FONTS_DIR, 'spleen', 'spleen-32x64.bdf'), 2, 1,
+                                str(tmp_path))
+    assert glyphs == 62
+    assert set(stages) == {'parse', 'bits', 'pack'}
@@ -0,0 +1,95 @@
+import contextlib
+import io
+import os
+
+import pytest
+
+from conftest import FONTS_DIR
+from font_blob import WIDE_GLYPH, FontBlob
+from font_check import run_verify, verify_file
+from font_generator import run_batch_job, run_pack_job
+
+# В spleen-5x8 нет кириллицы, а без нее кодовые страницы не отличаются
+BDF = os.path.join(FONTS_DIR, 'spleen', 'spleen-8x16.bdf')
+
+# Форматы, которые font_check умеет прочитать обратно
+FORMATS = ('header', 'cpp', 'blob')
+
+OPTIONS = {
+    'default': {},
+    'crop': {'crop': True},
+    'pages': {'layout': 'pages'},
+    'rle': {'compression': 'rle'},
+    'rows': {'compression': 'rows'},
+    'rle-dedup': {'compression': 'rle', 'dedup': True},
+    'rows-dedup': {'compression': 'rows', 'dedup': True},
+    'lookup': {'lookup': True},
+    'cp866': {'codepage': 'cp866'},
+    'koi8-r': {'codepage': 'koi8-r'},
+    'iso8859-5': {'codepage': 'iso8859-5'},
+    'scaled-nearest': {'height': 24, 'scale_filter': 'nearest'},
+    'scaled-area': {'height': 12, 'scale_filter': 'area', 'compression': 'rle'},
+    'scaled-crop': {'height': 12, 'crop': True, 'codepage': 'koi8-r'},
+}
+
+
+def batch_job(tmp_path, **options):
+    job = {'font': BDF, 'symbol_set': 3, 'output_dir': str(tmp_path), 'no_cache': True}
+    job.update(options)
+    return job
+
+
+def assert_verified(filename, **job):
+    result = verify_file({'file': filename, 'fonts_dir': FONTS_DIR, **job})
+    assert result['ok'], result['errors']
+    return result
+
+
+@pytest.mark.parametrize('options', OPTIONS.values(), ids=list(OPTIONS))
+@pytest.mark.parametrize('output_format', FORMATS)
+def test_generated_font_verifies(tmp_path, output_format, options):
+    result = run_batch_job(batch_job(tmp_path, output_format=output_format, **options))
+    assert result['ok'], result['error']
+    assert assert_verified(result['filename'])['glyphs'] == result['glyphs']
+
+
+def test_unicode_blob_verifies(tmp_path):
+    # Кириллица набора 3 в unicode не помещается в 8-битный код глифа
+    result = run_batch_job(batch_job(tmp_path, output_format='blob', codepage='unicode'))
+    assert result['ok'], result['error']
+    assert_verified(result['filename'])
+    blob = FontBlob(result['filename'])
+    assert blob.glyph_struct is WIDE_GLYPH
+    assert blob.find(ord('ё')) >= 0
+    blob.close()
+
+
+def test_unicode_header_rejected(tmp_path):
+    result = run_batch_job(batch_job(tmp_path, output_format='header', codepage='unicode'))
+    assert not result['ok']
+    assert '0x4' in result['error'] and 'blob' in result['error']
+
+
+def test_explicit_source_verifies(tmp_path):
+    result = run_batch_job(batch_job(tmp_path, output_format='header'))
+    assert_verified(result['filename'], bdf=BDF)
+
+
+@pytest.mark.parametrize('options', [{}, {'compression': 'rle', 'dedup': True}, {'crop': True}],
+                         ids=['default', 'rle-dedup', 'crop'])
+def test_pack_verifies(tmp_path, options):
+    jobs = [batch_job(tmp_path, name=name, symbol_set=symbol_set, **options)
+            for name, symbol_set in (('digits', '0123456789'), ('full', 3))]
+    result = run_pack_job('fonts', jobs)
+    assert result['ok'], result['error']
+    assert assert_verified(result['filename'])['fonts'] == 2
+
+
+def test_run_verify_reports_failures(tmp_path):
+    result = run_batch_job(batch_job(tmp_path, output_format='blob'))
+    broken = tmp_path / 'font_broken.bin'
+    broken.write_bytes(b'\0' * 16)
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        failed = run_verify([result['filename'], str(broken)], workers=1, fonts_dir=FONTS_DIR)
+    assert failed == 1
+    assert 'passed: 1, failed: 1' in output.getvalue()